@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 """M365 Admin Tool v6.1 — Kaulich IT Systems GmbH — Sidebar-Navigation, 12 Module
-   v6.1: Modul-Vorabprüfung, Scrollbar-Fix, PW-Reset via Graph"""
+   v6.1: Modul-Vorabprüfung, Scrollbar-Fix, PW-Reset via Graph
+   CLI:  python M365-Tool-v6.1.py --admin admin@firma.de offboard --user max@firma.de --steps sign_in,hide_gal"""
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import subprocess, threading, json, queue, time, os, csv
-from datetime import datetime
+import subprocess, threading, json, queue, time, os, csv, random, re, sys, argparse, collections, logging.handlers, sqlite3, secrets, inspect
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
 C = {
     'bg':'#1a1b26','sidebar':'#16161e','panel':'#1f2028','input':'#282a36','hdr':'#12121a',
@@ -20,7 +23,8 @@ SIDEBAR = [
                   ('security','🔒','Sicherheit'),('bulk','🏷️','Bulk-Aktionen')]),
     ("BENUTZER", [('userinfo','👤','Benutzer-Info'),('licenses','📊','Lizenzen'),
                    ('offboarding','🚪','Offboarding')]),
-    ("EXPORT", [('csvexport','📋','CSV-Export')]),
+    ("EXPORT", [('csvexport','📋','CSV-Export'),('mbreport','📦','Postfach-Größen')]),
+    ("SYSTEM", [('jobs','⚙️','Jobs')]),
 ]
 OB_STEPS = [
     ('sign_in','🔒 Anmeldung blockieren'),('reset_pw','🔑 Passwort zurücksetzen'),
@@ -30,6 +34,118 @@ OB_STEPS = [
     ('disable_sync','📱 Protokolle aus'),('remove_delegates','🔓 Delegierungen'),
 ]
 OB_N = {k:v.split(' ',1)[1] for k,v in OB_STEPS}
+# Abhängigkeiten (Schritt → Vorgänger, nur wenn beide gewählt); alles andere läuft parallel.
+# Lizenz erst nach der Shared-Umwandlung entziehen, sonst wird das Postfach nach 30 Tagen gelöscht.
+OB_DEPS = {'remove_licenses':('convert_shared',)}
+# Schritte, die auf dasselbe Cmdlet + Identity gehen: schritt → (cmdlet, parameter(opts) | None=übersprungen, detail(opts)).
+# Der Planer fasst sie zu EINEM Aufruf zusammen.
+OB_MERGE = {
+    'convert_shared':('Set-Mailbox',lambda o:'-Type Shared',lambda o:"→ Shared"),
+    'fwd':('Set-Mailbox',lambda o:f'-ForwardingSmtpAddress "smtp:{o["fwd"]}" -DeliverToMailboxAndForward $true' if o.get('fwd') else None,
+           lambda o:f"→ {o['fwd']}"),
+    'hide_gal':('Set-Mailbox',lambda o:'-HiddenFromAddressListsEnabled $true',lambda o:"GAL versteckt"),
+}
+# Ist-Zustand eines Benutzers in EINEM Aufruf (Plan-Modus); __UE__ wird ersetzt
+OB_STATE_PS = ";".join([
+    "$u='__UE__';$r=[ordered]@{}",
+    "$mb=Get-Mailbox -Identity $u -EA SilentlyContinue",
+    "if($mb){$r.Type=[string]$mb.RecipientTypeDetails;$r.Fwd=[string]$mb.ForwardingSmtpAddress;$r.Hidden=[bool]$mb.HiddenFromAddressListsEnabled"
+    ";$c=Get-CASMailbox -Identity $u -EA SilentlyContinue"
+    ";if($c){$r.Proto=@(@($c.ActiveSyncEnabled,$c.OWAEnabled,$c.PopEnabled,$c.ImapEnabled,$c.MAPIEnabled,$c.EwsEnabled)|?{$_}).Count}"
+    ";$r.OOO=[string](Get-MailboxAutoReplyConfiguration -Identity $u -EA SilentlyContinue).AutoReplyState"
+    ";$r.Delegates=@(Get-MailboxPermission -Identity $u -EA SilentlyContinue|?{$_.User -ne 'NT AUTHORITY\\SELF' -and -not $_.IsInherited}|%{[string]$_.User})}",
+    "$dn=(Get-User -Identity $u -EA SilentlyContinue).DistinguishedName",
+    "if($dn){$dn=$dn -replace \"'\",\"''\";$f=\"Members -eq '$dn'\""
+    ";$r.Unified=@(Get-Recipient -ResultSize Unlimited -RecipientTypeDetails GroupMailbox -Filter $f -EA SilentlyContinue|%{[string]$_.PrimarySmtpAddress})"
+    ";$r.Unified+=@(Get-UnifiedGroup -ResultSize Unlimited -Filter \"ManagedBy -eq '$dn'\" -EA SilentlyContinue|%{[string]$_.PrimarySmtpAddress}|?{$r.Unified -notcontains $_})"
+    ";$r.DL=@(Get-Recipient -ResultSize Unlimited -RecipientTypeDetails MailUniversalDistributionGroup,MailUniversalSecurityGroup,MailNonUniversalGroup -Filter $f -EA SilentlyContinue|%{[string]$_.PrimarySmtpAddress})}",
+    "if(Get-Command Get-MgUser -EA SilentlyContinue){$g=Get-MgUser -UserId $u -Property AccountEnabled -EA SilentlyContinue"
+    ";if($g){$r.Enabled=[bool]$g.AccountEnabled;$r.Lic=@(Get-MgUserLicenseDetail -UserId $u -EA SilentlyContinue|%{[string]$_.SkuPartNumber})}}",
+    "$r|ConvertTo-Json -Compress -Depth 3"])
+# Postfächer mit Weiterleitung: OPATH-Filter auf dem Server + nur benötigte Eigenschaften (EXO V3, REST).
+# Filter in '…', sonst setzt PowerShell für $null einen Leerstring ein. Ohne Get-EXOMailbox (altes Modul) → Get-Mailbox -Filter.
+FWD_SEL = "|Select PrimarySmtpAddress,ForwardingSmtpAddress,DeliverToMailboxAndForward|ConvertTo-Json -Compress"
+FWD_PS = ("Get-EXOMailbox -ResultSize Unlimited -Filter 'ForwardingSmtpAddress -ne $null' -PropertySets Minimum"
+          " -Properties ForwardingSmtpAddress,DeliverToMailboxAndForward"+FWD_SEL)
+FWD_PS_RPS = "Get-Mailbox -ResultSize Unlimited -Filter 'ForwardingSmtpAddress -ne $null'"+FWD_SEL
+# Lesezugriffe je Fähigkeit: (EXO V3 / REST, klassisch) — __ID__ wird ersetzt. Exo.q nimmt EXO, fällt je Fähigkeit zurück.
+_NS='NT AUTHORITY\\SELF'
+DAL_PS = {
+    'mailboxes':("Get-EXOMailbox -ResultSize Unlimited -PropertySets Minimum|Select DisplayName,PrimarySmtpAddress,RecipientTypeDetails|ConvertTo-Json -Compress",
+                 "Get-Mailbox -ResultSize Unlimited|Select DisplayName,PrimarySmtpAddress,RecipientTypeDetails|ConvertTo-Json -Compress"),
+    'forwarding':(FWD_PS,FWD_PS_RPS),
+    'mailbox':('Get-EXOMailbox -Identity "__ID__" -PropertySets Minimum -Properties ForwardingSmtpAddress,HiddenFromAddressListsEnabled,WhenCreated'
+               '|Select DisplayName,PrimarySmtpAddress,RecipientTypeDetails,ForwardingSmtpAddress,HiddenFromAddressListsEnabled,WhenCreated|ConvertTo-Json',
+               'Get-Mailbox -Identity "__ID__"|Select DisplayName,PrimarySmtpAddress,RecipientTypeDetails,ForwardingSmtpAddress,HiddenFromAddressListsEnabled,WhenCreated|ConvertTo-Json'),
+    'mailbox_stats':('Get-EXOMailboxStatistics -Identity "__ID__" -PropertySets Minimum|Select @{N="TotalItemSize";E={[string]$_.TotalItemSize}},ItemCount|ConvertTo-Json',
+                     'Get-MailboxStatistics -Identity "__ID__" -EA SilentlyContinue|Select @{N="TotalItemSize";E={[string]$_.TotalItemSize}},ItemCount|ConvertTo-Json'),
+    'full_access':(f'Get-EXOMailboxPermission -Identity "__ID__"|Where-Object{{$_.User -ne "{_NS}" -and $_.IsInherited -eq $false}}|Select User,AccessRights|ConvertTo-Json -Compress',
+                   f'Get-MailboxPermission -Identity "__ID__"|Where-Object{{$_.User -ne "{_NS}" -and $_.IsInherited -eq $false}}|Select User,AccessRights|ConvertTo-Json -Compress'),
+    'send_as':(f'Get-EXORecipientPermission -Identity "__ID__"|Where-Object{{$_.Trustee -ne "{_NS}"}}|Select Trustee|ConvertTo-Json -Compress',
+               f'Get-RecipientPermission -Identity "__ID__"|Where-Object{{$_.Trustee -ne "{_NS}"}}|Select Trustee|ConvertTo-Json -Compress'),
+    'send_on_behalf':('Get-EXOMailbox -Identity "__ID__" -Properties GrantSendOnBehalfTo|Select -Expand GrantSendOnBehalfTo',
+                      'Get-Mailbox -Identity "__ID__"|Select -Expand GrantSendOnBehalfTo'),
+    # Mitgliedschaften per OPATH-Filter auf dem Server statt Mitgliederliste jeder Gruppe abzufragen
+    'member_of_unified':("$dn=(Get-EXORecipient -Identity \"__ID__\" -Properties DistinguishedName).DistinguishedName -replace \"'\",\"''\";"
+                         "Get-EXORecipient -ResultSize Unlimited -RecipientTypeDetails GroupMailbox -Filter \"Members -eq '$dn'\" -PropertySets Minimum|Select -Expand DisplayName",
+                         "$dn=(Get-Recipient -Identity \"__ID__\").DistinguishedName -replace \"'\",\"''\";"
+                         "Get-Recipient -ResultSize Unlimited -RecipientTypeDetails GroupMailbox -Filter \"Members -eq '$dn'\"|Select -Expand DisplayName"),
+    'member_of_dl':("$dn=(Get-EXORecipient -Identity \"__ID__\" -Properties DistinguishedName).DistinguishedName -replace \"'\",\"''\";"
+                    "Get-EXORecipient -ResultSize Unlimited -RecipientTypeDetails MailUniversalDistributionGroup,MailUniversalSecurityGroup,MailNonUniversalGroup"
+                    " -Filter \"Members -eq '$dn'\" -PropertySets Minimum|Select -Expand DisplayName",
+                    "$dn=(Get-Recipient -Identity \"__ID__\").DistinguishedName -replace \"'\",\"''\";"
+                    "Get-Recipient -ResultSize Unlimited -RecipientTypeDetails MailUniversalDistributionGroup,MailUniversalSecurityGroup,MailNonUniversalGroup"
+                    " -Filter \"Members -eq '$dn'\"|Select -Expand DisplayName"),
+    'access_to':("Get-EXOMailbox -ResultSize Unlimited -PropertySets Minimum|Get-EXOMailboxPermission|Where-Object{$_.User -like \"*__ID__*\" -and $_.AccessRights -like \"*FullAccess*\"}|Select -Expand Identity",
+                 "Get-Mailbox -ResultSize Unlimited|Get-MailboxPermission|Where-Object{$_.User -like \"*__ID__*\" -and $_.AccessRights -like \"*FullAccess*\"}|Select -Expand Identity"),
+}
+# Sicherheits-Scan: Weiterleitung am Postfach (SMTP + ForwardingAddress → Ziel aufgelöst) und Posteingangsregeln
+DAL_PS['forwarding_all']=(
+    "Get-EXOMailbox -ResultSize Unlimited -Filter 'ForwardingSmtpAddress -ne $null -or ForwardingAddress -ne $null' -PropertySets Minimum"
+    " -Properties ForwardingSmtpAddress,ForwardingAddress,DeliverToMailboxAndForward|ForEach-Object{$t='';if($_.ForwardingAddress){"
+    "$r=Get-EXORecipient -Identity ([string]$_.ForwardingAddress) -Properties ExternalEmailAddress -EA SilentlyContinue;"
+    "if($r){$t=if($r.ExternalEmailAddress){[string]$r.ExternalEmailAddress}else{[string]$r.PrimarySmtpAddress}}};"
+    "[pscustomobject]@{PrimarySmtpAddress=[string]$_.PrimarySmtpAddress;ForwardingSmtpAddress=[string]$_.ForwardingSmtpAddress;"
+    "ForwardingAddress=[string]$_.ForwardingAddress;Target=$t;DeliverToMailboxAndForward=[bool]$_.DeliverToMailboxAndForward}}|ConvertTo-Json -Compress",
+    "Get-Mailbox -ResultSize Unlimited -Filter 'ForwardingSmtpAddress -ne $null -or ForwardingAddress -ne $null'|ForEach-Object{$t='';if($_.ForwardingAddress){"
+    "$r=Get-Recipient -Identity ([string]$_.ForwardingAddress) -EA SilentlyContinue;"
+    "if($r){$t=if($r.ExternalEmailAddress){[string]$r.ExternalEmailAddress}else{[string]$r.PrimarySmtpAddress}}};"
+    "[pscustomobject]@{PrimarySmtpAddress=[string]$_.PrimarySmtpAddress;ForwardingSmtpAddress=[string]$_.ForwardingSmtpAddress;"
+    "ForwardingAddress=[string]$_.ForwardingAddress;Target=$t;DeliverToMailboxAndForward=[bool]$_.DeliverToMailboxAndForward}}|ConvertTo-Json -Compress")
+SCAN_CHUNK = 20      # Postfächer je Get-InboxRule-Aufruf (mehrere Aufrufe laufen parallel über den Pool)
+SCAN_RULES_PS = ("foreach($m in @(__MBS__)){try{Get-InboxRule -Mailbox $m -EA Stop|Where-Object{$_.ForwardTo -or $_.RedirectTo -or $_.ForwardAsAttachmentTo}|"
+                 "ForEach-Object{[pscustomobject]@{Mailbox=$m;Rule=[string]$_.Name;Enabled=[bool]$_.Enabled;"
+                 "To=@(@($_.ForwardTo)+@($_.RedirectTo)+@($_.ForwardAsAttachmentTo)|Where-Object{$_}|ForEach-Object{[string]$_})}}}"
+                 "catch{[pscustomobject]@{Mailbox=$m;Error=$_.Exception.Message}}}|ConvertTo-Json -Compress -Depth 3")
+SCAN_COLS = ['mailbox','kind','rule','enabled','target','external','keep_copy','error']
+# Größe/Elemente/letzte Anmeldung je Block (__ID__ = Liste). Get-Command vorab: fehlt das Cmdlet, scheitert der ganze
+# Aufruf (→ Exo fällt auf klassisch zurück) statt je Postfach im catch zu landen.
+_SZ=("foreach($m in @(__ID__)){try{$s=__CMD__ -Identity $m -EA Stop;[pscustomobject]@{Mailbox=$m;Size=[string]$s.TotalItemSize;Items=$s.ItemCount;"
+     "Logon=$(if($s.LastLogonTime){([datetime]$s.LastLogonTime).ToUniversalTime().ToString('s')}else{''});"
+     "Action=$(if($s.LastUserActionTime){([datetime]$s.LastUserActionTime).ToUniversalTime().ToString('s')}else{''})}}"
+     "catch{[pscustomobject]@{Mailbox=$m;Error=$_.Exception.Message}}}|ConvertTo-Json -Compress")
+DAL_PS['mailbox_stats_bulk']=(
+    "$null=Get-Command Get-EXOMailboxStatistics -EA Stop;"+_SZ.replace('__CMD__','Get-EXOMailboxStatistics -PropertySets Minimum -Properties LastLogonTime,LastUserActionTime'),
+    _SZ.replace('__CMD__','Get-MailboxStatistics'))
+SIZE_CHUNK = 25      # Postfächer je Statistik-Aufruf
+SIZE_COLS = ['mailbox','name','type','size_mb','items','last_logon','last_action','inactive_days','scanned','error']
+DAL_COMPARE = False  # True: jede Fähigkeit einmal zusätzlich klassisch ausführen → Zeitvergleich im Protokoll
+# Varianten für "m365tool bench" (client = bisherige Abfrage: alle Postfächer holen, lokal filtern)
+FWD_BENCH = {'client':"Get-Mailbox -ResultSize Unlimited|Where-Object{$_.ForwardingSmtpAddress -ne $null}"+FWD_SEL,
+             'server-rps':FWD_PS_RPS,'server-exo':FWD_PS}
+
+# Lokale Ablage (Journal, Berichte, Cache)
+APP_DIR = os.path.join(os.environ.get('APPDATA') or os.path.expanduser('~'), 'M365-Tool')
+JOURNAL_DIR = os.path.join(APP_DIR, 'journal')
+REPORT_DIR = os.path.join(APP_DIR, 'reports')
+SCHEDULE_FILE = os.path.join(APP_DIR, 'schedule.json')
+STATS_FILE = os.path.join(APP_DIR, 'ob_stats.json')
+PREFLIGHT_FILE = os.path.join(APP_DIR, 'preflight.json')
+REPORT_DB = os.path.join(APP_DIR, 'mailbox_report.sqlite')  # Größen-/Aktivitätsbericht (laufend befüllt)
+LOG_FILE = os.path.join(APP_DIR, 'm365tool.log')  # Spiegel des Protokolls (rotierend); None = aus
+LOG_MAX_LINES = 3000 # Zeilen im Protokollfenster, ältere werden abgeschnitten
+UI_PUMP_MS = 100     # Takt der UI-Warteschlange (Worker → Tk) inkl. Protokoll
+API_PORT = 8765      # lokaler API-Server (nur 127.0.0.1)
 
 # ── Module die geprüft werden ───────────────────────────
 REQUIRED_MODULES = [
@@ -49,25 +165,46 @@ REQUIRED_MODULES = [
     },
 ]
 
+# Vorab-Prüfung in einem Aufruf → JSON. Key = Hash aus PS-Version + Änderungszeiten der PSModulePath-Ordner
+# (und der Modulordner); stimmt er mit __KEY__ (Cache) überein, entfällt der langsame Get-Module -ListAvailable-Scan.
+PREFLIGHT_PS = ";".join([
+    "$r=[ordered]@{}",
+    "$r.PS=$PSVersionTable.PSVersion.ToString()",
+    "$ms=@("+",".join(f"'{m['name']}'" for m in REQUIRED_MODULES)+")",
+    "$k=$r.PS+'|'+(($env:PSModulePath -split ';'|?{$_ -and (Test-Path $_)}|%{$d=$_;$d;$ms|%{Join-Path $d $_}|?{Test-Path $_}}|"
+    "%{$_+'='+(Get-Item $_).LastWriteTimeUtc.Ticks}) -join '|')",
+    "$r.Key=[BitConverter]::ToString((New-Object Security.Cryptography.SHA1Managed).ComputeHash([Text.Encoding]::UTF8.GetBytes($k))).Replace('-','')",
+    "$p=\"$(Get-ExecutionPolicy -Scope CurrentUser)\"",
+    "if('RemoteSigned','Unrestricted','Bypass','AllSigned' -notcontains $p){Set-ExecutionPolicy RemoteSigned -Scope CurrentUser -Force -EA SilentlyContinue;"
+    "$r.PolicyFixed=$true;$p=\"$(Get-ExecutionPolicy -Scope CurrentUser)\"}",
+    "$r.Policy=$p",
+    "try{[Net.ServicePointManager]::SecurityProtocol=[Net.SecurityProtocolType]::Tls12;$r.Tls=$true}catch{$r.Tls=$false}",
+    "if($r.Key -ne '__KEY__'){$r.Modules=[ordered]@{};$ms|%{$r.Modules[$_]=$null};"
+    "Get-Module -ListAvailable -Name $ms|Sort Version -Descending|%{if(-not $r.Modules[$_.Name]){$r.Modules[$_.Name]=\"$($_.Version)\"}}}",
+    "$r|ConvertTo-Json -Compress"])
+
 class PS:
     def __init__(self): self.proc=None; self.q=queue.Queue()
     def start(self):
         if self.proc: return
+        self.q=queue.Queue()  # neue Queue: späte Ausgaben eines abgebrochenen Prozesses landen nicht im nächsten Befehl
         self.proc=subprocess.Popen(["powershell","-NoLogo","-NoExit","-Command","-"],
             stdin=subprocess.PIPE,stdout=subprocess.PIPE,stderr=subprocess.STDOUT,
             text=True,encoding='utf-8',errors='replace',bufsize=1)
-        threading.Thread(target=self._rd,daemon=True).start()
+        threading.Thread(target=self._rd,args=(self.proc,self.q),daemon=True).start()
         self._w('[Console]::OutputEncoding=[System.Text.Encoding]::UTF8')
-    def _rd(self):
-        while self.proc and self.proc.poll() is None:
+    def _rd(self,p,q):
+        while p.poll() is None:
             try:
-                l=self.proc.stdout.readline()
-                if l: self.q.put(l)
+                l=p.stdout.readline()
+                if l: q.put(l)
             except: break
     def _w(self,c):
         if self.proc and self.proc.poll() is None:
             self.proc.stdin.write(c+"\n"); self.proc.stdin.flush()
-    def run(self,cmd,timeout=120):
+    def run(self,cmd,timeout=120,cancel=None):
+        """cancel: threading.Event; bei Abbruch oder Timeout wird der Prozess beendet (Remote-Pipeline stirbt mit),
+           damit keine Restausgabe den nächsten Befehl verfälscht — Neustart/Reconnect übernimmt PSPool"""
         if not self.proc or self.proc.poll() is not None: return False,"","PS nicht aktiv"
         while not self.q.empty():
             try: self.q.get_nowait()
@@ -77,21 +214,611 @@ class PS:
         ol,el=[],[]
         t0=time.time()
         while True:
-            if time.time()-t0>timeout: return False,"","Timeout"
+            if time.time()-t0>timeout: self.kill(); return False,"","Timeout"
+            if cancel and cancel.is_set(): self.kill(); return False,"","Abgebrochen"
             try:
                 l=self.q.get(timeout=0.5).rstrip()
                 if em in l: break
                 elif erm in l: el.append(l.split(erm,1)[1])
                 else: ol.append(l)
-            except queue.Empty: continue
+            except queue.Empty:
+                if self.proc.poll() is not None: self.kill(); return False,"","PowerShell während des Befehls beendet"  # evtl. schon ausgeführt
         return (not el),"\n".join(ol),"\n".join(el)
     def stop(self):
         if self.proc:
             try: self._w("exit"); self.proc.terminate()
             except: pass
             self.proc=None
+    def kill(self):
+        """Hart beenden (laufender Befehl wird nicht abgewartet)"""
+        p,self.proc=self.proc,None
+        if p:
+            try: p.kill()
+            except: pass
+
+# ── Drosselung / Session-Pool ───────────────────────────
+PS_POOL = 4          # max. parallele PowerShell-Sessions
+JOB_WORKERS = 3      # max. gleichzeitig laufende lange Jobs (weitere warten in der Warteschlange)
+JOB_QUICK = 2        # eigene Spur für kurze interaktive Jobs (Abfragen, Einzeländerungen) — warten nie hinter Scans
+THR_PAT = ('server busy','serverbusy','too many requests','(429)','status code 429','toomanyrequests',
+           'micro delay','microdelay','throttl','backoff','try again later','request limit')
+# Fehler, bei denen der Befehl sicher nicht ausgeführt wurde (Prozess schon vor dem Senden tot / Anmeldung abgelaufen)
+# → neu verbinden + wiederholen. Stirbt der Prozess mitten im Befehl, geht der Fehler an den Aufrufer (evtl. schon ausgeführt).
+DEAD_PAT = ('ps nicht aktiv','access token has expired','token has expired','tokenexpired','token is expired',
+            'run connect-exchangeonline','connect-exchangeonline before','you must call connect-mggraph',
+            'authentication needed','no active session','the remote session has been closed','session is not valid')
+# Module, die jede neue Session vorab lädt (sonst importiert erst Connect-/Mg-Cmdlet sie, 10+ s)
+PRELOAD_MODULES = ('ExchangeOnlineManagement','Microsoft.Graph.Authentication','Microsoft.Graph.Users',
+                   'Microsoft.Graph.Users.Actions','Microsoft.Graph.Identity.DirectoryManagement')
+PRELOAD_PS = ("foreach($m in "+",".join(f"'{m}'" for m in PRELOAD_MODULES)+"){$t=[Diagnostics.Stopwatch]::StartNew();"
+              "$ok=[bool](Import-Module $m -PassThru -EA SilentlyContinue);Write-Output \"PRELOAD:$m=$ok=$($t.ElapsedMilliseconds)\"}")
+# Access-Token der eben angemeldeten Graph-Sitzung (Anfrage-Header) → weitere Sessions verbinden sich damit ohne Anmeldefenster
+MG_TOKEN_PS = (";$r=Invoke-MgGraphRequest -Method GET -Uri 'https://graph.microsoft.com/v1.0/organization?$select=id' -OutputType HttpResponseMessage -EA SilentlyContinue"
+               ";if($r){Write-Output \"MGTOKEN:$($r.RequestMessage.Headers.Authorization.Parameter)\"}")
+EXO_WAM = (3,7)      # ab dieser ExchangeOnlineManagement-Version Anmeldung über WAM → weitere Sessions still per SSO
+# Bulk: Zielzustand schon erreicht (war vor -EA Stop stillschweigend Erfolg) → weiter als Erfolg zählen
+BULK_NOOP = ('already a member','memberalreadyexists','bereits mitglied',"isn't a member",'is not a member','membernotfound','kein mitglied')
+REPLAY_TIMEOUT = 90  # Connect-Wiederholung auf weiterer Session: muss still laufen, sonst Session aufgeben
+WD_INTERVAL = 120    # Sekunden zwischen Watchdog-Pings freier Sessions
+WD_PING = ("if(Get-Command Get-ConnectionInformation -EA SilentlyContinue){"
+           "@(Get-ConnectionInformation|?{$_.State -eq 'Connected' -and $_.TokenStatus -ne 'Expired'}).Count}else{1}")
+
+# Ergebnis-Cache für reine Lesebefehle (Get-…|Select|ConvertTo-Json …)
+CACHE_TTL = 300      # Sekunden
+CACHE_MAX = 500      # Einträge, älteste fallen heraus
+READ_VERBS = {'get','select','where','sort','measure','convertto','format','out','foreach','write'}
+ID_PARAMS = ('identity','user','trustee','member','links','userid','groupid','owner','mailbox')
+
+class RCache:
+    """TTL-Cache für Lesebefehle, Schlüssel = normalisierter Befehl. Schreibbefehle verwerfen betroffene Identitäten
+       (und alle mandantenweiten Listen, da die ohne Identität abgefragt werden); ohne erkennbare Identität → alles"""
+    def __init__(self,ttl=CACHE_TTL,cap=CACHE_MAX):
+        self.ttl,self.cap=ttl,cap; self.d=collections.OrderedDict(); self.lk=threading.Lock()
+        self.hits=self.miss=self.drops=0
+    @staticmethod
+    def key(cmd): return " ".join(cmd.split()).lower()
+    @staticmethod
+    def verbs(cmd): return {v.lower() for v in re.findall(r'(?<![\w@.$-])([A-Z][a-z]+)-[A-Z][A-Za-z]+',cmd)}
+    @staticmethod
+    def ids(cmd):
+        r=r'-(?:'+'|'.join(ID_PARAMS)+r')\s+["\']([^"\']+)["\']'
+        return {re.sub(r'^smtp:','',x.strip().lower()) for x in re.findall(r,cmd,re.I)}
+    def kind(self,cmd):
+        """'read' = cachebar, 'write' = invalidiert, None = weder noch (z.B. $true, Import-Module)"""
+        v=self.verbs(cmd)
+        if not v or v<={'import'}: return None
+        return 'read' if 'get' in v and v<=READ_VERBS else 'write' if v-READ_VERBS-{'import'} else None
+    def get(self,cmd):
+        k=self.key(cmd)
+        with self.lk:
+            e=self.d.get(k)
+            if e and time.time()-e[0]<self.ttl: self.hits+=1; self.d.move_to_end(k); return e[1]
+            if e: del self.d[k]
+            self.miss+=1; return None
+    def put(self,cmd,out):
+        k=self.key(cmd)
+        with self.lk:
+            self.d[k]=(time.time(),out,self.ids(cmd)); self.d.move_to_end(k)
+            while len(self.d)>self.cap: self.d.popitem(last=False)
+    def drop(self,cmd):
+        """Nach Schreibbefehl: Einträge mit gemeinsamer Identität + alle ohne Identität (Listen) verwerfen"""
+        ids=self.ids(cmd)
+        with self.lk:
+            ks=[k for k,(_,_,i) in self.d.items() if not ids or not i or i&ids]
+            for k in ks: del self.d[k]
+            self.drops+=len(ks)
+    def clear(self):
+        with self.lk: self.d.clear()
+    def stats(self):
+        with self.lk:
+            n=self.hits+self.miss
+            return {'entries':len(self.d),'hits':self.hits,'misses':self.miss,'dropped':self.drops,'hit_rate':round(self.hits/n,3) if n else 0.0}
+
+class Throttle:
+    """Gemeinsamer Rate-Controller: erkennt Drosselung, Backoff mit Jitter, passt Parallelität an (AIMD)"""
+    def __init__(self,lo=1,hi=PS_POOL,base=2.0,cap=90.0):
+        self.lo,self.hi,self.base,self.cap=lo,hi,base,cap
+        self.lim=hi; self.active=0; self.streak=0; self.until=0.0; self.hits=0
+        self.cv=threading.Condition()
+    @staticmethod
+    def is_thr(err):
+        e=(err or '').lower(); return any(p in e for p in THR_PAT)
+    @staticmethod
+    def hint(err):
+        m=re.search(r'(?:after|in|wait)\D{0,12}(\d+(?:\.\d+)?)\s*(?:s\b|sec|second|sekunde)',err or '',re.I)
+        return float(m.group(1)) if m else 0.0
+    def acquire(self):
+        with self.cv:
+            while True:
+                w=self.until-time.time()
+                if w>0: self.cv.wait(w); continue
+                if self.active<self.lim: self.active+=1; return
+                self.cv.wait(0.5)
+    def release(self):
+        with self.cv: self.active-=1; self.cv.notify()
+    def ok(self):
+        """Erfolg → nach genug Erfolgen in Folge Parallelität +1"""
+        with self.cv:
+            self.streak+=1
+            if self.lim<self.hi and self.streak>=self.lim*8:
+                self.lim+=1; self.streak=0; self.cv.notify_all()
+    def hit(self,attempt,err=''):
+        """Drosselung → Limit halbieren, globale Pause (exponentiell + Jitter); liefert Wartezeit"""
+        with self.cv:
+            self.hits+=1; self.streak=0; self.lim=max(self.lo,self.lim//2)
+            d=max(self.hint(err),min(self.cap,self.base*2**attempt)*random.uniform(0.5,1.0))
+            self.until=max(self.until,time.time()+d); self.cv.notify_all()
+            return d
+
+# ── Job-Kontext ─────────────────────────────────────────
+_job=threading.local()  # aktueller Job des Threads (für Abbruch/Fortschritt)
+def job_now(): return getattr(_job,'j',None)
+def job_carry(fn):
+    """fn so verpacken, dass es im Worker-Thread (ThreadPoolExecutor) im Job des Aufrufers läuft"""
+    j=job_now()
+    def w(*a,**kw):
+        _job.j=j
+        try: return fn(*a,**kw)
+        finally: _job.j=None
+    return w
+def job_progress(pct,msg=''):
+    j=job_now()
+    if j: j['progress']=int(pct); j['msg']=msg; j['_ch']()
+
+class PSPool:
+    """Mehrere PS-Sessions hinter einer run()-Schnittstelle; Connect-Befehle werden auf neuen Sessions wiederholt —
+       nur in ihrer stillen Form (replay). Ist eine Anmeldung nicht still übertragbar oder scheitert die Wiederholung,
+       wird die Session aufgegeben und der Pool auf die angemeldeten Sessions begrenzt (keine versteckten Anmeldefenster)"""
+    def __init__(self,size=PS_POOL,retries=5):
+        self.size=self.cap=size; self.retries=retries; self.thr=Throttle(1,size)
+        self.sess=[]; self.free=[]; self.init=[]; self._ic=[]; self.lk=threading.Condition()  # _ic: Connect-Befehle wie ausgeführt
+        self.warm=[]  # Befehle für jeden neuen Prozess vor der Connect-Sequenz (z.B. PRELOAD_PS)
+        self.on_thr=None  # Callback(wartezeit, limit, fehler)
+        self.on_recycle=None  # Callback(grund) nach Timeout/Abbruch
+        self.cache=RCache()
+        self.doom=set()  # bei run_all belegte Sessions: bei Rückgabe beenden statt wiederverwenden
+        self._tl=threading.local()
+    def meter(self,on=True):
+        """Zähler (Aufrufe, Bytes, Wiederholungen) für den aktuellen Thread starten bzw. mit on=False beenden"""
+        self._tl.m={'calls':0,'bytes':0,'retries':0} if on else None; return self._tl.m
+    def start(self):
+        with self.lk:
+            if self.sess: return
+            s=PS(); s.done=0; self.sess.append(s); self.free.append(s)
+        s.start()
+    def _take(self):
+        while True:
+            with self.lk:
+                while True:
+                    if self.free:
+                        s=min(self.free,key=self.sess.index); self.free.remove(s); break
+                    if len(self.sess)<self.size:
+                        s=PS(); s.done=0; self.sess.append(s); break
+                    self.lk.wait(0.5)
+            try: self._boot(s); return s
+            except Exception as ex:
+                self._retire(s,ex)
+                if not self.sess: raise RuntimeError(str(ex))  # keine angemeldete Session mehr
+                # sonst auf eine der verbleibenden (angemeldeten) Sessions warten
+    def _retire(self,s,why):
+        """Session, deren Connect-Wiederholung scheitert, beenden und den Pool auf die übrigen begrenzen"""
+        s.kill()
+        with self.lk:
+            if s in self.sess: self.sess.remove(s)
+            if s in self.free: self.free.remove(s)
+            self.doom.discard(s); self.size=max(1,len(self.sess)); self.lk.notify_all()
+        if self.on_recycle: self.on_recycle(f"Session aufgegeben ({why}) — Pool jetzt {self.size}")
+    def _boot(self,s):
+        """Prozess bei Bedarf (neu) starten: zuerst warm-Befehle, dann fehlende Connect-Befehle"""
+        if not s.proc or s.proc.poll() is not None:  # neu/abgebrochen/gestorben → Connect-Sequenz neu
+            s.kill(); s.done=0; s.start()
+            for c in self.warm: s.run(c,180)
+        self._replay(s)
+    @staticmethod
+    def is_dead(err):
+        e=(err or '').lower(); return any(p in e for p in DEAD_PAT)
+    def _give(self,s):
+        with self.lk:
+            if s in self.doom: self.doom.discard(s); s.kill(); s.done=0  # nächster _take startet + verbindet neu
+            if s in self.sess: self.free.append(s); self.lk.notify()
+    def _recycle(self,s):
+        """Nach Timeout/Abbruch: Prozess neu starten und Connect-Sequenz wiederholen, erst dann wieder freigeben"""
+        s.done=0
+        def do():
+            if s not in self.sess: return  # Pool inzwischen gestoppt
+            try: self._boot(s)
+            except Exception as ex: self._retire(s,ex); return
+            self._give(s)
+        threading.Thread(target=do,daemon=True).start()
+    def _replay(self,s):
+        """Fehlende Connect-Befehle still nachholen; None = nicht übertragbar (interaktiv) → RuntimeError"""
+        while s.done<len(self.init):
+            c=self.init[s.done]
+            if c is None: raise RuntimeError("Anmeldung nicht still übertragbar")
+            ok,_,e=s.run(c,REPLAY_TIMEOUT)
+            if not ok: raise RuntimeError(f"Connect-Wiederholung fehlgeschlagen: {e.strip()[:80]}")
+            s.done+=1
+    def replay_as(self,cmd,new):
+        """Stille Form eines bereits ausgeführten Connect-Befehls nachreichen (z.B. mit Token aus dieser Anmeldung)"""
+        with self.lk:
+            for i in range(len(self.init)-1,-1,-1):
+                if self._ic[i]==cmd: self.init[i]=new; return True
+        return False
+    def run(self,cmd,timeout=120,init=False,fresh=False,cache=True,replay=None):
+        """Wie PS.run; bei Drosselung transparent mit Backoff wiederholen. init=True: Befehl gehört zur Connect-Sequenz,
+           replay = stille Form für weitere Sessions (None: cmd selbst, False: nicht übertragbar).
+           Lesebefehle kommen aus self.cache (fresh=True: trotzdem neu abfragen, cache=False: Ergebnis auch nicht ablegen),
+           Schreibbefehle invalidieren ihn"""
+        self._tl.hit=False
+        if init: self.cache.clear()  # (neue) Anmeldung → evtl. anderer Mandant
+        kd=None if init else self.cache.kind(cmd)
+        if kd=='read' and not cache: kd=None
+        if kd=='read' and not fresh:
+            o=self.cache.get(cmd)
+            if o is not None: self._tl.hit=True; return True,o,""
+        elif kd=='write': self.cache.drop(cmd)
+        ok,o,e=self._run(cmd,timeout,init,replay)
+        if kd=='read' and ok: self.cache.put(cmd,o)
+        elif kd=='write': self.cache.drop(cmd)  # auch nach Lesern, die während des Schreibens neu gefüllt haben
+        return ok,o,e
+    def hit(self):
+        """Kam das letzte run() dieses Threads aus dem Cache?"""
+        return getattr(self._tl,'hit',False)
+    def _run(self,cmd,timeout,init,replay=None):
+        j=job_now(); tr=0
+        for a in range(self.retries+1):
+            if j and j['cancel'].is_set(): return False,"","Abgebrochen"  # Job abgebrochen → keine weiteren Aufrufe
+            self.thr.acquire()
+            try:
+                try: s=self._take()
+                except RuntimeError as ex: return False,"",f"{ex} — bitte neu verbinden"
+                dirty=False
+                try:
+                    ok,o,e=s.run(cmd,timeout,j['cancel'] if j else None)
+                    if not ok and not init and self.is_dead(e): s.kill()  # Token abgelaufen → Session neu verbinden
+                    dirty=s.proc is None
+                    if ok and init:
+                        with self.lk:
+                            self.init.append(cmd if replay is None else replay or None); self._ic.append(cmd); s.done=len(self.init)
+                finally: self._recycle(s) if dirty else self._give(s)
+                if dirty and self.on_recycle: self.on_recycle(e)
+            finally: self.thr.release()
+            m=getattr(self._tl,'m',None)
+            if m: m['calls']+=1; m['bytes']+=len(o.encode('utf-8'))+len(e.encode('utf-8'))
+            if not ok and not init and self.is_dead(e) and tr<2 and a<self.retries:
+                tr+=1
+                if m: m['retries']+=1
+                continue  # Befehl wurde nicht ausgeführt → auf frischer Session wiederholen
+            if ok or not Throttle.is_thr(e) or a==self.retries:
+                if ok: self.thr.ok()
+                return ok,o,e
+            if m: m['retries']+=1
+            d=self.thr.hit(a,e)
+            if self.on_thr: self.on_thr(d,self.thr.lim,e)
+    def watch(self,interval=WD_INTERVAL):
+        """Watchdog: freie Sessions regelmäßig anpingen; tote/abgelaufene neu starten und neu verbinden"""
+        def loop():
+            while True:
+                time.sleep(interval)
+                for s in list(self.sess): self._ping(s)
+        threading.Thread(target=loop,daemon=True).start()
+    def _ping(self,s):
+        with self.lk:
+            if s not in self.free or s.done<len(self.init): return  # belegt bzw. noch nicht verbunden (Ping läse 0)
+            self.free.remove(s)
+        bad=None
+        if not s.proc or s.proc.poll() is not None: bad="PowerShell beendet"
+        else:
+            exo=any('Connect-ExchangeOnline' in c for c in self._ic)
+            ok,o,e=s.run(WD_PING if exo else '$true',15)
+            if not ok: bad=e or "keine Antwort"
+            elif exo and o.strip().split("\n")[-1].strip()=='0': bad="EXO-Sitzung abgelaufen"
+        if not bad: self._give(s); return
+        s.kill(); self._recycle(s)
+        if self.on_recycle: self.on_recycle(f"Watchdog: {bad}")
+    def run_all(self,cmd,timeout=30,wait=3):
+        """Befehl auf allen gestarteten Sessions (z.B. Disconnect). Läuft aus dem UI-Thread: höchstens wait Sekunden auf
+           belegte Sessions warten, danach werden sie bei Rückgabe beendet (Prozessende trennt die Sitzung ebenso)"""
+        end=time.time()+wait
+        for s in list(self.sess):
+            with self.lk:
+                while s not in self.free and s in self.sess and time.time()<end: self.lk.wait(0.2)
+                if s not in self.free:
+                    if s in self.sess: self.doom.add(s)
+                    continue
+                self.free.remove(s)
+            try: s.run(cmd,timeout)
+            finally: self._give(s)
+    def reset(self):
+        self.cache.clear()
+        with self.lk:
+            self.init=[]; self._ic=[]; self.size=self.cap
+            for s in self.sess: s.done=0
+    def stop(self):
+        for s in self.sess: s.stop()
+        with self.lk: self.sess=[]; self.free=[]; self.doom=set()
+
+# ── Datenzugriff (EXO V3 bevorzugt) ─────────────────────
+class Exo:
+    """Lesezugriffe über DAL_PS: Get-EXO* (REST, -PropertySets Minimum + -Properties), Rückfall auf klassische Cmdlets
+       je Fähigkeit — dauerhaft, wenn das EXO-Cmdlet fehlt, sonst nur für den einzelnen Aufruf. Zeiten je Weg werden gemittelt."""
+    NOT_FOUND = ("couldn't be found","could not be found","wurde nicht gefunden","not found on")
+    def __init__(self,ps,note=lambda m,c=None:None):
+        self.ps=ps; self.note=note; self.off=set(); self.t={}; self.lk=threading.Lock()
+    @staticmethod
+    def missing(err):
+        e=(err or '').lower(); return bool(re.search(r'get-exo\w+',e)) and ('recogni' in e or 'erkannt' in e)
+    def _time(self,cap,way,dt):
+        with self.lk:
+            n=self.t.setdefault(cap,{}).setdefault(way,[0,0.0]); n[0]+=1; n[1]+=dt
+            return {w:v[1]/v[0] for w,v in self.t[cap].items()}
+    def q(self,cap,id='',timeout=120,fresh=False,cache=True,log=True):
+        """Fähigkeit cap lesen → (ok, ausgabe, fehler) wie PS.run; log=False: Zeiten nur mitteln (Massenabfragen)"""
+        exo,rps=(c.replace('__ID__',id.replace('"','`"')) for c in DAL_PS[cap])
+        if cap not in self.off:
+            t0=time.time(); ok,o,e=self.ps.run(exo,timeout,fresh=fresh,cache=cache); dt=time.time()-t0
+            if ok and self.ps.hit(): return ok,o,e  # Cache-Treffer: keine Messung
+            if ok:
+                av=self._time(cap,'exo',dt)
+                if DAL_COMPARE and 'rps' not in av:
+                    t0=time.time(); r=self.ps.run(rps,timeout,fresh=True,cache=cache)
+                    if r[0]: av=self._time(cap,'rps',time.time()-t0)
+                if log: self.note(f"  ⏱️ {cap}: EXO {dt:.2f}s"+(f" (klassisch Ø {av['rps']:.2f}s, {av['rps']/max(av['exo'],1e-3):.1f}×)" if 'rps' in av else ""),C['dim'])
+                return ok,o,e
+            if any(p in e.lower() for p in self.NOT_FOUND): return ok,o,e  # klassisch fände es auch nicht
+            if self.missing(e):
+                self.off.add(cap); self.note(f"  ⚠️ {cap}: Get-EXO*-Cmdlet fehlt — ab jetzt klassisch",C['warn'])
+            else: self.note(f"  ⚠️ {cap}: EXO-Abfrage fehlgeschlagen ({e.strip()[:80]}) — klassisch",C['warn'])
+        t0=time.time(); ok,o,e=self.ps.run(rps,timeout,fresh=fresh,cache=cache); dt=time.time()-t0
+        if ok and not self.ps.hit():
+            av=self._time(cap,'rps',dt)
+            if log: self.note(f"  ⏱️ {cap}: klassisch {dt:.2f}s"+(f" (EXO Ø {av['exo']:.2f}s)" if 'exo' in av else ""),C['dim'])
+        return ok,o,e
+    def stats(self):
+        """{fähigkeit: {'exo'|'rps': {'n', 'avg'}}, '_off': [klassisch erzwungen]}"""
+        with self.lk:
+            d={c:{w:{'n':v[0],'avg':round(v[1]/v[0],3)} for w,v in ws.items()} for c,ws in self.t.items()}
+        d['_off']=sorted(self.off); return d
+
+# ── Offboarding-Journal / Zeitplan ──────────────────────
+def _jsave(path,d):
+    """JSON atomar schreiben (temp + replace), übersteht Absturz mitten im Schreiben"""
+    os.makedirs(os.path.dirname(path),exist_ok=True); tmp=path+'.tmp'
+    with open(tmp,'w',encoding='utf-8') as f: json.dump(d,f,ensure_ascii=False,indent=1); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp,path)
+
+def _pid_alive(pid):
+    """Läuft der Prozess pid noch? (Windows: OpenProcess — os.kill(pid,0) würde ihn dort beenden)"""
+    if not pid: return False
+    if os.name=='nt':
+        import ctypes
+        k=ctypes.windll.kernel32; h=k.OpenProcess(0x1000,False,int(pid))  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not h: return False
+        c=ctypes.c_ulong()
+        try: return bool(k.GetExitCodeProcess(h,ctypes.byref(c))) and c.value==259  # STILL_ACTIVE
+        finally: k.CloseHandle(h)
+    try: os.kill(int(pid),0); return True
+    except PermissionError: return True
+    except OSError: return False
+
+class FileLock:
+    """Prozessübergreifende Sperre über eine Lock-Datei (O_EXCL), z.B. GUI und CLI auf demselben Zeitplan.
+       Verwaiste Sperren (älter als stale Sekunden) werden übernommen."""
+    def __init__(self,path,wait=10,stale=30): self.p=path+'.lock'; self.wait=wait; self.stale=stale
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.p),exist_ok=True); t0=time.time()
+        while True:
+            try:
+                fd=os.open(self.p,os.O_CREAT|os.O_EXCL|os.O_WRONLY); os.write(fd,str(os.getpid()).encode()); os.close(fd); return self
+            except FileExistsError:
+                try:
+                    if time.time()-os.path.getmtime(self.p)>self.stale: os.remove(self.p); continue
+                except OSError: continue
+                if time.time()-t0>self.wait: raise TimeoutError(f"Sperre {self.p} belegt")
+                time.sleep(0.05)
+    def __exit__(self,*a):
+        try: os.remove(self.p)
+        except OSError: pass
+
+class Journal:
+    """Ein Offboarding-Lauf als JSON-Datei; nach jedem Ereignis atomar geschrieben, damit ein Absturz nichts verliert"""
+    def __init__(self,path,d): self.path=path; self.d=d; self.lk=threading.Lock()
+    @staticmethod
+    def _now(): return datetime.now().isoformat(timespec='seconds')
+    @classmethod
+    def new(cls,ue,un,todo,opts,admin):
+        rid=f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{re.sub(r'[^A-Za-z0-9._-]','_',ue)}"
+        d={'id':rid,'user':ue,'name':un,'admin':admin,'steps':list(todo),'opts':opts,
+           'created':cls._now(),'finished':None,'state':'running','pid':os.getpid(),'log':{}}
+        j=cls(os.path.join(JOURNAL_DIR,rid+'.json'),d); j._save(); return j
+    @classmethod
+    def unfinished(cls):
+        """Alle Läufe mit state=running (App abgestürzt/beendet während des Offboardings) oder cancelled (Job abgebrochen).
+           Läufe, deren Besitzerprozess (pid) noch lebt, fehlen — die schreibt gerade eine andere Instanz (GUI/CLI/API)."""
+        out=[]
+        if not os.path.isdir(JOURNAL_DIR): return out
+        for fn in sorted(os.listdir(JOURNAL_DIR)):
+            if not fn.endswith('.json'): continue
+            try:
+                with open(os.path.join(JOURNAL_DIR,fn),encoding='utf-8') as f: d=json.load(f)
+            except: continue
+            if d.get('state')=='running' and _pid_alive(d.get('pid')): continue
+            if d.get('state')=='running' or d.get('state')=='cancelled' and sum('end' in v for v in d['log'].values())<len(d['steps']): out.append(cls(os.path.join(JOURNAL_DIR,fn),d))
+        return out
+    def _save(self): _jsave(self.path,self.d)
+    def claim(self):
+        """Lauf zum Fortsetzen übernehmen (state=running, eigene pid); False, wenn ihn inzwischen ein anderer Prozess fortsetzt"""
+        with self.lk, FileLock(self.path):
+            try:
+                with open(self.path,encoding='utf-8') as f: d=json.load(f)
+            except (OSError,ValueError): return False
+            if d.get('state')=='running' and _pid_alive(d.get('pid')) and d.get('pid')!=os.getpid(): return False
+            if d.get('state') not in ('running','cancelled'): return False
+            d.update(state='running',pid=os.getpid()); self.d=d; self._save(); return True
+    def start(self,k):
+        with self.lk: self.d['log'][k]={'start':self._now()}; self._save()
+    def end(self,k,ok,det,met=None):
+        with self.lk:
+            self.d['log'].setdefault(k,{}).update({'end':self._now(),'ok':ok,'detail':det,'met':met}); self._save()
+    def done(self):
+        """Bereits abgeschlossene Schritte → {schritt: (ok, detail)}"""
+        return {k:(v['ok'],v['detail']) for k,v in self.d['log'].items() if 'end' in v}
+    def metrics(self):
+        return {k:v['met'] for k,v in self.d['log'].items() if v.get('met')}
+    def close(self,state='done'):
+        with self.lk: self.d['state']=state; self.d['finished']=self._now(); self._save()
+
+class Schedule:
+    """Geplante Offboardings (user, steps, opts, at) in SCHEDULE_FILE; thread- und prozesssicher (GUI + CLI/Aufgabenplanung):
+       jede Änderung liest die Datei unter FileLock neu ein, claim() übernimmt einen fälligen Job atomar"""
+    def __init__(self,path=SCHEDULE_FILE):
+        self.path=path; self.lk=threading.Lock(); self.jobs=[]
+        with self.lk, FileLock(path):
+            self._load(); ch=False
+            for j in self.jobs:  # Prozess abgestürzt während des Jobs → über das Journal fortsetzen
+                if j['status']=='running' and not _pid_alive(j.get('pid')): j['status']='interrupted'; ch=True
+            if ch: _jsave(self.path,self.jobs)
+    def _load(self):
+        try:
+            with open(self.path,encoding='utf-8') as f: self.jobs=json.load(f)
+        except (OSError,ValueError): pass
+    def add(self,ue,un,steps,opts,at):
+        with self.lk, FileLock(self.path):
+            self._load()
+            j={'id':f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{secrets.token_hex(4)}",'user':ue,'name':un,'steps':steps,
+               'opts':opts,'at':at.isoformat(timespec='minutes'),'status':'pending','report':None}
+            self.jobs.append(j); _jsave(self.path,self.jobs); return j
+    def remove(self,jid):
+        with self.lk, FileLock(self.path): self._load(); self.jobs=[j for j in self.jobs if j['id']!=jid]; _jsave(self.path,self.jobs)
+    def due(self):
+        now=datetime.now().isoformat(timespec='minutes')
+        with self.lk, FileLock(self.path): self._load(); return [j for j in self.jobs if j['status']=='pending' and j['at']<=now]
+    def claim(self,j):
+        """pending → running für diesen Prozess; False, wenn ein anderer Prozess den Job schon übernommen hat"""
+        with self.lk, FileLock(self.path):
+            self._load(); cur=next((x for x in self.jobs if x['id']==j['id']),None)
+            if not cur or cur['status']!='pending': return False
+            cur.update(status='running',pid=os.getpid()); j.update(cur); _jsave(self.path,self.jobs); return True
+    def set(self,j,**kw):
+        with self.lk, FileLock(self.path):
+            self._load(); j.update(kw)
+            for x in self.jobs:
+                if x['id']==j['id']: x.update(kw)
+            _jsave(self.path,self.jobs)
+
+class ObStats:
+    """Über alle Läufe aggregierte Schritt-Kennzahlen (STATS_FILE): runs, fails, secs, calls, bytes, retries"""
+    lk=threading.Lock()
+    @staticmethod
+    def load():
+        try:
+            with open(STATS_FILE,encoding='utf-8') as f: return json.load(f)
+        except: return {}
+    @classmethod
+    def add(cls,res,met):
+        with cls.lk:
+            d=cls.load()
+            for k,m in met.items():
+                a=d.setdefault(k,{'runs':0,'fails':0,'secs':0.0,'calls':0.0,'bytes':0.0,'retries':0.0})
+                sh=m.get('shared',1)  # gebündelter Aufruf: Aufrufe/Bytes anteilig
+                a['runs']+=1; a['fails']+=0 if res.get(k,(True,))[0] else 1; a['secs']+=m['secs']
+                a['calls']+=m['calls']/sh; a['bytes']+=m['bytes']/sh; a['retries']+=m['retries']/sh
+            _jsave(STATS_FILE,d)
+
+class MbStore:
+    """Lokale SQLite-Ablage des Größen-/Aktivitätsberichts: eine Zeile je Postfach, blockweise geschrieben (übersteht Abbruch)"""
+    def __init__(self,path=REPORT_DB):
+        os.makedirs(os.path.dirname(path),exist_ok=True)
+        self.db=sqlite3.connect(path,check_same_thread=False); self.lk=threading.Lock()
+        with self.lk, self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS mbx(mailbox TEXT PRIMARY KEY,name TEXT,type TEXT,size_mb REAL,items INTEGER,"
+                            "last_logon TEXT,last_action TEXT,inactive_days INTEGER,scanned TEXT,error TEXT)")
+            self.db.execute("CREATE TABLE IF NOT EXISTS meta(k TEXT PRIMARY KEY,v TEXT)")
+    def meta(self,k,v=None):
+        with self.lk, self.db:
+            if v is not None: self.db.execute("INSERT OR REPLACE INTO meta VALUES(?,?)",(k,str(v))); return v
+            r=self.db.execute("SELECT v FROM meta WHERE k=?",(k,)).fetchone(); return r[0] if r else None
+    def reset(self):
+        with self.lk, self.db: self.db.execute("DELETE FROM mbx")
+    def put(self,rows):
+        with self.lk, self.db:
+            self.db.executemany(f"INSERT OR REPLACE INTO mbx VALUES({','.join('?'*len(SIZE_COLS))})",[tuple(r[c] for c in SIZE_COLS) for r in rows])
+    def done(self,since):
+        """Postfächer, die seit since fehlerfrei erfasst sind"""
+        with self.lk: return {r[0] for r in self.db.execute("SELECT mailbox FROM mbx WHERE scanned>=? AND error=''",(since,))}
+    def rows(self,order='size_mb DESC'):
+        with self.lk: return [dict(zip(SIZE_COLS,r)) for r in self.db.execute(f"SELECT {','.join(SIZE_COLS)} FROM mbx ORDER BY {order}")]
+    def close(self):
+        with self.lk: self.db.close()
+
+class Jobs:
+    """Hintergrund-Aufträge mit begrenztem Worker-Pool: state queued|running|done|failed|cancelled,
+       progress/msg, result/error; cancel() lässt weitere PS-Aufrufe des Jobs sofort scheitern.
+       Zwei Spuren: 'long' (Scans, Berichte, Offboarding) und 'quick' (interaktive Einzelaktionen)"""
+    def __init__(self,workers=JOB_WORKERS,quick=JOB_QUICK):
+        self.ex={'long':ThreadPoolExecutor(max_workers=workers),'quick':ThreadPoolExecutor(max_workers=quick)}; self.lk=threading.Lock(); self.jobs={}; self.n=0
+        self.on_change=None  # Callback(job)
+    def _ch(self,j):
+        if self.on_change: self.on_change(j)
+    def _now(self): return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    def submit(self,name,fn,*a,lane='long',**kw):
+        with self.lk:
+            self.n+=1; j={'id':f"J{self.n:04d}",'name':name,'lane':lane,'state':'queued','created':self._now(),'started':None,'ended':None,
+                          'progress':0,'msg':'','result':None,'error':None,'cancel':threading.Event()}
+            j['_ch']=lambda:self._ch(j); self.jobs[j['id']]=j
+        def run():
+            if j['cancel'].is_set(): return
+            j['state']='running'; j['started']=self._now(); self._ch(j); _job.j=j
+            try:
+                j['result']=fn(*a,**kw); j['state']='cancelled' if j['cancel'].is_set() else 'done'
+            except Exception as ex: j['error']=str(ex); j['state']='failed'
+            finally: _job.j=None
+            j['ended']=self._now(); j['progress']=100 if j['state']=='done' else j['progress']; self._ch(j)
+        self.ex[lane].submit(run); self._ch(j); return j
+    def cancel(self,jid):
+        j=self.get(jid)
+        if not j or j['state'] not in ('queued','running'): return False
+        j['cancel'].set()
+        if j['state']=='queued': j['state']='cancelled'; j['ended']=self._now()
+        self._ch(j); return True
+    def cancel_all(self):
+        for j in self.list(): self.cancel(j['id'])
+    def clear(self):
+        """Beendete Jobs aus der Liste entfernen"""
+        with self.lk: self.jobs={k:j for k,j in self.jobs.items() if j['state'] in ('queued','running')}
+    def get(self,jid):
+        with self.lk: return self.jobs.get(jid)
+    def list(self):
+        with self.lk: return list(self.jobs.values())
+
+class LogSink:
+    """Thread-sicherer Ringpuffer für Protokollzeilen (App._pump holt sie gesammelt ab); optional rotierende Logdatei"""
+    def __init__(self,cap=LOG_MAX_LINES,path=LOG_FILE):
+        self.buf=collections.deque(maxlen=cap); self.lk=threading.Lock(); self.lost=0; self.fl=None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path),exist_ok=True)
+                self.fl=logging.getLogger('m365tool'); self.fl.propagate=False; self.fl.setLevel(logging.INFO)
+                # Logger ist prozessweit: Handler je Datei nur einmal anhängen, sonst steht jede Zeile mehrfach im Log
+                if not any(getattr(x,'baseFilename',None)==os.path.abspath(path) for x in self.fl.handlers):
+                    h=logging.handlers.RotatingFileHandler(path,maxBytes=2_000_000,backupCount=5,encoding='utf-8')
+                    h.setFormatter(logging.Formatter('%(asctime)s %(message)s','%Y-%m-%d %H:%M:%S')); self.fl.addHandler(h)
+            except OSError: self.fl=None
+    def put(self,msg,tag='info'):
+        with self.lk:
+            if len(self.buf)==self.buf.maxlen: self.lost+=1  # älteste ungezeigte Zeile fällt heraus
+            self.buf.append((datetime.now().strftime("%H:%M:%S"),msg,tag))
+        if self.fl: self.fl.info(msg)
+    def drain(self):
+        """Alle gepufferten Zeilen + Anzahl verworfener → ([(zeit, text, tag)], verworfen)"""
+        with self.lk:
+            out=list(self.buf); self.buf.clear(); n,self.lost=self.lost,0
+        return out,n
 
 class Btn(tk.Canvas):
+    """Abgerundeter Knopf: Canvas-Elemente entstehen einmal, Hover/Zustand färben nur per itemconfig um"""
+    _geo={}   # (breite, höhe) → Koordinaten der Form, geteilt von allen gleich großen Knöpfen
+    _hc={}    # Farbe → Hover-Farbe
     def __init__(self,parent,text,command=None,bg=C['accent'],fg='#fff',width=160,height=32,font_size=10,**kw):
         kw.pop('width',None);kw.pop('height',None)
         pbg=C['panel']
@@ -101,42 +828,158 @@ class Btn(tk.Canvas):
         super().configure(width=width,height=height,bg=pbg)
         self._cmd=command;self._bg=bg;self._fg=fg
         self._hov=self._adj(bg,20);self._dis=C['muted']
-        self.txt=text;self._bw=width;self._bh=height;self._fs=font_size;self._en=True
-        self.after(10,lambda:self._draw(self._bg))
+        self.txt=text;self._bw=width;self._bh=height;self._fs=font_size;self._en=True;self._cur=None
+        arcs,rects=self._shape(width,height)
+        for x0,y0,x1,y1,st in arcs: self.create_arc(x0,y0,x1,y1,start=st,extent=90,fill=bg,outline=bg,tags='bg')
+        for r in rects: self.create_rectangle(*r,fill=bg,outline=bg,tags='bg')
+        self._t=self.create_text(width/2,height/2,text=text,fill=fg,font=('Segoe UI',font_size,'bold'))
+        self._cur=(bg,fg)
         self.bind('<Enter>',lambda e:self._draw(self._hov) if self._en else None)
         self.bind('<Leave>',lambda e:self._draw(self._bg if self._en else self._dis))
         self.bind('<Button-1>',lambda e:self._cmd() if self._en and self._cmd else None)
-    def _adj(self,c,a):
-        try: r,g,b=int(c[1:3],16),int(c[3:5],16),int(c[5:7],16); return f'#{min(255,r+a):02x}{min(255,g+a):02x}{min(255,b+a):02x}'
-        except: return c
+    @classmethod
+    def _shape(cls,w,h):
+        g=cls._geo.get((w,h))
+        if g is None:
+            r=5
+            g=cls._geo[(w,h)]=([(0,0,r*2,r*2,90),(w-r*2,0,w,r*2,0),(0,h-r*2,r*2,h,180),(w-r*2,h-r*2,w,h,270)],
+                               [(r,0,w-r,h),(0,r,w,h-r)])
+        return g
+    @classmethod
+    def _adj(cls,c,a):
+        k=(c,a)
+        if k not in cls._hc:
+            try: r,g,b=int(c[1:3],16),int(c[3:5],16),int(c[5:7],16); cls._hc[k]=f'#{min(255,r+a):02x}{min(255,g+a):02x}{min(255,b+a):02x}'
+            except: cls._hc[k]=c
+        return cls._hc[k]
     def _draw(self,col):
-        self.delete('all');r,w,h=5,self._bw,self._bh
-        for x0,y0,x1,y1,st in [(0,0,r*2,r*2,90),(w-r*2,0,w,r*2,0),(0,h-r*2,r*2,h,180),(w-r*2,h-r*2,w,h,270)]:
-            self.create_arc(x0,y0,x1,y1,start=st,extent=90,fill=col,outline=col)
-        self.create_rectangle(r,0,w-r,h,fill=col,outline=col)
-        self.create_rectangle(0,r,w,h-r,fill=col,outline=col)
-        self.create_text(w/2,h/2,text=self.txt,fill=self._fg if self._en else C['dim'],font=('Segoe UI',self._fs,'bold'))
+        """Nur umfärben — und nur, wenn sich Hintergrund- oder Textfarbe wirklich ändern"""
+        fg=self._fg if self._en else C['dim']
+        if self._cur==(col,fg): return
+        if self._cur is None or self._cur[0]!=col: self.itemconfig('bg',fill=col,outline=col)
+        if self._cur is None or self._cur[1]!=fg: self.itemconfig(self._t,fill=fg)
+        self._cur=(col,fg)
     def configure(self,**kw):
         if 'state' in kw: self._en=kw['state']!=tk.DISABLED;self._draw(self._bg if self._en else self._dis)
-        if 'text' in kw: self.txt=kw['text'];self._draw(self._bg if self._en else self._dis)
-        if 'bg' in kw: self._bg=kw['bg'];self._hov=self._adj(kw['bg'],20);self._draw(self._bg)
-
-class App:
-    def __init__(self, root):
-        self.root=root
-        self.root.title("M365 Admin Tool v6.1 — Kaulich IT Systems GmbH")
-        self.root.geometry("1100x750"); self.root.minsize(1000,650)
-        self.root.configure(bg=C['bg'])
-        self.ps=PS(); self.ps.start()
-        self.connected=False; self.mailboxes=[]; self.groups={'teams':[],'verteiler':[],'security':[]}
-        self.ob_report=[]; self._aud_data=[]; self._lic_data=[]
-        self.sidebar_btns={}; self.pages={}
+        if 'text' in kw: self.txt=kw['text'];self.itemconfig(self._t,text=self.txt)
+        if 'bg' in kw: self._bg=kw['bg'];self._hov=self._adj(kw['bg'],20);self._draw(self._bg if self._en else self._dis)
+
+class Table(tk.Frame):
+    """Virtualisierte Tabelle: hält nur die Zeilendaten, der Treeview zeigt immer nur die h sichtbaren Zeilen.
+    Spaltenkopf = sortieren, 🔍 = filtern, Strg+C / 📋 = markierte (sonst alle gefilterten) Zeilen als TSV kopieren.
+    Die Markierung liegt als Zeilennummern im Modell (sel), übersteht also Scrollen; Strg+A markiert alle gefilterten Zeilen."""
+    def __init__(self,parent,cols,h=12,widths=None):
+        super().__init__(parent,bg=C['panel']); self.pack(fill=tk.X,padx=12,pady=(4,8))
+        self.cols=list(cols); self.h=h; self.rows=[]; self.view=[]; self.sel=set(); self.off=0; self.msg=""
+        self._ord=None; self._sk=None; self._rev=False; self._lc=None
+        tb=tk.Frame(self,bg=C['panel']); tb.pack(fill=tk.X,pady=(0,4))
+        tk.Label(tb,text="🔍",font=('Segoe UI',10),fg=C['dim'],bg=C['panel']).pack(side=tk.LEFT,padx=(0,4))
+        self.fe=tk.Entry(tb,font=('Segoe UI',9),bg=C['input'],fg=C['txt'],insertbackground=C['txt'],relief=tk.FLAT,width=30,
+                         highlightthickness=1,highlightbackground=C['brd'],highlightcolor=C['accent'])
+        self.fe.pack(side=tk.LEFT,ipady=2); self.fe.bind('<KeyRelease>',lambda e:self._apply())
+        Btn(tb,"📋 Kopieren",command=self.copy,bg=C['input'],width=110,height=26,font_size=9).pack(side=tk.RIGHT)
+        self.st=tk.Label(tb,text="",font=('Segoe UI',9),fg=C['dim'],bg=C['panel'],anchor=tk.E)
+        self.st.pack(side=tk.RIGHT,fill=tk.X,expand=True,padx=8)
+        bf=tk.Frame(self,bg=C['panel']); bf.pack(fill=tk.X)
+        self.ids=[f"c{i}" for i in range(len(self.cols))]
+        self.tv=ttk.Treeview(bf,columns=self.ids,show='headings',height=h,selectmode='extended')
+        for i,(c,n) in enumerate(zip(self.ids,self.cols)):
+            self.tv.heading(c,text=n,anchor=tk.W,command=lambda i=i:self.sort(i))
+            self.tv.column(c,width=(widths or {}).get(i,160),anchor=tk.W,stretch=True)
+        self.sb=tk.Scrollbar(bf,orient=tk.VERTICAL,command=self._yv)
+        self.tv.pack(side=tk.LEFT,fill=tk.X,expand=True); self.sb.pack(side=tk.RIGHT,fill=tk.Y)
+        # eigene Scroll-Bindungen; "break" verhindert, dass die Seite (bind_all) mitscrollt
+        self.tv.bind('<MouseWheel>',lambda e:self._scroll(-3 if e.delta>0 else 3))
+        self.tv.bind('<Button-4>',lambda e:self._scroll(-3)); self.tv.bind('<Button-5>',lambda e:self._scroll(3))
+        self.tv.bind('<Prior>',lambda e:self._scroll(-h)); self.tv.bind('<Next>',lambda e:self._scroll(h))
+        self.tv.bind('<Up>',lambda e:self._edge(-1,e)); self.tv.bind('<Down>',lambda e:self._edge(1,e))
+        self.tv.bind('<Control-c>',lambda e:self.copy()); self.tv.bind('<Control-a>',lambda e:self.select_all())
+        self.tv.bind('<ButtonPress-1>',self._click); self.tv.bind('<<TreeviewSelect>>',lambda e:self._sync())
+        self._draw()
+    def set(self,rows,msg=""):
+        """Zeilen (Tupel in Spaltenreihenfolge) übernehmen; msg erscheint, wenn keine Zeilen da sind. Nur im UI-Thread."""
+        self.rows=[tuple(r) for r in rows]; self.msg=msg; self._lc=None; self._ord=None; self.sel.clear()
+        if self._sk is not None: self._sort()
+        self._apply()
+    @staticmethod
+    def _key(v):
+        if isinstance(v,(int,float)): return (0,v,'')
+        try: return (0,float(str(v).replace(',','.')),'')
+        except ValueError: return (1,0,str(v).lower())
+    def _sort(self):
+        ks=[self._key(r[self._sk]) if self._sk<len(r) else (1,0,'') for r in self.rows]
+        self._ord=sorted(range(len(self.rows)),key=ks.__getitem__,reverse=self._rev)
+    def sort(self,i):
+        self._rev=not self._rev if self._sk==i else False; self._sk=i; self._sort()
+        for j,(c,n) in enumerate(zip(self.ids,self.cols)): self.tv.heading(c,text=n+(" ▼" if self._rev else " ▲")*(j==i))
+        self._apply()
+    def _apply(self):
+        q=self.fe.get().strip().lower(); src=self._ord if self._ord is not None else range(len(self.rows))
+        if q:
+            if self._lc is None: self._lc=["\t".join(map(str,r)).lower() for r in self.rows]
+            self.view=[i for i in src if q in self._lc[i]]
+        else: self.view=list(src)
+        self.off=0; self._draw()
+    def _draw(self):
+        n=len(self.view); self.off=max(0,min(self.off,n-self.h))
+        self.tv.delete(*self.tv.get_children())
+        for i in self.view[self.off:self.off+self.h]: self.tv.insert('',tk.END,iid=str(i),values=self.rows[i])
+        self.tv.selection_set([str(i) for i in self.view[self.off:self.off+self.h] if i in self.sel])
+        self.sb.set(self.off/n,min(1.0,(self.off+self.h)/n)) if n else self.sb.set(0,1)
+        if not self.rows: self.st.configure(text=self.msg)
+        else: self.st.configure(text=f"{self.off+1 if n else 0}–{min(n,self.off+self.h)} von {n:,}"+(f" (gefiltert aus {len(self.rows):,})" if n<len(self.rows) else "")+" Zeilen"
+                                +(f" · {len(self.sel):,} markiert" if self.sel else ""))
+    def _sync(self):
+        """Treeview-Markierung des sichtbaren Fensters ins Modell übernehmen; Zeilen außerhalb bleiben unverändert"""
+        vis={int(i) for i in self.tv.get_children()}; now={int(i) for i in self.tv.selection()}
+        if vis and (self.sel&vis)!=now: self.sel=(self.sel-vis)|now; self._draw()
+    def _click(self,e):
+        if not e.state&0x0005: self.sel.clear()  # Klick ohne Strg/Umschalt ersetzt die Markierung, auch außerhalb des Fensters
+    def select_all(self):
+        self.sel=set(self.view); self._draw(); return 'break'
+    def _yv(self,*a):
+        if a[0]=='moveto': self.off=int(float(a[1])*len(self.view))
+        else: self.off+=int(a[1])*(self.h if a[2]=='pages' else 1)
+        self._draw()
+    def _scroll(self,d):
+        self.off+=d; self._draw(); return 'break'
+    def _edge(self,d,e=None):
+        """Pfeiltaste am Rand des sichtbaren Fensters → eine Zeile weiterscrollen und Markierung mitnehmen"""
+        it=self.tv.get_children(); f=self.tv.focus()
+        if not it or f!=it[-1 if d>0 else 0]:
+            if e is not None: self._click(e)
+            return None
+        o=self.off; self._scroll(d)
+        if self.off!=o:
+            it=self.tv.get_children(); e=it[-1 if d>0 else 0]; self.sel={int(e)}; self.tv.selection_set(e); self.tv.focus(e)
+        return 'break'
+    def copy(self):
+        rs=[self.rows[i] for i in self.view if i in self.sel] or [self.rows[i] for i in self.view]
+        if not rs: return 'break'
+        self.clipboard_clear(); self.clipboard_append("\n".join(["\t".join(self.cols)]+["\t".join(map(str,r)) for r in rs]))
+        self.st.configure(text=f"📋 {len(rs):,} Zeile(n) kopiert"); return 'break'
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  KERN (ohne Tk) — genutzt von GUI und CLI
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+class Core:
+    """UI-unabhängige Logik: Session-Pool, Verbindung, Offboarding, Bulk, Export"""
+    def __init__(self):
+        self.ps=PSPool(); self.ps.start()
+        self.ps.on_thr=lambda d,l,e:self.note(f"  🐢 Drosselung — Pause {d:.0f}s, max. {l} Session(s)",C['warn'])
+        self.ps.on_recycle=lambda e:self.note(f"  ♻️ {e} — Session wird neu gestartet und neu verbunden",C['warn'])
+        self.ps.watch()
+        self.connected=False; self.admin=''; self.mailboxes=[]; self.groups={'teams':[],'verteiler':[],'security':[]}
+        self.sched=Schedule(); self.jobs=Jobs()
         self.mod_status = {}  # Modul-Status: name -> {installed, version}
-        self._build()
-        self.log("🚀 M365 Admin Tool v6.1",C['ok'])
-        self.root.after(500,self._chk_all_modules)
+        self.dal=Exo(self.ps,self.note)
 
-    def _pj(self,o):
+    def note(self,msg,color=None):
+        """Meldung aus beliebigem Thread (CLI: stdout; App überschreibt → Protokoll)"""
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}",flush=True)
+
+    @staticmethod
+    def _pj(o):
         if not o or not o.strip(): return []
         try:
             s1,s2=o.find('['),o.find('{')
@@ -146,6 +989,654 @@ class App:
         except: return []
     def _ge(self,s): return s.split('<')[1].split('>')[0] if '<' in s and '>' in s else s
 
+    def preflight(self,force=False):
+        """PS-Version, Execution Policy, TLS 1.2 und Module in einem Aufruf; Modulliste aus PREFLIGHT_FILE,
+           solange sich PS-Version und PSModulePath nicht geändert haben → Bericht (+cached, secs), füllt mod_status"""
+        try:
+            with open(PREFLIGHT_FILE,encoding='utf-8') as f: cache=json.load(f)
+        except: cache={}
+        t0=time.time(); key='' if force else cache.get('key','')
+        ok,o,_=self.ps.run(PREFLIGHT_PS.replace('__KEY__',key.replace("'","")),300)
+        d=self._pj(o) if ok else []; r=d[0] if d else {}
+        r['cached']=bool(r) and 'Modules' not in r
+        if r['cached']: r['Modules']=cache.get('modules',{})
+        elif r.get('Modules') is not None: _jsave(PREFLIGHT_FILE,{'key':r.get('Key',''),'modules':r['Modules'],'ps':r.get('PS')})
+        r['secs']=time.time()-t0
+        for m in REQUIRED_MODULES:
+            v=(r.get('Modules') or {}).get(m['name']); self.mod_status[m['name']]={'installed':bool(v),'version':v}
+        return r
+
+    def preload(self):
+        """EXO-/Graph-Module vorab in die erste Session laden (läuft parallel zur Vorab-Prüfung) → Sekunden"""
+        t0=time.time(); _,o,_=self.ps.run(PRELOAD_PS,180); dt=time.time()-t0
+        self.ps.warm=[PRELOAD_PS]  # ab jetzt auch für weitere/neu gestartete Sessions (nicht vorher: Vorab-Prüfung nicht bremsen)
+        ms=[l.split(':',1)[1].split('=') for l in o.split("\n") if l.startswith('PRELOAD:')]
+        det=", ".join(f"{n} {int(t)/1000:.1f}s" for n,ok,t in ms if ok=='True')
+        self.note(f"  📦 Module vorgeladen in {dt:.1f}s"+(f" ({det})" if det else ""),C['dim'])
+        return dt
+
+    # ── Verbindung / Daten ───────────────────────────────
+    def connect(self,a):
+        """EXO (+ Graph, falls Modul vorhanden) verbinden → (ok, org, fehler)"""
+        t0=time.time()
+        v=tuple(int(x) for x in re.findall(r'\d+',str(self.mod_status.get('ExchangeOnlineManagement',{}).get('version') or ''))[:2])
+        # ältere Module fragen in jeder weiteren Session erneut (verstecktes Fenster) → dann nur diese eine Session
+        ok,_,e=self.ps.run(f'Connect-ExchangeOnline -UserPrincipalName "{a}" -ShowBanner:$false',180,init=True,replay=None if v>=EXO_WAM else False)
+        if not ok: return False,"",e
+        self.note(f"  ⏱️ Connect-ExchangeOnline {time.time()-t0:.1f}s",C['dim'])
+        self.admin=a
+        v,vo,_=self.ps.run('Get-OrganizationConfig|Select -Expand Name',30)
+        org=vo.strip().split("\n")[0] if v and vo.strip() else ""
+        # Auch Graph verbinden wenn Modul vorhanden
+        if self.mod_status.get('Microsoft.Graph', {}).get('installed'):
+            self.note("🔄 Verbinde Microsoft Graph...", C['warn'])
+            mg='Connect-MgGraph -Scopes "User.ReadWrite.All","Directory.ReadWrite.All","Organization.Read.All" -NoWelcome -EA SilentlyContinue'+MG_TOKEN_PS
+            gok, go, ge = self.ps.run(mg, 120, init=True, replay=False)
+            mt=re.search(r'MGTOKEN:(\S+)',go or '')
+            if gok and mt: self.ps.replay_as(mg,f"Connect-MgGraph -AccessToken (ConvertTo-SecureString '{mt.group(1)}' -AsPlainText -Force) -NoWelcome -EA Stop")
+            self.note("  ✅ Graph verbunden" if gok else f"  ⚠️ Graph: {ge}", C['ok'] if gok else C['warn'])
+        return True,org,""
+
+    def fetch(self):
+        """Postfächer + Gruppen (neu) laden → (ok_postfächer, ok_teams, ok_verteiler)"""
+        r1,o1,_=self.dal.q('mailboxes',timeout=180,fresh=True)
+        r2,o2,_=self.ps.run('Get-UnifiedGroup -ResultSize Unlimited|Select DisplayName,PrimarySmtpAddress,GroupType|ConvertTo-Json -Compress',180,fresh=True)
+        r3,o3,_=self.ps.run('Get-DistributionGroup -ResultSize Unlimited|Select DisplayName,PrimarySmtpAddress,GroupType|ConvertTo-Json -Compress',180,fresh=True)
+        if r1:
+            mbs=[]
+            for mb in self._pj(o1):
+                e,n,t=mb.get('PrimarySmtpAddress',''),mb.get('DisplayName',''),mb.get('RecipientTypeDetails','')
+                if e:
+                    sh='Shared' in t
+                    mbs.append({'d':f"{'👥' if sh else '👤'} {n} <{e}>",'e':e,'n':n,'t':'shared' if sh else 'user'})
+            mbs.sort(key=lambda x:x['d']); self.mailboxes=mbs
+        if r2:
+            self.groups['teams']=sorted([{'d':f"👥 {g.get('DisplayName','')} <{g.get('PrimarySmtpAddress','')}>",
+                'e':g.get('PrimarySmtpAddress',''),'n':g.get('DisplayName','')} for g in self._pj(o2) if g.get('PrimarySmtpAddress')],key=lambda x:x['d'])
+        if r3:
+            vt,sc=[],[]
+            for g in self._pj(o3):
+                e,n,gt=g.get('PrimarySmtpAddress',''),g.get('DisplayName',''),str(g.get('GroupType',''))
+                if e:
+                    ent={'d':f"{'🔒' if 'Security' in gt else '📨'} {n} <{e}>",'e':e,'n':n}
+                    (sc if 'Security' in gt else vt).append(ent)
+            self.groups['verteiler']=sorted(vt,key=lambda x:x['d']); self.groups['security']=sorted(sc,key=lambda x:x['d'])
+        return r1,r2,r3
+
+    # ── Berechtigungen / Gruppen ─────────────────────────
+    def mb_perm(self,mbe,use,fa=True,sa=False,am=True,add=True):
+        """Vollzugriff/Senden-als für use auf mbe setzen oder entfernen → Fehlerliste"""
+        errs=[]
+        if fa:
+            if add: ok,_,e=self.ps.run(f'Add-MailboxPermission -Identity "{mbe}" -User "{use}" -AccessRights FullAccess -AutoMapping {"$true" if am else "$false"}')
+            else: ok,_,e=self.ps.run(f'Remove-MailboxPermission -Identity "{mbe}" -User "{use}" -AccessRights FullAccess -Confirm:$false')
+            if add: self.note(f"  {'✅ Vollzugriff' if ok else '❌ '+e}",C['ok'] if ok else C['err'])
+            if not ok: errs.append(e)
+        if sa:
+            if add: ok,_,e=self.ps.run(f'Add-RecipientPermission -Identity "{mbe}" -Trustee "{use}" -AccessRights SendAs -Confirm:$false')
+            else: ok,_,e=self.ps.run(f'Remove-RecipientPermission -Identity "{mbe}" -Trustee "{use}" -AccessRights SendAs -Confirm:$false')
+            if add: self.note(f"  {'✅ Senden als' if ok else '❌ '+e}",C['ok'] if ok else C['err'])
+            if not ok: errs.append(e)
+        return errs
+
+    def grp_member(self,ge,ue,unified,add=True,owner=False):
+        """Mitglied (bzw. Besitzer bei M365-Gruppen) hinzufügen/entfernen → (ok, fehler)"""
+        if add:
+            if unified: cmd=f'Add-UnifiedGroupLinks -Identity "{ge}" -LinkType {"Owners" if owner else "Members"} -Links "{ue}"'
+            else: cmd=f'Add-DistributionGroupMember -Identity "{ge}" -Member "{ue}"'
+            ok,_,e=self.ps.run(cmd)
+        elif unified:
+            ok,_,e=self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{ge}" -LinkType Members -Links "{ue}" -Confirm:$false')
+            self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{ge}" -LinkType Owners -Links "{ue}" -Confirm:$false')
+        else: ok,_,e=self.ps.run(f'Remove-DistributionGroupMember -Identity "{ge}" -Member "{ue}" -Confirm:$false')
+        return ok,e
+
+    # ── Bulk / Export ────────────────────────────────────
+    def bulk(self,ge,users,adding):
+        """Benutzer parallel über den Pool zu Gruppe hinzufügen/entfernen → (ok, fehler, gedrosselt)"""
+        is_uni=any(g['e']==ge for g in self.groups.get('teams',[]))
+        h0=self.ps.thr.hits
+        def one(u):
+            if adding:
+                if is_uni: r,_,e=self.ps.run(f'Add-UnifiedGroupLinks -Identity "{ge}" -LinkType Members -Links "{u}" -EA Stop')
+                else: r,_,e=self.ps.run(f'Add-DistributionGroupMember -Identity "{ge}" -Member "{u}" -EA Stop')
+            else:
+                if is_uni:
+                    r,_,e=self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{ge}" -LinkType Members -Links "{u}" -Confirm:$false -EA Stop')
+                    self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{ge}" -LinkType Owners -Links "{u}" -Confirm:$false -EA SilentlyContinue')
+                else: r,_,e=self.ps.run(f'Remove-DistributionGroupMember -Identity "{ge}" -Member "{u}" -Confirm:$false -EA Stop')
+            r=r or any(p in e.lower() for p in BULK_NOOP)
+            with lk: dn[0]+=1; job_progress(dn[0]*100/len(users),u)
+            return r
+        dn,lk=[0],threading.Lock()
+        with ThreadPoolExecutor(max_workers=self.ps.size) as ex:
+            rs=list(ex.map(job_carry(one),[u.strip() for u in users if u.strip()]))
+        ok_c=sum(1 for r in rs if r)
+        return ok_c,len(rs)-ok_c,self.ps.thr.hits-h0
+
+    def export(self,fp,what):
+        """CSV-Dateien nach fp schreiben; what ⊆ users, shared, groups, forwarding → Anzahl Dateien"""
+        n=0; ts=datetime.now().strftime('%Y%m%d')
+        if 'users' in what:
+            p=os.path.join(fp,f"Benutzer_{ts}.csv")
+            with open(p,'w',newline='',encoding='utf-8') as f:
+                w=csv.writer(f,delimiter=';'); w.writerow(['Name','E-Mail','Typ'])
+                for m in self.mailboxes: w.writerow([m['n'],m['e'],m['t']])
+            n+=1
+        if 'shared' in what:
+            p=os.path.join(fp,f"Shared_{ts}.csv")
+            with open(p,'w',newline='',encoding='utf-8') as f:
+                w=csv.writer(f,delimiter=';'); w.writerow(['Name','E-Mail'])
+                for m in self.mailboxes:
+                    if m['t']=='shared': w.writerow([m['n'],m['e']])
+            n+=1
+        if 'groups' in what:
+            p=os.path.join(fp,f"Gruppen_{ts}.csv")
+            with open(p,'w',newline='',encoding='utf-8') as f:
+                w=csv.writer(f,delimiter=';'); w.writerow(['Typ','Name','E-Mail'])
+                for k in ['teams','verteiler','security']:
+                    for g in self.groups[k]: w.writerow([k,g['n'],g['e']])
+            n+=1
+        if 'forwarding' in what:
+            _,rs,_=self.forwarding()
+            p=os.path.join(fp,f"Weiterleitungen_{ts}.csv")
+            with open(p,'w',newline='',encoding='utf-8') as f:
+                w=csv.writer(f,delimiter=';'); w.writerow(['Postfach','Weiterleitung','Kopie'])
+                for r in rs: w.writerow([r['mb'],r['fwd'],r['keep']])
+            n+=1
+        return n
+
+    # ── Weiterleitungen ──────────────────────────────────
+    @staticmethod
+    def _fwd_rows(d):
+        """JSON-Objekte → [{'mb','fwd','keep'}], sortiert nach Postfach"""
+        rs=[{'mb':x.get('PrimarySmtpAddress',''),'fwd':re.sub(r'^smtp:','',str(x.get('ForwardingSmtpAddress') or ''),flags=re.I),
+             'keep':bool(x.get('DeliverToMailboxAndForward'))} for x in d if x.get('ForwardingSmtpAddress')]
+        return sorted(rs,key=lambda r:r['mb'].lower())
+
+    def forwarding(self,fresh=False):
+        """Postfächer mit Weiterleitung (Server-Filter, geteilt über den Cache) → (ok, zeilen, fehler)"""
+        ok,o,e=self.dal.q('forwarding',fresh=fresh)
+        return ok,self._fwd_rows(self._pj(o)) if ok else [],e
+
+    def fwd_bench(self,runs=1):
+        """Alle FWD_BENCH-Varianten live am Mandanten messen (am Cache vorbei, Ergebnisse werden auch nicht abgelegt) → Fixture für bench_report"""
+        fx={'recorded':datetime.now().isoformat(timespec='seconds'),'admin':self.admin,'variants':{}}
+        for k,cmd in FWD_BENCH.items():
+            ts=[]
+            for _ in range(runs):
+                t0=time.time(); ok,o,e=self.ps.run(cmd,600,fresh=True,cache=False); ts.append(round(time.time()-t0,3))
+            fx['variants'][k]={'cmd':cmd,'ok':ok,'secs':ts,'out':o if ok else '','err':e}
+            self.note(f"  ⏱️ {k}: {min(ts):.1f}s, {len(o.encode('utf-8')):,} Bytes" if ok else f"  ❌ {k}: {e}",C['dim'] if ok else C['err'])
+        return fx
+
+    # ── Massenabfragen in Blöcken ────────────────────────
+    @staticmethod
+    def _pslist(ms): return ",".join("'"+m.replace("'","''")+"'" for m in ms)
+
+    def _block(self,ms,call):
+        """Ein Block Postfächer: call(ms) → PS-Objekte mit 'Mailbox' (bzw. 'Error'). Einzeln gedrosselte Postfächer
+           werden nach dem gemeinsamen Backoff erneut abgefragt → (ok, objekte, fehler)"""
+        res=[]
+        for a in range(4):
+            ok,o,e=call(ms)
+            if not ok: return False,[],e
+            got=self._pj(o); thr={x.get('Mailbox') for x in got if x.get('Error') and Throttle.is_thr(x['Error'])}
+            res+=[x for x in got if x.get('Mailbox') not in thr]
+            if not thr or a==3: res+=[x for x in got if x.get('Mailbox') in thr]; break
+            ms=[m for m in ms if m in thr]; self.ps.thr.hit(a,"throttled")
+        return True,res,''
+
+    # ── Postfach-Größen / Aktivität ──────────────────────
+    @staticmethod
+    def _size_row(x,info,now):
+        """PS-Objekt → Zeile für MbStore (Größe in MB aus "1.2 GB (1,234,567 bytes)", Inaktivität in Tagen)"""
+        mb=x.get('Mailbox',''); n,t=info.get(mb,('',''))
+        if x.get('Error'):
+            return {'mailbox':mb,'name':n,'type':t,'size_mb':None,'items':None,'last_logon':'','last_action':'','inactive_days':None,'scanned':now,'error':x['Error']}
+        m=re.search(r'\(([\d.,\s\u00a0\u202f\']+)\s*bytes\)',x.get('Size') or '')
+        b=int(re.sub(r'\D','',m.group(1))) if m else 0
+        lo,la=x.get('Logon') or '',x.get('Action') or ''
+        try: ina=(datetime.now(timezone.utc)-datetime.fromisoformat(la or lo).replace(tzinfo=timezone.utc)).days if (la or lo) else None
+        except ValueError: ina=None
+        return {'mailbox':mb,'name':n,'type':t,'size_mb':round(b/1048576,1),'items':x.get('Items'),'last_logon':lo,'last_action':la,
+                'inactive_days':ina,'scanned':now,'error':''}
+
+    def size_report(self,resume=False,chunk=SIZE_CHUNK,on_rows=None,store=None):
+        """Größe, Elemente, letzte Anmeldung/Aktion aller Postfächer parallel in Blöcken → MbStore (REPORT_DB).
+           resume=True: im letzten Lauf bereits erfasste Postfächer überspringen. on_rows(zeilen, zähler) nach jedem Block.
+           → {'mailboxes','scanned','errors','secs','complete'}"""
+        db=store or MbStore(); t0=time.time()
+        ok,o,e=self.dal.q('mailboxes',timeout=600,fresh=True)
+        if not ok: raise RuntimeError(f"Postfächer: {e}")
+        info={x['PrimarySmtpAddress']:(x.get('DisplayName',''),x.get('RecipientTypeDetails','')) for x in self._pj(o) if x.get('PrimarySmtpAddress')}
+        run=db.meta('run') if resume else None
+        if run: skip=db.done(run); self.note(f"⏯️ Bericht fortsetzen: {len(skip)} Postfächer bereits erfasst",C['warn'])
+        else: run=db.meta('run',datetime.now().isoformat(timespec='seconds')); db.reset(); skip=set()
+        mbs=sorted(set(info)-skip); blocks=[mbs[i:i+chunk] for i in range(0,len(mbs),chunk)]
+        cnt={'mailboxes':len(info),'scanned':len(skip),'errors':0}; lk=threading.Lock()
+        self.note(f"📦 Größenbericht: {len(mbs)} Postfächer in {len(blocks)} Blöcken",C['warn'])
+        def one(ms):
+            ok,got,e=self._block(ms,lambda ms:self.dal.q('mailbox_stats_bulk',self._pslist(ms),60+10*len(ms),cache=False,log=False))
+            if not ok: return False,e
+            now=datetime.now().isoformat(timespec='seconds'); rs=[self._size_row(x,info,now) for x in got]
+            db.put(rs)
+            with lk:
+                cnt['scanned']+=sum(not r['error'] for r in rs); cnt['errors']+=sum(bool(r['error']) for r in rs)
+                job_progress(cnt['scanned']*100/max(1,len(info)),f"{cnt['scanned']}/{len(info)} Postfächer")
+                if on_rows: on_rows(rs,dict(cnt))
+            return True,''
+        try:
+            with ThreadPoolExecutor(max_workers=max(1,self.ps.size-1)) as ex: res=list(ex.map(job_carry(one),blocks))  # 1 Session bleibt für kurze Jobs
+        finally:
+            if not store: db.close()
+        bad=[e for ok,e in res if not ok]
+        if bad: self.note(f"  ⚠️ {len(bad)} Block/Blöcke offen (z.B. {bad[0][:80]}) — später fortsetzen",C['warn'])
+        av=self.dal.stats().get('mailbox_stats_bulk',{})
+        self.note("  ⏱️ mailbox_stats_bulk: "+", ".join(f"{'EXO' if w=='exo' else 'klassisch'} Ø {v['avg']:.2f}s/Block ({v['n']}×)" for w,v in av.items()),C['dim'])
+        return {**cnt,'secs':round(time.time()-t0,1),'complete':not bad and cnt['scanned']+cnt['errors']>=len(info)}
+
+    @staticmethod
+    def size_csv(fp,rows):
+        with open(fp,'w',newline='',encoding='utf-8') as f:
+            w=csv.DictWriter(f,fieldnames=SIZE_COLS,delimiter=';'); w.writeheader(); w.writerows(rows)
+
+    # ── Sicherheits-Scan: externe Weiterleitungen ────────
+    @staticmethod
+    def _ext(addr,doms):
+        """Adresse außerhalb der akzeptierten Domänen (Subdomänen zählen als intern)?"""
+        d=addr.lower().rsplit('@',1)[-1] if '@' in addr else ''
+        return bool(d) and not any(d==x or d.endswith('.'+x) for x in doms)
+
+    @staticmethod
+    def _scan_rows(d,doms,kind):
+        """PS-Objekte → Zeilen (dict je Ziel) für SCAN_COLS"""
+        rs=[]
+        for x in d:
+            if kind=='mailbox':
+                mb=x.get('PrimarySmtpAddress',''); kc=bool(x.get('DeliverToMailboxAndForward'))
+                if x.get('ForwardingSmtpAddress'):
+                    t=re.sub(r'^smtp:','',x['ForwardingSmtpAddress'],flags=re.I)
+                    rs.append({'mailbox':mb,'kind':'mailbox_smtp','rule':'','enabled':True,'target':t,'external':Core._ext(t,doms),'keep_copy':kc,'error':''})
+                if x.get('ForwardingAddress'):
+                    t=re.sub(r'^smtp:','',x.get('Target') or '',flags=re.I)
+                    rs.append({'mailbox':mb,'kind':'mailbox_recipient','rule':'','enabled':True,'target':t or x['ForwardingAddress'],
+                               'external':Core._ext(t,doms),'keep_copy':kc,'error':''})
+            elif x.get('Error'):
+                rs.append({'mailbox':x.get('Mailbox',''),'kind':'error','rule':'','enabled':'','target':'','external':'','keep_copy':'','error':x['Error']})
+            else:
+                to=x.get('To') or []
+                for t in [to] if isinstance(to,str) else to:
+                    ms=re.findall(r"(?:smtp:)?([\w.+'-]+@[\w-]+(?:\.[\w-]+)+)",t,re.I)  # "Name" [SMTP:a@b] → a@b; [EX:/o=…] = intern
+                    for a in ms or [t]:
+                        rs.append({'mailbox':x.get('Mailbox',''),'kind':'inbox_rule','rule':x.get('Rule',''),'enabled':bool(x.get('Enabled')),
+                                   'target':a,'external':Core._ext(a,doms) if ms else False,'keep_copy':'','error':''})
+        return rs
+
+    def fwd_scan(self,out,resume=False,internal=False,chunk=SCAN_CHUNK,on_rows=None):
+        """Mandantenweit externe Weiterleitungen (Postfach + Posteingangsregeln) nach out (.csv/.jsonl) streamen.
+           internal=True: auch Ziele innerhalb der akzeptierten Domänen ausgeben. on_rows(zeilen, zähler) nach jedem Block. Stand in out.state.json + out.cursor (je fertigem Block eine Zeile) → resume=True setzt dort fort.
+           Bricht der Lauf mitten in einem Block ab, kann dieser Block beim Fortsetzen doppelt in out landen.
+           → {'mailboxes','scanned','found','external','errors','out','complete'}"""
+        sp,cp=out+'.state.json',out+'.cursor'; jl=out.lower().endswith('.jsonl')
+        if resume:
+            if not os.path.exists(sp): raise FileNotFoundError(f"Kein Scan-Stand zu {out}")
+            with open(sp,'r',encoding='utf-8') as f: st=json.load(f)
+            done=set()
+            if os.path.exists(cp):
+                with open(cp,'r',encoding='utf-8') as f: done={l.strip() for l in f if l.strip()}
+            self.note(f"⏯️ Scan fortsetzen: {len(done)} Block/Blöcke bereits erledigt",C['warn'])
+        else:
+            ok,o,e=self.ps.run('Get-AcceptedDomain|Select -Expand DomainName',60,fresh=True)
+            if not ok: raise RuntimeError(f"Akzeptierte Domänen: {e}")
+            doms=sorted({l.strip().lower() for l in o.split("\n") if l.strip()})
+            ok,o,e=self.dal.q('mailboxes',timeout=600,fresh=True)
+            if not ok: raise RuntimeError(f"Postfächer: {e}")
+            mbs=sorted({x.get('PrimarySmtpAddress','') for x in self._pj(o)}-{''})
+            st={'out':out,'domains':doms,'mailboxes':mbs,'chunk':chunk,'internal':internal,'started':datetime.now().isoformat(timespec='seconds')}
+            _jsave(os.path.abspath(sp),st); done=set()
+            if os.path.exists(cp): os.remove(cp)
+            with open(out,'w',newline='',encoding='utf-8') as f:
+                if not jl: csv.writer(f,delimiter=';').writerow(SCAN_COLS)
+            self.note(f"🛡️ Scan: {len(mbs)} Postfächer, {len(doms)} akzeptierte Domäne(n)",C['warn'])
+        doms,mbs,ch,internal=st['domains'],st['mailboxes'],st['chunk'],st['internal']
+        blocks=[str(i) for i in range(0,len(mbs),ch)]; todo=[b for b in blocks if b not in done]
+        fo=open(out,'a',newline='',encoding='utf-8'); co=open(cp,'a',encoding='utf-8'); lk=threading.Lock()
+        w=None if jl else csv.DictWriter(fo,fieldnames=SCAN_COLS,delimiter=';')
+        cnt={'scanned':sum(min(ch,len(mbs)-int(b)) for b in done if b!='F'),'found':0,'external':0,'errors':0}
+        if resume and os.path.exists(out):  # Zähler der bisherigen Läufe aus der Ergebnisdatei
+            with open(out,'r',encoding='utf-8') as f:
+                for r in (map(json.loads,filter(str.strip,f)) if jl else csv.DictReader(f,delimiter=';')):
+                    e=r['kind']=='error'; cnt['errors']+=e; cnt['found']+=not e; cnt['external']+=str(r['external'])=='True'
+        def emit(rows,mark,n=0):
+            rows=[r for r in rows if internal or r['external'] is True or r['kind']=='error']
+            with lk:
+                for r in rows: fo.write(json.dumps(r,ensure_ascii=False)+"\n") if jl else w.writerow(r)
+                fo.flush(); co.write(mark+"\n"); co.flush(); done.add(mark)
+                cnt['scanned']+=n; cnt['found']+=sum(r['kind']!='error' for r in rows)
+                cnt['external']+=sum(r['external'] is True for r in rows); cnt['errors']+=sum(r['kind']=='error' for r in rows)
+                job_progress(cnt['scanned']*100/max(1,len(mbs)),f"{cnt['scanned']}/{len(mbs)} Postfächer, {cnt['external']} extern")
+                if on_rows: on_rows(rows,dict(cnt,mailboxes=len(mbs)))  # unter lk → Aufrufer braucht keine eigene Sperre
+        try:
+            if 'F' not in done:
+                ok,o,e=self.dal.q('forwarding_all',timeout=600,fresh=True,cache=False)
+                if ok: emit(self._scan_rows(self._pj(o),doms,'mailbox'),'F')
+                else: self.note(f"  ❌ Postfach-Weiterleitungen: {e}",C['err']); cnt['errors']+=1
+            def one(b):
+                ms=mbs[int(b):int(b)+ch]
+                ok,got,e=self._block(ms,lambda ms:self.ps.run(SCAN_RULES_PS.replace('__MBS__',self._pslist(ms)),60+15*len(ms),cache=False))
+                if not ok: return False,e  # Block bleibt offen → beim Fortsetzen erneut
+                emit(self._scan_rows(got,doms,'rule'),b,len(ms)); return True,''
+            with ThreadPoolExecutor(max_workers=max(1,self.ps.size-1)) as ex:  # 1 Session bleibt für kurze Jobs
+                res=list(ex.map(job_carry(one),todo))
+            bad=[e for ok,e in res if not ok]
+            if bad: self.note(f"  ⚠️ {len(bad)} Block/Blöcke offen (z.B. {bad[0][:80]}) — später fortsetzen",C['warn'])
+        finally: fo.close(); co.close()
+        complete=set(blocks)|{'F'}<=done
+        if complete:
+            for f in (sp,cp):
+                try: os.remove(f)
+                except OSError: pass
+        return {'mailboxes':len(mbs),**cnt,'out':out,'complete':complete}
+
+    # ── Offboarding ──────────────────────────────────────
+    def _ob_exec(self,ue,un,todo,opts,admin,state=None,planned=False,prog=None,step_done=None):
+        """Kompletter Lauf für einen Benutzer: Ist-Zustand (optional), Journal, DAG, Statistik
+           → ({schritt: (ok, detail)} über alle Schritte, {schritt: kennzahlen})"""
+        opts=dict(opts); noop={}; met={}
+        if state is None and planned:
+            mt=self.ps.meter(); t0=time.time(); state=self._ob_state(ue); self.ps.meter(False)
+            mt['secs']=round(time.time()-t0,2); met['_state']=mt
+        if state: opts['state']=state; noop=self._ob_noop(state,todo,opts)
+        run=[k for k in todo if k not in noop]
+        jr=Journal.new(ue,un,run,opts,admin)
+        res=self._ob_user(ue,run,opts,prog,step_done,jr,met)
+        cx=job_now(); jr.close('cancelled' if cx and cx['cancel'].is_set() else 'done')
+        res.update({k:(True,f"Keine Änderung nötig — {w}") for k,w in noop.items()})
+        ObStats.add(res,met)
+        return res,met
+
+    def _ob_rep(self,title,ue,un,admin,todo,res,extra=(),met=None):
+        sc=sum(1 for ok,_ in res.values() if ok); tot=[]
+        if met:
+            calls=sum(m['calls']/m.get('shared',1) for m in met.values())
+            tot=[f"Remote-Aufrufe: {calls:.0f}, {sum(m['bytes']/m.get('shared',1) for m in met.values())/1024:.1f} KB, "
+                 f"{sum(m['retries']/m.get('shared',1) for m in met.values()):.0f} Wiederholungen"
+                 +(f" (davon Ist-Zustand: {met['_state']['calls']} Aufruf, {met['_state']['secs']:.1f}s)" if '_state' in met else "")]
+        return (["="*55,title,f"Datum: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}",*extra,
+                 f"Benutzer: {un}",f"E-Mail: {ue}",f"Admin: {admin}","="*55,""]+self._ob_lines(todo,res,met)+
+                ["="*55,f"ERGEBNIS: {sc} OK, {len(res)-sc} FEHLER",*tot,"="*55])
+
+    def _ob_lines(self,todo,res,met=None):
+        ln=[]
+        for sk in todo:
+            ok,det=res[sk]; ln+=[f"[{'✅' if ok else '❌'}] {OB_N[sk]}",f"    {det}"]
+            m=(met or {}).get(sk)
+            if m: ln.append(f"    ⏱ {m['secs']:.1f}s · {m['calls']} Aufruf(e)"+(f" gebündelt ×{m['shared']}" if m.get('shared',1)>1 else "")+
+                            f" · {m['bytes']/1024:.1f} KB · {m['retries']} Wdh.")
+            ln.append("")
+        return ln
+
+    def _ob_plan(self,todo,opts):
+        """Schritte → Knoten; kompatible OB_MERGE-Schritte werden pro Cmdlet zu einem Knoten gebündelt"""
+        nodes,grp=[],{}
+        for k in todo:
+            if k in OB_MERGE and OB_MERGE[k][1](opts) is not None:
+                cm=OB_MERGE[k][0]
+                if cm in grp: nodes[grp[cm]]+=(k,); continue
+                grp[cm]=len(nodes)
+            nodes.append((k,))
+        return nodes
+
+    def _ob_user(self,ue,todo,opts,prog=None,step_done=None,jr=None,met=None):
+        """Knoten als DAG (OB_DEPS) ausführen, unabhängige parallel auf eigenen Sessions → {schritt: (ok, detail)}.
+           Mit Journal: Start/Ende jedes Schritts protokollieren, bereits abgeschlossene Schritte überspringen.
+           met: wird mit {schritt: {secs, calls, bytes, retries, shared}} gefüllt."""
+        res=jr.done() if jr else {}; run={}
+        if met is not None and jr: met.update(jr.metrics())
+        nodes=self._ob_plan([k for k in todo if k not in res],opts)
+        deps={n:[d for k in n for d in OB_DEPS.get(k,()) if d in todo and d not in n] for n in nodes}
+        cx=job_now()
+        def fin(r,mt=None):
+            for k,v in r.items():
+                res[k]=v; km=dict(mt,shared=len(r)) if mt else None
+                if km and met is not None: met[k]=km
+                if jr and (v[0] or not (cx and cx['cancel'].is_set())): jr.end(k,*v,km)  # vom Abbruch gescheitert → bleibt offen fürs Fortsetzen
+                if step_done: step_done(OB_N[k],v[0],len(res),len(todo))
+        def node(n):
+            mt=self.ps.meter(); t0=time.time()
+            try: r=self._ob_set(ue,n,opts) if len(n)>1 else {n[0]:self._ob_step(n[0],ue,opts)}
+            finally: self.ps.meter(False)
+            mt['secs']=round(time.time()-t0,2); return r,mt
+        with ThreadPoolExecutor(max_workers=self.ps.size) as ex:
+            while len(res)<len(todo):
+                if cx and cx['cancel'].is_set():  # Job abgebrochen: nichts Neues starten, laufende abwarten
+                    for k in todo:
+                        if k not in res and not any(k in n for n in run.values()): res[k]=(False,"⏹️ Abgebrochen")
+                    if not run: break
+                for n in nodes:
+                    if n[0] in res or n in run.values() or any(d not in res for d in deps[n]): continue
+                    bad=[OB_N[d] for d in deps[n] if not res[d][0]]
+                    if bad: fin({k:(False,f"Übersprungen — {', '.join(bad)} fehlgeschlagen") for k in n}); continue
+                    if prog: prog(len(res),len(todo)," + ".join(OB_N[k] for k in n))
+                    if jr:
+                        for k in n: jr.start(k)
+                    run[ex.submit(job_carry(node),n)]=n
+                if not run: continue
+                dn,_=wait(run,return_when=FIRST_COMPLETED)
+                for f in dn: run.pop(f); fin(*f.result())
+        return res
+
+    def _ob_set(self,ue,keys,opts):
+        """OB_MERGE-Schritte in einem Aufruf; schlägt der Sammelaufruf fehl, einzeln wiederholen (Zuordnung pro Schritt)"""
+        res,parts={},[]
+        for k in keys:
+            pa=OB_MERGE[k][1](opts)
+            if pa is None: res[k]=(True,"Übersprungen")
+            else: parts.append((k,pa))
+        if not parts: return res
+        ok,_,e=self.ps.run(f'{OB_MERGE[parts[0][0]][0]} -Identity "{ue}" '+" ".join(pa for _,pa in parts),60)
+        if ok or len(parts)==1:
+            for k,_ in parts: res[k]=(ok,OB_MERGE[k][2](opts) if ok else f"Fehler: {e}")
+            return res
+        for k,_ in parts: res.update(self._ob_set(ue,[k],opts))
+        return res
+
+    def _ob_step(self,step,ue,opts):
+        try:
+            if step=='sign_in':
+                # Graph-basiert: Account deaktivieren
+                if self.mod_status.get('Microsoft.Graph', {}).get('installed'):
+                    ok,o,e=self.ps.run(
+                        f'Update-MgUser -UserId "{ue}" -AccountEnabled:$false -EA Stop; Write-Output "BLOCK_OK"', 60)
+                    if "BLOCK_OK" in o:
+                        # Bestehende Sessions widerrufen
+                        self.ps.run(f'Revoke-MgUserSignInSession -UserId "{ue}" -EA SilentlyContinue', 30)
+                        return True, "Blockiert + Sessions widerrufen"
+                    return False, f"Fehler: {e}"
+                else:
+                    # Fallback EXO
+                    ok,_,e=self.ps.run(f'Set-User -Identity "{ue}" -AccountDisabled $true',60)
+                    return ok,"Blockiert (EXO)" if ok else f"Fehler: {e}"
+
+            elif step=='reset_pw':
+                # NEU: Passwort-Reset über Microsoft Graph statt Set-Mailbox
+                if self.mod_status.get('Microsoft.Graph', {}).get('installed'):
+                    ok,o,e=self.ps.run(
+                        f'$chars="abcdefghijkmnpqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789!@#$%&*";'
+                        f'$pw=-join(1..24|ForEach-Object{{$chars[(Get-Random -Max $chars.Length)]}});'
+                        f'$params=@{{PasswordProfile=@{{Password=$pw;ForceChangePasswordNextSignIn=$true}}}};'
+                        f'Update-MgUser -UserId "{ue}" @params -EA Stop;'
+                        f'Write-Output "PWOK"', 60)
+                    if "PWOK" in o:
+                        return True, "PW zurückgesetzt (Graph, Änderung beim nächsten Login erzwungen)"
+                    return False, f"Graph-Fehler: {e}"
+                else:
+                    return False, "Microsoft.Graph-Modul fehlt — PW-Reset nicht möglich. Bitte manuell im Admin Center."
+
+            elif step=='remove_groups':
+                rm,fl=0,0; st=opts.get('state') or {}
+                if 'Unified' in st: ug=st['Unified']
+                else:
+                    ok,o,e=self.ps.run(f'Get-UnifiedGroup -ResultSize Unlimited|Where-Object{{(Get-UnifiedGroupLinks -Identity $_.Identity -LinkType Members -EA SilentlyContinue|Where-Object{{$_.PrimarySmtpAddress -eq "{ue}"}})-or(Get-UnifiedGroupLinks -Identity $_.Identity -LinkType Owners -EA SilentlyContinue|Where-Object{{$_.PrimarySmtpAddress -eq "{ue}"}})}}|Select -Expand PrimarySmtpAddress',180)
+                    if not ok: return False,f"Fehler: M365-Gruppen nicht lesbar ({e.strip()[:80]})"  # ≠ keine Gruppen
+                    ug=o.strip().split("\n") if o.strip() else []
+                for g in ug:
+                    g=g.strip()
+                    if not g: continue
+                    r,_,_=self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{g}" -LinkType Members -Links "{ue}" -Confirm:$false -EA SilentlyContinue')
+                    self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{g}" -LinkType Owners -Links "{ue}" -Confirm:$false -EA SilentlyContinue')
+                    if r: rm+=1
+                    else: fl+=1
+                if 'DL' in st: dl=st['DL']
+                else:
+                    ok,o,e=self.ps.run(f'Get-DistributionGroup -ResultSize Unlimited|Where-Object{{(Get-DistributionGroupMember -Identity $_.Identity -ResultSize Unlimited -EA SilentlyContinue|Where-Object{{$_.PrimarySmtpAddress -eq "{ue}"}})}}|Select -Expand PrimarySmtpAddress',180)
+                    if not ok: return False,f"Fehler: Verteiler nicht lesbar ({e.strip()[:80]}), {rm} M365-Gruppen entfernt"
+                    dl=o.strip().split("\n") if o.strip() else []
+                for g in dl:
+                    g=g.strip()
+                    if not g: continue
+                    r,_,_=self.ps.run(f'Remove-DistributionGroupMember -Identity "{g}" -Member "{ue}" -Confirm:$false -EA SilentlyContinue')
+                    if r: rm+=1
+                    else: fl+=1
+                return fl==0,f"{rm} Gruppen entfernt"+("" if fl==0 else f", {fl} Fehler")
+
+            elif step=='remove_licenses':
+                if not self.mod_status.get('Microsoft.Graph', {}).get('installed'):
+                    return False, "Microsoft.Graph-Modul fehlt — Lizenzen manuell entziehen"
+                ok,o,e=self.ps.run(f'$s=(Get-MgUserLicenseDetail -UserId "{ue}" -EA SilentlyContinue).SkuId;if($s){{foreach($k in $s){{Set-MgUserLicense -UserId "{ue}" -RemoveLicenses @($k) -AddLicenses @() -EA Stop}};Write-Output "LR:$($s.Count)"}}else{{Write-Output "NG"}}',90)
+                if "LR:" in o: return True,f"{o.split('LR:')[1].strip().split(chr(10))[0]} Lizenz(en) entfernt"
+                if "NG" in o: return True, "Keine Lizenzen zugewiesen"
+                return False,f"Fehler: {e}"
+
+            elif step in OB_MERGE:
+                return self._ob_set(ue,[step],opts)[step]
+            elif step=='set_ooo':
+                msg=opts.get('ooo','')
+                if not msg: return True,"Übersprungen"
+                esc=msg.replace("'","''").replace('"','`"')
+                ok,_,e=self.ps.run(f'Set-MailboxAutoReplyConfiguration -Identity "{ue}" -AutoReplyState Enabled -InternalMessage "{esc}" -ExternalMessage "{esc}" -ExternalAudience All',60)
+                return ok,"OOO an" if ok else f"Fehler: {e}"
+            elif step=='disable_sync':
+                ok,_,e=self.ps.run(f'Set-CASMailbox -Identity "{ue}" -ActiveSyncEnabled $false -OWAEnabled $false -PopEnabled $false -ImapEnabled $false -MAPIEnabled $false -EwsEnabled $false',60)
+                return ok,"Protokolle aus" if ok else f"Fehler: {e}"
+            elif step=='remove_delegates':
+                ok,o,e=self.ps.run(f'$p=Get-MailboxPermission -Identity "{ue}"|Where-Object{{$_.User -ne "NT AUTHORITY\\SELF" -and $_.IsInherited -eq $false}};$c=0;foreach($x in $p){{Remove-MailboxPermission -Identity "{ue}" -User $x.User -AccessRights $x.AccessRights -Confirm:$false -EA SilentlyContinue;$c++}};Write-Output "DD:$c"',90)
+                if "DD:" in o: return True,f"{o.split('DD:')[1].strip().split(chr(10))[0]} entfernt"
+                return False,f"Fehler: {e}"
+            return False,"?"
+        except Exception as ex: return False,str(ex)
+
+    # ── Plan-Modus ───────────────────────────────────────
+    def _ob_state(self,ue):
+        """Ist-Zustand (Typ, Weiterleitung, GAL, Protokolle, OOO, Delegierte, Gruppen, Konto, Lizenzen) in einem Aufruf"""
+        ok,o,_=self.ps.run(OB_STATE_PS.replace('__UE__',ue.replace("'","''")),240,fresh=True)  # Entscheidungsgrundlage → nie aus Cache
+        d=self._pj(o) if ok else []
+        return d[0] if d else None
+
+    def _ob_noop(self,st,todo,opts):
+        """Schritte, die laut Ist-Zustand nichts ändern würden → {schritt: grund}"""
+        n={}; fe=opts.get('fwd','').lower()
+        chk={'sign_in':(st.get('Enabled') is False,"Anmeldung bereits blockiert"),
+             'remove_groups':('Unified' in st and not st['Unified'] and not st.get('DL'),"keine Gruppenmitgliedschaften"),
+             'remove_licenses':('Lic' in st and not st['Lic'],"keine Lizenzen zugewiesen"),
+             'convert_shared':(st.get('Type')=='SharedMailbox',"bereits Shared Mailbox"),
+             'set_ooo':(not opts.get('ooo'),"kein Abwesenheitstext"),
+             'fwd':(not fe or str(st.get('Fwd','')).lower() in (fe,f"smtp:{fe}"),"Weiterleitung bereits gesetzt" if fe else "kein Ziel"),
+             'hide_gal':(st.get('Hidden') is True,"bereits ausgeblendet"),
+             'disable_sync':(st.get('Proto')==0,"alle Protokolle bereits aus"),
+             'remove_delegates':('Delegates' in st and not st['Delegates'],"keine Delegierungen")}
+        for k in todo:
+            if k in chk and chk[k][0]: n[k]=chk[k][1]
+        return n
+
+    def _ob_calls(self,todo,opts,st=None):
+        """Geschätzte Anzahl Remote-Aufrufe für die Schritte (gebündelte Set-Mailbox zählen einmal)"""
+        st=st or {}; n=0
+        for nd in self._ob_plan(todo,opts):
+            k=nd[0]
+            if len(nd)>1: n+=1
+            elif k=='remove_groups':  # ohne Ist-Zustand: 2 Scans + Annahme 3 Gruppen je Art
+                n+=2*len(st['Unified']) if 'Unified' in st else 2+2*3
+                n+=len(st.get('DL',[])) if 'DL' in st else 3
+            elif k=='sign_in': n+=2
+            elif k=='fwd' and not opts.get('fwd'): pass
+            else: n+=1
+        return n
+
+    def _plan_lines(self,ue,todo,opts,st,dt):
+        """Plan-Ansicht aus Ist-Zustand → (zeilen, noop, auszuführen, aufrufe)"""
+        noop=self._ob_noop(st,todo,opts); run=[k for k in todo if k not in noop]
+        full,need=self._ob_calls(todo,opts),self._ob_calls(run,opts,st)
+        ln=["="*55,f"PLAN: {ue}",f"Ist-Zustand gelesen in {dt:.1f}s (1 Aufruf)","="*55,"",
+            f"📧 Typ: {st.get('Type','?')}   📨 Weiterleitung: {st.get('Fwd') or 'Keine'}   👻 GAL: {'versteckt' if st.get('Hidden') else 'sichtbar'}",
+            f"👥 Gruppen: {len(st.get('Unified',[]))} M365, {len(st.get('DL',[]))} Verteiler/Security   🔓 Delegierte: {len(st.get('Delegates',[]))}",
+            f"📊 Lizenzen: {', '.join(st['Lic']) if st.get('Lic') else ('Keine' if 'Lic' in st else '? (Graph fehlt)')}   "
+            f"🔒 Konto: {'aktiv' if st.get('Enabled') else ('blockiert' if 'Enabled' in st else '?')}",""]
+        for k in todo: ln.append(f"[{'=' if k in noop else '→'}] {OB_N[k]}"+(f" — {noop[k]}" if k in noop else ""))
+        ln+=["",f"Auszuführen: {len(run)}/{len(todo)} Schritte, ~{need} Remote-Aufrufe (ohne Plan ~{full})"]
+        return ln,noop,run,need
+
+    # ── Batch / Zeitplan ─────────────────────────────────
+    def _obb_parse(self,txt):
+        """CSV/Liste → [(upn, weiterleitung)]; Spalten mit ';' oder ',' getrennt, Kopfzeile ohne '@' wird ignoriert"""
+        rows,seen=[],set()
+        for r in csv.reader(txt.splitlines(),delimiter=';' if ';' in txt else ','):
+            ms=[self._ge(c.strip()).strip() for c in r if '@' in c]
+            if not ms or ms[0].lower() in seen: continue  # Dublette auch als "Name <upn>" oder in anderer Schreibweise
+            seen.add(ms[0].lower()); rows.append((ms[0],ms[1] if len(ms)>1 else ''))
+        return rows
+
+    def _ob_due(self,changed=None):
+        """Fällige geplante Offboardings ausführen (nur wenn verbunden), Bericht nach REPORT_DIR → ausgeführte Jobs"""
+        js=[]
+        for j in self.sched.due() if self.connected else []:
+            if not self.sched.claim(j): continue  # läuft schon in einem anderen Prozess (GUI ↔ CLI)
+            js.append(j)
+            if changed: changed()
+            self.note(f"📅 Geplantes Offboarding startet: {j['user']}",C['warn'])
+            try:
+                res,met=self._ob_exec(j['user'],j['name'],j['steps'],j['opts'],self.admin,planned=True)
+                rep=self._ob_rep("OFFBOARDING-BERICHT (geplant)",j['user'],j['name'],self.admin,j['steps'],res,[f"Geplant für: {j['at']}"],met)
+                os.makedirs(REPORT_DIR,exist_ok=True)
+                fp=os.path.join(REPORT_DIR,f"Offboarding_{j['user'].split('@')[0]}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+                with open(fp,'w',encoding='utf-8') as f: f.write("\n".join(rep))
+                fc=sum(1 for ok,_ in res.values() if not ok)
+                self.sched.set(j,status='done' if fc==0 else 'failed',report=fp)
+                self.note(f"📅 {j['user']}: {'✅' if fc==0 else f'⚠️ {fc} Fehler'} → {fp}",C['ok'] if fc==0 else C['warn'])
+            except Exception as ex:
+                self.sched.set(j,status='failed'); self.note(f"📅 ❌ {j['user']}: {ex}",C['err'])
+            if changed: changed()
+        return js
+
+    def cleanup(self):
+        self.jobs.cancel_all()
+        try: self.ps.run_all("Disconnect-ExchangeOnline -Confirm:$false",10)
+        except: pass
+        try: self.ps.run_all("Disconnect-MgGraph -EA SilentlyContinue",5)
+        except: pass
+        self.ps.stop()
+
+class App(Core):
+    def __init__(self, root):
+        t0=time.time(); self.root=root
+        self.root.title("M365 Admin Tool v6.1 — Kaulich IT Systems GmbH")
+        self.root.geometry("1100x750"); self.root.minsize(1000,650)
+        self.root.configure(bg=C['bg'])
+        self._logs=LogSink(); self._uq=collections.deque(); self._uk={}; self._ulk=threading.Lock()
+        Core.__init__(self)
+        self.ob_report=[]; self.obb_report=[]; self._aud_data=[]; self._lic_data=[]
+        self.sidebar_btns={}; self.pages={}
+        self.jobs.on_change=lambda j:self.ui(self._jobs_show,key='jobs')
+        self._build(); self._pump()
+        self.log("🚀 M365 Admin Tool v6.1",C['ok'])
+        self.root.after_idle(lambda:self.log(f"  ⏱️ Fenster bereit in {time.time()-t0:.2f}s ({len(self.pages)}/{len(self._fact)} Seiten gebaut)",C['dim']))
+        self._ob_open=Journal.unfinished()
+        if self._ob_open: self.log(f"⚠️ {len(self._ob_open)} unterbrochene(s) Offboarding — Fortsetzen nach dem Verbinden",C['warn'])
+        threading.Thread(target=self.preload,daemon=True).start()  # während Vorab-Prüfung / UPN-Eingabe
+        self.root.after(500,self._chk_all_modules)
+        threading.Thread(target=self._obs_loop,daemon=True).start()
+
     # ── LAYOUT ───────────────────────────────────────────
     def _build(self):
         hdr=tk.Frame(self.root,bg=C['hdr'],height=44); hdr.pack(fill=tk.X); hdr.pack_propagate(False)
@@ -188,12 +1679,12 @@ class App:
         self._canvas.bind('<Enter>', self._bind_mousewheel)
         self._canvas.bind('<Leave>', self._unbind_mousewheel)
 
-        self._b_conn()
-        self._b_preflight()  # NEU: Vorab-Prüfung Seite
-        self._b_postfach(); self._b_grp('teams','Teams / M365 Gruppe'); self._b_grp('verteiler','Verteilerliste')
-        self._b_grp('security','Sicherheitsgruppe'); self._b_offboarding(); self._b_userinfo()
-        self._b_licenses(); self._b_sharedmb(); self._b_forwarding(); self._b_audit()
-        self._b_csvexport(); self._b_bulk()
+        # Seiten erst beim ersten Aufruf bauen (_nav → _mk); Start baut nur Rahmen + Vorab-Prüfung
+        self._fact={'_conn':self._b_conn,'_preflight':self._b_preflight,'postfach':self._b_postfach,
+            'teams':lambda:self._b_grp('teams','Teams / M365 Gruppe'),'verteiler':lambda:self._b_grp('verteiler','Verteilerliste'),
+            'security':lambda:self._b_grp('security','Sicherheitsgruppe'),'offboarding':self._b_offboarding,'userinfo':self._b_userinfo,
+            'licenses':self._b_licenses,'sharedmb':self._b_sharedmb,'forwarding':self._b_forwarding,'audit':self._b_audit,
+            'csvexport':self._b_csvexport,'mbreport':self._b_mbreport,'bulk':self._b_bulk,'jobs':self._b_jobs}
 
         self.log_frame=tk.Frame(self.content,bg=C['bg']); self.log_frame.pack(fill=tk.X,pady=(10,0))
         tk.Label(self.log_frame,text="📋 Protokoll",font=('Segoe UI',10,'bold'),fg=C['accent'],bg=C['bg']).pack(anchor=tk.W,pady=(0,3))
@@ -205,6 +1696,10 @@ class App:
             self.log_t.tag_configure(t,foreground=c2)
         st=ttk.Style(); st.theme_use('clam')
         st.configure('TCombobox',fieldbackground=C['input'],background=C['panel'],foreground=C['txt'],arrowcolor=C['txt'],bordercolor=C['brd'])
+        st.configure('Treeview',background=C['input'],fieldbackground=C['input'],foreground=C['txt'],bordercolor=C['brd'],rowheight=20,font=('Consolas',9))
+        st.configure('Treeview.Heading',background=C['panel'],foreground=C['txt'],relief=tk.FLAT,font=('Segoe UI',9,'bold'))
+        st.map('Treeview',background=[('selected',C['sb_active'])],foreground=[('selected',C['accent'])])
+        st.map('Treeview.Heading',background=[('active',C['sb_active'])])
         self._nav('_preflight')
 
     # ── Scrollbar-Fix Methoden ───────────────────────────
@@ -240,7 +1735,32 @@ class App:
         elif event.num == 5:
             self._canvas.yview_scroll(3, "units")
 
+    def _mk(self,key):
+        """Seite bauen und mit bereits geladenen Daten füllen"""
+        t0=time.time(); old=set(self.__dict__); self._fact[key]()
+        if self.mailboxes:
+            self._upd_all(set(self.__dict__)-old)
+            if key=='postfach': self._amb()
+            if key in self.groups: self._ugrp(key)
+        self.log(f"  🧱 Seite {key} gebaut in {(time.time()-t0)*1000:.0f} ms",C['dim'])
+    def _w(self,n):
+        """Widget, falls seine Seite schon gebaut ist, sonst None (baut nichts)"""
+        return self.__dict__.get(n)
+    # Widget-Präfix → Seite, die es baut (für __getattr__)
+    _OWN = {'admin':'_conn','pf':'_preflight','mb':'postfach','am':'postfach','fa':'postfach','sa':'postfach',
+            'teams':'teams','verteiler':'verteiler','security':'security','ob':'offboarding','obb':'offboarding','obs':'offboarding',
+            'ui':'userinfo','lic':'licenses','sm':'sharedmb','fwd':'forwarding','scan':'forwarding','aud':'audit',
+            'csv':'csvexport','mbr':'mbreport','blk':'bulk','jobs':'jobs'}
+    def __getattr__(self,n):
+        """Zugriff auf Widget einer noch nicht gebauten Seite → nur die zuständige Seite bauen (_OWN)"""
+        f=self.__dict__.get('_fact'); k=self._OWN.get(n.lstrip('_').split('_')[0])
+        if not f or not k or k in self.pages: raise AttributeError(n)
+        self._mk(k)
+        if n in self.__dict__: return self.__dict__[n]
+        raise AttributeError(n)
+
     def _nav(self,key):
+        if key not in self.pages and key in self._fact: self._mk(key)
         for k,(b,l) in self.sidebar_btns.items():
             if k==key: b.configure(bg=C['sb_active']);l.configure(bg=C['sb_active'],fg=C['accent'])
             else: b.configure(bg=C['sidebar']);l.configure(bg=C['sidebar'],fg=C['dim'])
@@ -358,14 +1878,14 @@ class App:
         self._pf_install_btn.pack(side=tk.LEFT, padx=(0, 8))
         self._pf_install_btn.configure(state=tk.DISABLED)
 
-        Btn(br, "🔄 Erneut prüfen", command=self._chk_all_modules, bg=C['input'], width=150).pack(side=tk.LEFT, padx=(0, 8))
+        Btn(br, "🔄 Erneut prüfen", command=lambda: self._chk_all_modules(True), bg=C['input'], width=150).pack(side=tk.LEFT, padx=(0, 8))
         self._pf_continue_btn = Btn(br, "▶️ Weiter zur Verbindung",
                                      command=lambda: self._nav('_conn'), bg=C['ok'], fg='#1a1b26', width=200)
         self._pf_continue_btn.pack(side=tk.LEFT)
         self._pf_continue_btn.configure(state=tk.DISABLED)
 
-    def _chk_all_modules(self):
-        """Alle Module und Voraussetzungen prüfen"""
+    def _chk_all_modules(self,force=False):
+        """Alle Module und Voraussetzungen prüfen (ein PS-Aufruf; Modul-Scan aus Cache, außer force)"""
         self.log("🔧 Starte Vorab-Prüfung...", C['warn'])
         self._pf_result.configure(text="⏳ Prüfe Voraussetzungen...", fg=C['warn'])
         self._pf_install_btn.configure(state=tk.DISABLED)
@@ -377,60 +1897,42 @@ class App:
             status_lbl.configure(text="Prüfe...", fg=C['warn'])
 
         def do():
-            all_ok = True
+            r = self.preflight(force)
             missing = []
 
             # 1. PowerShell-Version
-            ok, o, _ = self.ps.run('$PSVersionTable.PSVersion.ToString()', 15)
-            v = o.strip().split("\n")[0] if ok and o.strip() else "?"
-            ps_ok = ok and v != "?"
-            self.root.after(0, lambda: self._pf_set('powershell', ps_ok, f"v{v}" if ps_ok else "Fehler"))
-            if not ps_ok: all_ok = False
-
-            # 2. Execution Policy
-            ok, o, _ = self.ps.run('Get-ExecutionPolicy -Scope CurrentUser', 15)
-            policy = o.strip().split("\n")[0] if ok else "?"
+            v = r.get('PS') or "?"
+            ps_ok = v != "?"
+            self.ui(lambda: self._pf_set('powershell', ps_ok, f"v{v}" if ps_ok else "Fehler"))
+
+            # 2. Execution Policy (im Skript ggf. automatisch auf RemoteSigned gesetzt)
+            policy = r.get('Policy') or "?"
             ep_ok = policy.lower() in ['remotesigned', 'unrestricted', 'bypass', 'allsigned']
-            self.root.after(0, lambda: self._pf_set('execution_policy', ep_ok,
-                                                     f"{policy}" if ep_ok else f"{policy} — RemoteSigned empfohlen"))
-            if not ep_ok:
-                # Versuche automatisch zu setzen
-                self.ps.run('Set-ExecutionPolicy RemoteSigned -Scope CurrentUser -Force -EA SilentlyContinue', 15)
-                ok2, o2, _ = self.ps.run('Get-ExecutionPolicy -Scope CurrentUser', 15)
-                policy2 = o2.strip().split("\n")[0] if ok2 else "?"
-                ep_ok2 = policy2.lower() in ['remotesigned', 'unrestricted', 'bypass', 'allsigned']
-                self.root.after(0, lambda: self._pf_set('execution_policy', ep_ok2,
-                                                         f"{policy2} (auto-gesetzt)" if ep_ok2 else f"{policy2} — bitte manuell setzen"))
-                if not ep_ok2: all_ok = False
+            ep_txt = (f"{policy} (auto-gesetzt)" if r.get('PolicyFixed') else policy) if ep_ok else f"{policy} — bitte manuell setzen"
+            self.ui(lambda: self._pf_set('execution_policy', ep_ok, ep_txt))
 
             # 3. TLS 1.2
-            ok, o, _ = self.ps.run('[Net.ServicePointManager]::SecurityProtocol = [Net.SecurityProtocolType]::Tls12; Write-Output "TLS12OK"', 15)
-            tls_ok = "TLS12OK" in o
-            self.root.after(0, lambda: self._pf_set('tls', tls_ok, "TLS 1.2 aktiv" if tls_ok else "Fehler"))
-            if not tls_ok: all_ok = False
+            tls_ok = r.get('Tls') is True
+            self.ui(lambda: self._pf_set('tls', tls_ok, "TLS 1.2 aktiv" if tls_ok else "Fehler"))
+            all_ok = ps_ok and ep_ok and tls_ok
 
-            # 4. PowerShell-Module prüfen
+            # 4. PowerShell-Module
             for mod in REQUIRED_MODULES:
-                name = mod['name']
-                self.root.after(0, lambda n=name: self.log(f"  🔍 Prüfe {n}...", C['dim']))
-                ok, o, _ = self.ps.run(
-                    f'$m=Get-Module -ListAvailable -Name {name};if($m){{Write-Output "MOD_OK:$($m.Version|Select -First 1)"}}else{{Write-Output "MOD_MISS"}}', 30)
-
-                if "MOD_OK:" in o:
-                    ver = o.split("MOD_OK:")[1].strip().split("\n")[0]
-                    self.mod_status[name] = {'installed': True, 'version': ver}
-                    self.root.after(0, lambda n=name, v=ver: [
+                name = mod['name']; ver = self.mod_status[name]['version']
+                if ver:
+                    self.ui(lambda n=name, v=ver: [
                         self._pf_set(n, True, f"v{v}"),
                         self.log(f"  ✅ {n} v{v}", C['ok'])
                     ])
                 else:
-                    self.mod_status[name] = {'installed': False, 'version': None}
                     missing.append(mod)
-                    self.root.after(0, lambda n=name: [
+                    self.ui(lambda n=name: [
                         self._pf_set(n, False, "Nicht installiert"),
                         self.log(f"  ❌ {n} fehlt!", C['err'])
                     ])
                     all_ok = False
+            self.ui(lambda: self.log(f"  ⏱️ Vorab-Prüfung in {r['secs']:.1f}s (1 Aufruf"
+                                                 f"{', Modulliste aus Cache' if r['cached'] else ''})", C['dim']))
 
             # Update Header-Label
             exo = self.mod_status.get('ExchangeOnlineManagement', {})
@@ -442,18 +1944,18 @@ class App:
             else: hdr_parts.append("📊❌")
             hdr_text = " ".join(hdr_parts)
 
-            self.root.after(0, lambda: self.mod_lbl.configure(
+            self.ui(lambda: self.mod_lbl.configure(
                 text=hdr_text, fg=C['ok'] if all_ok else C['err']))
 
             # Ergebnis
             if all_ok:
-                self.root.after(0, lambda: [
+                self.ui(lambda: [
                     self._pf_result.configure(text="✅ Alle Voraussetzungen erfüllt!", fg=C['ok']),
                     self._pf_continue_btn.configure(state=tk.NORMAL),
                     self.log("✅ Vorab-Prüfung bestanden!", C['ok']),
                 ])
             else:
-                self.root.after(0, lambda: [
+                self.ui(lambda: [
                     self._pf_result.configure(text=f"⚠️ {len(missing)} Modul(e) fehlen", fg=C['err']),
                     self._pf_install_btn.configure(state=tk.NORMAL),
                     self._pf_continue_btn.configure(state=tk.NORMAL),  # trotzdem erlauben, aber warnen
@@ -489,13 +1991,13 @@ class App:
 
             for mod in missing:
                 name = mod['name']
-                self.root.after(0, lambda n=name: [
+                self.ui(lambda n=name: [
                     self._pf_set(n, None, "Installiere..."),
                     self.log(f"  📦 Installiere {n}...", C['warn'])
                 ])
                 # Labels auf "Installiere" setzen
-                self.root.after(0, lambda n=name: self._pf_labels[n][0].configure(text="⏳", fg=C['warn']))
-                self.root.after(0, lambda n=name: self._pf_labels[n][1].configure(text="Installiere...", fg=C['warn']))
+                self.ui(lambda n=name: self._pf_labels[n][0].configure(text="⏳", fg=C['warn']))
+                self.ui(lambda n=name: self._pf_labels[n][1].configure(text="Installiere...", fg=C['warn']))
 
                 ok, o, e = self.ps.run(
                     f'Install-Module {name} -Scope CurrentUser -Force -AllowClobber -EA Stop;'
@@ -506,18 +2008,18 @@ class App:
                 if "INST_OK:" in o:
                     ver = o.split("INST_OK:")[1].strip().split("\n")[0]
                     self.mod_status[name] = {'installed': True, 'version': ver}
-                    self.root.after(0, lambda n=name, v=ver: [
+                    self.ui(lambda n=name, v=ver: [
                         self._pf_set(n, True, f"v{v} (neu installiert)"),
                         self.log(f"  ✅ {n} v{v} installiert", C['ok'])
                     ])
                 else:
-                    self.root.after(0, lambda n=name, err=e: [
+                    self.ui(lambda n=name, err=e: [
                         self._pf_set(n, False, f"Installation fehlgeschlagen"),
                         self.log(f"  ❌ {n}: {err}", C['err'])
                     ])
 
             # Erneut prüfen
-            self.root.after(500, self._chk_all_modules)
+            self.ui(lambda: self.root.after(500, lambda: self._chk_all_modules(True)))
 
         threading.Thread(target=do, daemon=True).start()
 
@@ -557,7 +2059,7 @@ class App:
             rr=tk.Frame(cd,bg=C['panel']); rr.pack(fill=tk.X,padx=12,pady=(4,0))
             for t,v in [("👤 Mitglied","Member"),("👑 Besitzer","Owner")]:
                 tk.Radiobutton(rr,text=t,variable=rv,value=v,font=('Segoe UI',9),fg=C['txt'],bg=C['panel'],selectcolor=C['input'],activebackground=C['panel']).pack(side=tk.LEFT,padx=(0,10))
-        mt=self._txtbox(cd,4); br=self._btnrow(cd)
+        mt=Table(cd,["Rolle","Name","E-Mail"],8,{0:110,1:220,2:260}); br=self._btnrow(cd)
         Btn(br,"📋 Mitglieder",command=lambda k=key:self._smem(k),bg=C['input'],width=125).pack(side=tk.LEFT,padx=(0,8))
         Btn(br,"✅ Hinzufügen",command=lambda k=key:self._agrp(k),bg=C['ok'],fg='#1a1b26',width=125).pack(side=tk.LEFT,padx=(0,8))
         Btn(br,"❌ Entfernen",command=lambda k=key:self._rgrp(k),bg=C['err'],width=125).pack(side=tk.LEFT)
@@ -586,8 +2088,38 @@ class App:
         self.ob_pb=ttk.Progressbar(pf,mode='determinate'); self.ob_pb.pack(fill=tk.X,pady=(2,0))
         self.ob_rt=self._txtbox(cd,5); br=self._btnrow(cd)
         self.ob_rb=Btn(br,"🚪 Offboarding starten",command=self._run_ob,bg=C['err'],width=180); self.ob_rb.pack(side=tk.LEFT,padx=(0,8))
+        self.ob_pb2=Btn(br,"🧭 Plan",command=self._plan_ob,bg=C['input'],width=100); self.ob_pb2.pack(side=tk.LEFT,padx=(0,8))
+        Btn(br,"📈 Statistik",command=self._ob_stats,bg=C['input'],width=110).pack(side=tk.RIGHT)
         self.ob_eb=Btn(br,"💾 Bericht",command=self._exp_ob,bg=C['accent'],width=120); self.ob_eb.pack(side=tk.LEFT)
         self.ob_eb.configure(state=tk.DISABLED)
+        # Batch-Offboarding: gleiche Schritte/OOO/Weiterleitung für viele Benutzer
+        cd2=self._card(p)
+        tk.Label(cd2,text="📦 Batch-Offboarding",font=('Segoe UI',10,'bold'),fg=C['txt'],bg=C['panel']).pack(fill=tk.X,padx=12,pady=(8,0))
+        tk.Label(cd2,text="Benutzer (E-Mail pro Zeile, optional ;Weiterleitung) — Schritte/Texte von oben:",font=('Segoe UI',9),fg=C['dim'],bg=C['panel']).pack(fill=tk.X,padx=12,pady=(4,0))
+        uf=tk.Frame(cd2,bg=C['panel']); uf.pack(fill=tk.X,padx=12,pady=(2,0))
+        self.obb_users=tk.Text(uf,height=5,font=('Consolas',9),bg=C['input'],fg=C['txt'],relief=tk.FLAT,wrap=tk.WORD,highlightthickness=1,highlightbackground=C['brd'])
+        self.obb_users.pack(fill=tk.X)
+        self.obb_pl=tk.Label(cd2,text="",font=('Segoe UI',9),fg=C['dim'],bg=C['panel']); self.obb_pl.pack(fill=tk.X,padx=12,pady=(4,0))
+        self.obb_rt=self._txtbox(cd2,5); br2=self._btnrow(cd2)
+        self.obb_plan=tk.BooleanVar(value=True)
+        tk.Checkbutton(cd2,text="🧭 Ist-Zustand vorab lesen, nur nötige Schritte ausführen",variable=self.obb_plan,font=('Segoe UI',9),fg=C['txt'],bg=C['panel'],selectcolor=C['input'],activebackground=C['panel']).pack(anchor=tk.W,padx=12)
+        Btn(br2,"📂 Aus CSV laden",command=self._obb_csv,bg=C['input'],width=130).pack(side=tk.LEFT,padx=(0,8))
+        self.obb_rb=Btn(br2,"🚪 Batch starten",command=self._run_obb,bg=C['err'],width=150); self.obb_rb.pack(side=tk.LEFT,padx=(0,8))
+        self.obb_eb=Btn(br2,"💾 Bericht",command=self._exp_obb,bg=C['accent'],width=120); self.obb_eb.pack(side=tk.LEFT)
+        self.obb_eb.configure(state=tk.DISABLED)
+        # Geplantes Offboarding: Auswahl von oben zu einem Zeitpunkt, Ausführung im Hintergrund
+        cd3=self._card(p)
+        tk.Label(cd3,text="📅 Geplantes Offboarding",font=('Segoe UI',10,'bold'),fg=C['txt'],bg=C['panel']).pack(fill=tk.X,padx=12,pady=(8,0))
+        self.obs_at=self._entry(cd3,"Ausführen am:")
+        self.obs_at.insert(0,datetime.now().replace(hour=18,minute=0).strftime('%d.%m.%Y %H:%M'))
+        lf=tk.Frame(cd3,bg=C['panel']); lf.pack(fill=tk.X,padx=12,pady=(6,0))
+        self.obs_lb=tk.Listbox(lf,height=4,font=('Consolas',9),bg=C['input'],fg=C['txt'],relief=tk.FLAT,highlightthickness=1,
+                               highlightbackground=C['brd'],selectbackground=C['sb_active'],activestyle='none')
+        self.obs_lb.pack(fill=tk.X)
+        br3=self._btnrow(cd3)
+        Btn(br3,"📅 Einplanen",command=self._obs_add,bg=C['accent'],width=130).pack(side=tk.LEFT,padx=(0,8))
+        Btn(br3,"🗑️ Entfernen",command=self._obs_rem,bg=C['input'],width=120).pack(side=tk.LEFT)
+        self._obs_show()
 
     def _b_userinfo(self):
         p=self._page('userinfo','Benutzer-Info','👤'); cd=self._card(p)
@@ -598,12 +2130,12 @@ class App:
     def _b_licenses(self):
         p=self._page('licenses','Lizenz-Übersicht','📊'); cd=self._card(p)
         # Warnhinweis wenn Graph fehlt
-        self._lic_warn = tk.Label(cd, text="", font=('Segoe UI', 9), fg=C['err'], bg=C['panel'])
+        self._lic_warn = tk.Label(cd, text=self._lic_msg(), font=('Segoe UI', 9), fg=C['err'], bg=C['panel'])
         self._lic_warn.pack(fill=tk.X, padx=12, pady=(4, 0))
         br=self._btnrow(cd)
         Btn(br,"📊 Laden",command=self._load_lic,bg=C['accent'],width=140).pack(side=tk.LEFT,padx=(0,8))
         Btn(br,"💾 CSV",command=self._exp_lic,bg=C['ok'],fg='#1a1b26',width=110).pack(side=tk.LEFT)
-        self.lic_t=self._txtbox(cd,14)
+        self.lic_t=Table(cd,["Lizenz","Benutzt","Gesamt","Frei"],14,{0:300,1:90,2:90,3:90})
 
     def _b_sharedmb(self):
         p=self._page('sharedmb','Shared Mailbox erstellen','📫'); cd=self._card(p)
@@ -616,7 +2148,7 @@ class App:
     def _b_forwarding(self):
         p=self._page('forwarding','Mail-Weiterleitungen','📬'); cd=self._card(p)
         br1=self._btnrow(cd); Btn(br1,"📬 Alle laden",command=self._load_fwd,bg=C['accent'],width=160).pack(side=tk.LEFT)
-        self.fwd_t=self._txtbox(cd,6)
+        self.fwd_t=Table(cd,["Postfach","Weiterleitung","Kopie"],8,{0:260,1:260,2:70})
         cd2=self._card(p)
         tk.Label(cd2,text="Weiterleitung setzen / entfernen",font=('Segoe UI',10,'bold'),fg=C['txt'],bg=C['panel']).pack(fill=tk.X,padx=12,pady=(8,0))
         self.fwd_src=self._combo(cd2,"Postfach:"); self.fwd_dst=self._combo(cd2,"Weiterleitung an:")
@@ -626,6 +2158,16 @@ class App:
         br2=self._btnrow(cd2)
         Btn(br2,"✅ Setzen",command=self._set_fwd,bg=C['ok'],fg='#1a1b26',width=130).pack(side=tk.LEFT,padx=(0,8))
         Btn(br2,"❌ Entfernen",command=self._rem_fwd,bg=C['err'],width=130).pack(side=tk.LEFT)
+        cd3=self._card(p)
+        tk.Label(cd3,text="🛡️ Sicherheits-Scan: externe Weiterleitungen + Posteingangsregeln (ganzer Mandant)",font=('Segoe UI',10,'bold'),
+                 fg=C['txt'],bg=C['panel']).pack(fill=tk.X,padx=12,pady=(8,0))
+        tk.Label(cd3,text="Ziele außerhalb der akzeptierten Domänen. Ergebnis wird laufend in CSV/JSONL geschrieben; abgebrochene Scans lassen sich fortsetzen.",
+                 font=('Segoe UI',9),fg=C['dim'],bg=C['panel'],anchor=tk.W).pack(fill=tk.X,padx=12)
+        br3=self._btnrow(cd3)
+        self.scan_rb=Btn(br3,"▶️ Scan starten",command=self._run_scan,bg=C['accent'],width=140); self.scan_rb.pack(side=tk.LEFT,padx=(0,8))
+        Btn(br3,"⏯️ Fortsetzen",command=lambda:self._run_scan(True),bg=C['input'],width=130).pack(side=tk.LEFT,padx=(0,8))
+        self.scan_pl=tk.Label(br3,text="",font=('Segoe UI',9),fg=C['dim'],bg=C['panel']); self.scan_pl.pack(side=tk.LEFT)
+        self.scan_t=Table(cd3,["Postfach","Art","Regel","Ziel","Kopie/aktiv","Fehler"],10,{0:220,1:120,2:150,3:220,4:80,5:200})
 
     def _b_audit(self):
         p=self._page('audit','Berechtigungs-Audit','🔍'); cd=self._card(p)
@@ -633,7 +2175,7 @@ class App:
         br=self._btnrow(cd)
         Btn(br,"🔍 Audit",command=self._run_aud,bg=C['accent'],width=130).pack(side=tk.LEFT,padx=(0,8))
         Btn(br,"💾 CSV",command=self._exp_aud,bg=C['ok'],fg='#1a1b26',width=110).pack(side=tk.LEFT)
-        self.aud_t=self._txtbox(cd,12)
+        self.aud_t=Table(cd,["Recht","Benutzer"],12,{0:170,1:380})
 
     def _b_csvexport(self):
         p=self._page('csvexport','CSV-Export','📋'); cd=self._card(p)
@@ -645,6 +2187,20 @@ class App:
             tk.Checkbutton(cbf,text=l,variable=v,font=('Segoe UI',10),fg=C['txt'],bg=C['panel'],selectcolor=C['input'],activebackground=C['panel']).grid(row=i//2,column=i%2,sticky=tk.W,padx=(0,20),pady=2)
         br=self._btnrow(cd); Btn(br,"📋 Exportieren",command=self._run_csv,bg=C['ok'],fg='#1a1b26',width=160).pack(side=tk.LEFT)
 
+    def _b_mbreport(self):
+        p=self._page('mbreport','Postfach-Größen','📦'); cd=self._card(p)
+        tk.Label(cd,text="Größe, Elemente, letzte Anmeldung/Aktion aller Postfächer. Wird blockweise lokal gespeichert (SQLite) — abgebrochene Läufe lassen sich fortsetzen.",
+                 font=('Segoe UI',9),fg=C['dim'],bg=C['panel'],anchor=tk.W).pack(fill=tk.X,padx=12,pady=(8,0))
+        br=self._btnrow(cd)
+        self.mbr_rb=Btn(br,"▶️ Bericht starten",command=self._run_mbr,bg=C['accent'],width=150); self.mbr_rb.pack(side=tk.LEFT,padx=(0,8))
+        Btn(br,"⏯️ Fortsetzen",command=lambda:self._run_mbr(True),bg=C['input'],width=130).pack(side=tk.LEFT,padx=(0,8))
+        Btn(br,"📂 Letzten laden",command=self._load_mbr,bg=C['input'],width=130).pack(side=tk.LEFT,padx=(0,8))
+        Btn(br,"💾 CSV",command=self._exp_mbr,bg=C['ok'],fg='#1a1b26',width=110).pack(side=tk.LEFT,padx=(0,8))
+        self.mbr_pl=tk.Label(br,text="",font=('Segoe UI',9),fg=C['dim'],bg=C['panel']); self.mbr_pl.pack(side=tk.LEFT)
+        self.mbr_t=Table(cd,["Postfach","Name","Typ","Größe (MB)","Elemente","Letzte Anmeldung","Letzte Aktion","Inaktiv (Tage)","Fehler"],18,
+                         {0:220,1:150,2:110,3:80,4:70,5:130,6:130,7:80,8:160})
+        self._mbr={}
+
     def _b_bulk(self):
         p=self._page('bulk','Bulk-Aktionen','🏷️'); cd=self._card(p)
         tk.Label(cd,text="Aktion:",font=('Segoe UI',10,'bold'),fg=C['txt'],bg=C['panel']).pack(fill=tk.X,padx=12,pady=(8,0))
@@ -661,6 +2217,21 @@ class App:
         Btn(br,"▶️ Ausführen",command=self._run_blk,bg=C['ok'],fg='#1a1b26',width=130).pack(side=tk.LEFT)
         self.blk_t=self._txtbox(cd,5)
 
+    def _b_jobs(self):
+        p=self._page('jobs','Jobs','⚙️'); cd=self._card(p)
+        tk.Label(cd,text=f"Max. {JOB_WORKERS} lange + {JOB_QUICK} kurze Jobs gleichzeitig, weitere warten. Abbrechen stoppt alle weiteren PowerShell-Aufrufe des Jobs.",
+                 font=('Segoe UI',9),fg=C['dim'],bg=C['panel']).pack(fill=tk.X,padx=12,pady=(8,0))
+        lf=tk.Frame(cd,bg=C['panel']); lf.pack(fill=tk.X,padx=12,pady=(6,0))
+        self.jobs_lb=tk.Listbox(lf,height=12,font=('Consolas',9),bg=C['input'],fg=C['txt'],relief=tk.FLAT,highlightthickness=1,
+                                highlightbackground=C['brd'],selectbackground=C['sb_active'],activestyle='none')
+        self.jobs_lb.pack(fill=tk.X)
+        br=self._btnrow(cd)
+        Btn(br,"⏹️ Abbrechen",command=self._jobs_cancel,bg=C['err'],width=130).pack(side=tk.LEFT,padx=(0,8))
+        Btn(br,"🧹 Beendete entfernen",command=lambda:[self.jobs.clear(),self._jobs_show()],bg=C['input'],width=170).pack(side=tk.LEFT,padx=(0,8))
+        Btn(br,"♻️ Cache leeren",command=lambda:[self.ps.cache.clear(),self._jobs_show()],bg=C['input'],width=140).pack(side=tk.LEFT)
+        self.jobs_cl=tk.Label(cd,text="",font=('Segoe UI',9),fg=C['dim'],bg=C['panel'],anchor=tk.W); self.jobs_cl.pack(fill=tk.X,padx=12,pady=(0,8))
+        self._jobs_ids=[]; self._jobs_show()
+
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
     #  VERBINDUNG
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -678,20 +2249,9 @@ class App:
 
         self.log("🔄 Verbinde...",C['warn']); self.conn_btn.configure(state=tk.DISABLED)
         def do():
-            ok,_,e=self.ps.run(f'Connect-ExchangeOnline -UserPrincipalName "{a}" -ShowBanner:$false',180)
-            if ok:
-                v,vo,_=self.ps.run('Get-OrganizationConfig|Select -Expand Name',30)
-                org=vo.strip().split("\n")[0] if v and vo.strip() else ""
-                # Auch Graph verbinden wenn Modul vorhanden
-                if self.mod_status.get('Microsoft.Graph', {}).get('installed'):
-                    self.root.after(0, lambda: self.log("🔄 Verbinde Microsoft Graph...", C['warn']))
-                    gok, _, ge = self.ps.run(f'Connect-MgGraph -Scopes "User.ReadWrite.All","Directory.ReadWrite.All","Organization.Read.All" -NoWelcome -EA SilentlyContinue', 120)
-                    if gok:
-                        self.root.after(0, lambda: self.log("  ✅ Graph verbunden", C['ok']))
-                    else:
-                        self.root.after(0, lambda: self.log(f"  ⚠️ Graph: {ge}", C['warn']))
-                self.root.after(0,lambda:self._connected(org))
-            else: self.root.after(0,lambda:[self.conn_btn.configure(state=tk.NORMAL),self.log(f"❌ {e}",C['err']),messagebox.showerror("Fehler",e)])
+            ok,org,e=self.connect(a)
+            if ok: self.ui(lambda:self._connected(org))
+            else: self.ui(lambda:[self.conn_btn.configure(state=tk.NORMAL),self.log(f"❌ {e}",C['err']),self._dlg(messagebox.showerror,"Fehler",e)])
         threading.Thread(target=do,daemon=True).start()
 
     def _connected(self,org):
@@ -699,80 +2259,69 @@ class App:
         self.conn_lbl.configure(text=f"🟢 {org}" if org else "🟢 Verbunden",fg=C['ok'])
         self.conn_btn.configure(text="✅",bg=C['ok'])
         self.log(f"✅ Verbunden{n}!",C['ok']); self._load()
+        if self._ob_open: self.root.after(1000,self._ob_resume)
 
     def disconnect(self):
-        self.log("🔌 Trenne...",C['warn']); self.ps.run("Disconnect-ExchangeOnline -Confirm:$false",30)
-        self.ps.run("Disconnect-MgGraph -EA SilentlyContinue", 10)
+        self.log("🔌 Trenne...",C['warn']); self.ps.run_all("Disconnect-ExchangeOnline -Confirm:$false",30)
+        self.ps.run_all("Disconnect-MgGraph -EA SilentlyContinue", 10); self.ps.reset()
         self.connected=False; self.mailboxes=[]; self.groups={'teams':[],'verteiler':[],'security':[]}
         self.conn_lbl.configure(text="⚫ Nicht verbunden",fg=C['dim'])
         self.conn_btn.configure(text="🔌 Verbinden",bg=C['accent']); self.conn_btn.configure(state=tk.NORMAL)
-        for cb in [self.mb_t,self.mb_u,self.ob_u,self.ob_fwd,self.ui_u,self.sm_perm,self.fwd_src,self.fwd_dst,self.aud_u,self.blk_grp]:
+        ws=['mb_t','mb_u','ob_u','ob_fwd','ui_u','sm_perm','fwd_src','fwd_dst','aud_u','blk_grp']+[f'{k}_{a}' for k in self.groups for a in ('gc','uc')]
+        for cb in filter(None,map(self._w,ws)):  # nur gebaute Seiten
             try: cb.configure(values=[],state="disabled"); cb.set("— Erst verbinden —")
             except: pass
-        for k in ['teams','verteiler','security']:
-            for a in ['gc','uc']:
-                try: getattr(self,f'{k}_{a}').configure(values=[],state="disabled"); getattr(self,f'{k}_{a}').set("— Erst verbinden —")
-                except: pass
         self.log("✅ Getrennt",C['ok'])
 
     def _load(self):
         self.log("📥 Lade Daten...",C['warn'])
         def do():
-            r1,o1,_=self.ps.run('Get-Mailbox -ResultSize Unlimited|Select DisplayName,PrimarySmtpAddress,RecipientTypeDetails|ConvertTo-Json -Compress',180)
-            r2,o2,_=self.ps.run('Get-UnifiedGroup -ResultSize Unlimited|Select DisplayName,PrimarySmtpAddress,GroupType|ConvertTo-Json -Compress',180)
-            r3,o3,_=self.ps.run('Get-DistributionGroup -ResultSize Unlimited|Select DisplayName,PrimarySmtpAddress,GroupType|ConvertTo-Json -Compress',180)
-            self.root.after(0,lambda:self._loaded(r1,o1,r2,o2,r3,o3))
+            rs=self.fetch(); self.ui(lambda:self._loaded(*rs))
         threading.Thread(target=do,daemon=True).start()
 
-    def _loaded(self,r1,o1,r2,o2,r3,o3):
+    def _loaded(self,r1,r2,r3):
         if r1:
-            self.mailboxes=[]
-            for mb in self._pj(o1):
-                e,n,t=mb.get('PrimarySmtpAddress',''),mb.get('DisplayName',''),mb.get('RecipientTypeDetails','')
-                if e:
-                    sh='Shared' in t
-                    self.mailboxes.append({'d':f"{'👥' if sh else '👤'} {n} <{e}>",'e':e,'n':n,'t':'shared' if sh else 'user'})
-            self.mailboxes.sort(key=lambda x:x['d']); self._amb(); self._upd_all()
+            self._amb(); self._upd_all()
             self.log(f"  📧 {len(self.mailboxes)} Postfächer",C['dim'])
         if r2:
-            self.groups['teams']=[{'d':f"👥 {g.get('DisplayName','')} <{g.get('PrimarySmtpAddress','')}>",
-                'e':g.get('PrimarySmtpAddress',''),'n':g.get('DisplayName','')} for g in self._pj(o2) if g.get('PrimarySmtpAddress')]
-            self.groups['teams'].sort(key=lambda x:x['d']); self._ugrp('teams')
+            self._ugrp('teams')
             self.log(f"  👥 {len(self.groups['teams'])} Teams",C['dim'])
         if r3:
-            self.groups['verteiler']=[]; self.groups['security']=[]
-            for g in self._pj(o3):
-                e,n,gt=g.get('PrimarySmtpAddress',''),g.get('DisplayName',''),str(g.get('GroupType',''))
-                if e:
-                    ent={'d':f"{'🔒' if 'Security' in gt else '📨'} {n} <{e}>",'e':e,'n':n}
-                    (self.groups['security'] if 'Security' in gt else self.groups['verteiler']).append(ent)
-            for k in ['verteiler','security']: self.groups[k].sort(key=lambda x:x['d']); self._ugrp(k)
+            for k in ['verteiler','security']: self._ugrp(k)
             self.log(f"  📨 {len(self.groups['verteiler'])} Verteiler, 🔒 {len(self.groups['security'])} Security",C['dim'])
         t=len(self.mailboxes)+sum(len(v) for v in self.groups.values())
         self.log(f"✅ {t} Objekte geladen!",C['ok'])
 
         # Lizenz-Warnung aktualisieren
-        if not self.mod_status.get('Microsoft.Graph', {}).get('installed'):
-            self._lic_warn.configure(text="⚠️ Microsoft.Graph-Modul fehlt — Lizenz-Abfragen nicht möglich")
-        else:
-            self._lic_warn.configure(text="")
+        if self._w('_lic_warn'): self._lic_warn.configure(text=self._lic_msg())
+
+    def _lic_msg(self):
+        if self.connected and not self.mod_status.get('Microsoft.Graph', {}).get('installed'):
+            return "⚠️ Microsoft.Graph-Modul fehlt — Lizenz-Abfragen nicht möglich"
+        return ""
 
     def _ugrp(self,k):
+        gc,uc=self._w(f'{k}_gc'),self._w(f'{k}_uc')
+        if not gc: return  # Seite noch nicht gebaut → wird beim Bauen gefüllt
         i=[g['d'] for g in self.groups[k]]
-        getattr(self,f'{k}_gc').configure(values=i,state="normal"); getattr(self,f'{k}_gc').set("")
+        gc.configure(values=i,state="normal"); gc.set("")
         ui=[m['d'] for m in self.mailboxes]
-        getattr(self,f'{k}_uc').configure(values=ui,state="normal"); getattr(self,f'{k}_uc').set("")
-    def _upd_all(self):
+        uc.configure(values=ui,state="normal"); uc.set("")
+    def _upd_all(self,only=None):
+        """Benutzer-/Gruppen-Auswahl der gebauten Seiten füllen; only: nur diese Widget-Namen (frisch gebaute Seite)"""
         i=[m['d'] for m in self.mailboxes]
-        for cb in [self.ob_u,self.ob_fwd,self.ui_u,self.sm_perm,self.fwd_src,self.fwd_dst,self.aud_u]:
+        for n in ['ob_u','ob_fwd','ui_u','sm_perm','fwd_src','fwd_dst','aud_u']:
+            cb=self._w(n)
+            if not cb or (only is not None and n not in only): continue
             try: cb.configure(values=i,state="normal"); cb.set("")
             except: pass
         ag=[]
         for k in ['teams','verteiler','security']: ag+=[g['d'] for g in self.groups[k]]
-        self.blk_grp.configure(values=ag,state="normal"); self.blk_grp.set("")
+        if self._w('blk_grp') and (only is None or 'blk_grp' in only): self.blk_grp.configure(values=ag,state="normal"); self.blk_grp.set("")
 
     # ── Filter ───────────────────────────────────────────
     def _amb(self):
+        if not self._w('mb_t'): return
         ft=self.mb_ft.get(); fl=self.mailboxes if ft=="all" else [m for m in self.mailboxes if m['t']==ft]
         i=[m['d'] for m in fl]; self.mb_t.configure(values=i,state="normal"); self.mb_u.configure(values=i,state="normal")
     def _fmb(self,e=None):
@@ -805,35 +2354,22 @@ class App:
         if not mb or mb.startswith("—") or not us or us.startswith("—"): messagebox.showwarning("Fehlt","Auswählen!"); return
         mbe,use=self._ge(mb),self._ge(us)
         if not messagebox.askyesno("Bestätigen",f"Hinzufügen?\n📬 {mbe}\n👤 {use}"): return
+        fa,sa,am=self.fa_v.get(),self.sa_v.get(),self.am_v.get()
         def do():
-            errs=[]
-            if self.fa_v.get():
-                am="$true" if self.am_v.get() else "$false"
-                ok,_,e=self.ps.run(f'Add-MailboxPermission -Identity "{mbe}" -User "{use}" -AccessRights FullAccess -AutoMapping {am}')
-                self.root.after(0,lambda:self.log(f"  {'✅ Vollzugriff' if ok else '❌ '+e}",C['ok'] if ok else C['err']))
-                if not ok: errs.append(e)
-            if self.sa_v.get():
-                ok,_,e=self.ps.run(f'Add-RecipientPermission -Identity "{mbe}" -Trustee "{use}" -AccessRights SendAs -Confirm:$false')
-                self.root.after(0,lambda:self.log(f"  {'✅ Senden als' if ok else '❌ '+e}",C['ok'] if ok else C['err']))
-                if not ok: errs.append(e)
-            self.root.after(0,lambda:self._done(errs,"hinzugefügt"))
-        threading.Thread(target=do,daemon=True).start()
+            errs=self.mb_perm(mbe,use,fa,sa,am)
+            self.ui(lambda:self._done(errs,"hinzugefügt"))
+        self._job(f"Berechtigung + {mbe}",do,True)
 
     def _rem_mb(self):
         mb,us=self.mb_t.get().strip(),self.mb_u.get().strip()
         if not mb or mb.startswith("—") or not us or us.startswith("—"): messagebox.showwarning("Fehlt","Auswählen!"); return
         mbe,use=self._ge(mb),self._ge(us)
         if not messagebox.askyesno("⚠️",f"Entfernen?\n📬 {mbe}\n👤 {use}",icon="warning"): return
+        fa,sa=self.fa_v.get(),self.sa_v.get()
         def do():
-            errs=[]
-            if self.fa_v.get():
-                ok,_,e=self.ps.run(f'Remove-MailboxPermission -Identity "{mbe}" -User "{use}" -AccessRights FullAccess -Confirm:$false')
-                if not ok: errs.append(e)
-            if self.sa_v.get():
-                ok,_,e=self.ps.run(f'Remove-RecipientPermission -Identity "{mbe}" -Trustee "{use}" -AccessRights SendAs -Confirm:$false')
-                if not ok: errs.append(e)
-            self.root.after(0,lambda:self._done(errs,"entfernt"))
-        threading.Thread(target=do,daemon=True).start()
+            errs=self.mb_perm(mbe,use,fa,sa,add=False)
+            self.ui(lambda:self._done(errs,"entfernt"))
+        self._job(f"Berechtigung − {mbe}",do,True)
 
     def _agrp(self,k):
         g,u=getattr(self,f'{k}_gc').get().strip(),getattr(self,f'{k}_uc').get().strip()
@@ -841,10 +2377,8 @@ class App:
         ge,ue=self._ge(g),self._ge(u); rv=getattr(self,f'{k}_rv').get()
         if not messagebox.askyesno("OK",f"Hinzufügen?\n📋 {ge}\n👤 {ue}"): return
         def do():
-            if k=='teams': cmd=f'Add-UnifiedGroupLinks -Identity "{ge}" -LinkType {"Owners" if rv=="Owner" else "Members"} -Links "{ue}"'
-            else: cmd=f'Add-DistributionGroupMember -Identity "{ge}" -Member "{ue}"'
-            ok,_,e=self.ps.run(cmd); self.root.after(0,lambda:self._done([] if ok else [e],"hinzugefügt"))
-        threading.Thread(target=do,daemon=True).start()
+            ok,e=self.grp_member(ge,ue,k=='teams',owner=rv=="Owner"); self.ui(lambda:self._done([] if ok else [e],"hinzugefügt"))
+        self._job(f"Mitglied + {ge}",do,True)
 
     def _rgrp(self,k):
         g,u=getattr(self,f'{k}_gc').get().strip(),getattr(self,f'{k}_uc').get().strip()
@@ -852,12 +2386,8 @@ class App:
         ge,ue=self._ge(g),self._ge(u)
         if not messagebox.askyesno("⚠️",f"Entfernen?\n📋 {ge}\n👤 {ue}",icon="warning"): return
         def do():
-            if k=='teams':
-                ok,_,e=self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{ge}" -LinkType Members -Links "{ue}" -Confirm:$false')
-                self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{ge}" -LinkType Owners -Links "{ue}" -Confirm:$false')
-            else: ok,_,e=self.ps.run(f'Remove-DistributionGroupMember -Identity "{ge}" -Member "{ue}" -Confirm:$false')
-            self.root.after(0,lambda:self._done([] if ok else [e],"entfernt"))
-        threading.Thread(target=do,daemon=True).start()
+            ok,e=self.grp_member(ge,ue,k=='teams',add=False); self.ui(lambda:self._done([] if ok else [e],"entfernt"))
+        self._job(f"Mitglied − {ge}",do,True)
 
     def _smem(self,k):
         g=getattr(self,f'{k}_gc').get().strip()
@@ -868,17 +2398,16 @@ class App:
                 _,om,_=self.ps.run(f'Get-UnifiedGroupLinks -Identity "{ge}" -LinkType Members|Select Name,PrimarySmtpAddress|ConvertTo-Json -Compress',60)
                 _,oo,_=self.ps.run(f'Get-UnifiedGroupLinks -Identity "{ge}" -LinkType Owners|Select Name,PrimarySmtpAddress|ConvertTo-Json -Compress',60)
                 ms,ow=self._pj(om),self._pj(oo)
-                ln=[f"=== {ge} ===",""]
-                if ow: ln+=[f"👑 Besitzer ({len(ow)}):"] + [f"  • {o.get('Name','')} <{o.get('PrimarySmtpAddress','')}>" for o in ow]+[""]
-                ln+=[f"👤 Mitglieder ({len(ms)}):"] + [f"  • {m.get('Name','')} <{m.get('PrimarySmtpAddress','')}>" for m in ms]
             else:
                 _,o,_=self.ps.run(f'Get-DistributionGroupMember -Identity "{ge}" -ResultSize Unlimited|Select Name,PrimarySmtpAddress|ConvertTo-Json -Compress',60)
-                ms=self._pj(o); ln=[f"=== {ge} ===","",f"👤 Mitglieder ({len(ms)}):"] + [f"  • {m.get('Name','')} <{m.get('PrimarySmtpAddress','')}>" for m in ms]
-            self.root.after(0,lambda:self._settxt(getattr(self,f'{k}_mt'),"\n".join(ln)))
-        threading.Thread(target=do,daemon=True).start()
+                ms,ow=self._pj(o),[]
+            rs=[("👑 Besitzer",o.get('Name',''),o.get('PrimarySmtpAddress','')) for o in ow]+[("👤 Mitglied",m.get('Name',''),m.get('PrimarySmtpAddress','')) for m in ms]
+            self.log(f"  ✅ {ge}: {len(ms)} Mitglieder"+(f", {len(ow)} Besitzer" if ow else ""),C['ok'])
+            self.ui(lambda:getattr(self,f'{k}_mt').set(rs,"Keine Mitglieder."))
+        self._job(f"Mitglieder {ge}",do,True)
 
     # ── Offboarding ──────────────────────────────────────
-    def _run_ob(self):
+    def _run_ob(self,plan=None):
         us=self.ob_u.get().strip()
         if not us or us.startswith("—"): messagebox.showwarning("Fehlt","Benutzer!"); return
         active={k:v.get() for k,v in self.ob_v.items()}
@@ -894,117 +2423,94 @@ class App:
             graph_warn = "\n\n⚠️ Microsoft.Graph fehlt! PW-Reset, Anmelde-Block und Lizenzen werden über Graph gesteuert und könnten fehlschlagen."
 
         msg=f"⚠️ OFFBOARDING:\n👤 {un}\n📧 {ue}\n\n"+"\n".join(f"  • {n}" for n in names)+f"\n\n⚠️ Irreversibel!{graph_warn}"
-        if not messagebox.askyesno("⚠️",msg,icon="warning"): return
+        if plan is None and not messagebox.askyesno("⚠️",msg,icon="warning"): return
         if not messagebox.askyesno("🔴","WIRKLICH?",icon="warning"): return
         self.ob_rb.configure(state=tk.DISABLED);self.ob_eb.configure(state=tk.DISABLED)
         self._settxt(self.ob_rt,"")
-        self.ob_report=["="*55,"OFFBOARDING-BERICHT",f"Datum: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}",
-                         f"Benutzer: {un}",f"E-Mail: {ue}",f"Admin: {self.admin_e.get().strip()}","="*55,""]
+        todo=[k for k,v in active.items() if v]; opts=self._ob_opts(); admin=self.admin_e.get().strip()
+        def prog(i,total,sn):
+            self.log(f"  🔄 {sn}...",C['warn'])
+        def step_done(sn,ok,i,total):
+            st="✅" if ok else "❌"; pct=int(i/total*100); job_progress(pct,sn)
+            self.log(f"  {st} {sn}",C['ok'] if ok else C['err'])
+            self.ui(lambda:[self.ob_pb.configure(value=pct),self.ob_pl.configure(text=f"⏳ {i}/{total} Schritte ({pct}%)")],key='ob_prog')
         def do():
-            todo=[(k,v) for k,v in active.items() if v]; total=len(todo); res={}
-            for i,(sk,_) in enumerate(todo):
-                pct=int(i/total*100); sn=OB_N[sk]
-                self.root.after(0,lambda p=pct,s=sn:[self.ob_pb.configure(value=p),self.ob_pl.configure(text=f"⏳ {s}... ({p}%)")])
-                self.root.after(0,lambda s=sn:self.log(f"  🔄 {s}...",C['warn']))
-                ok,det=self._ob_step(sk,ue); res[sk]=(ok,det)
-                st="✅" if ok else "❌"; self.ob_report+=[f"[{st}] {sn}",f"    {det}",""]
-                self.root.after(0,lambda s=sn,st2=st,c2=(C['ok'] if ok else C['err']):self.log(f"  {st2} {s}",c2))
-            sc=sum(1 for ok,_ in res.values() if ok); fc=sum(1 for ok,_ in res.values() if not ok)
-            self.ob_report+=["="*55,f"ERGEBNIS: {sc} OK, {fc} FEHLER","="*55]
-            self.root.after(0,lambda:[self.ob_pb.configure(value=100),self.ob_pl.configure(text="✅ Fertig"),
+            res,met=self._ob_exec(ue,un,todo,opts,admin,plan,prog=prog,step_done=step_done)
+            sc=sum(1 for ok,_ in res.values() if ok); fc=len(res)-sc
+            self.ob_report=self._ob_rep("OFFBOARDING-BERICHT",ue,un,admin,todo,res,met=met)
+            self.ui(lambda:[self.ob_pb.configure(value=100),self.ob_pl.configure(text="✅ Fertig"),
                 self.ob_rb.configure(state=tk.NORMAL),self.ob_eb.configure(state=tk.NORMAL),
                 self._settxt(self.ob_rt,"\n".join(self.ob_report)),
                 self.log(f"🚪 {ue}: {sc}✅/{fc}❌",C['ok'] if fc==0 else C['warn'])])
-        threading.Thread(target=do,daemon=True).start()
-
-    def _ob_step(self,step,ue):
-        try:
-            if step=='sign_in':
-                # Graph-basiert: Account deaktivieren
-                if self.mod_status.get('Microsoft.Graph', {}).get('installed'):
-                    ok,o,e=self.ps.run(
-                        f'Update-MgUser -UserId "{ue}" -AccountEnabled:$false -EA Stop; Write-Output "BLOCK_OK"', 60)
-                    if "BLOCK_OK" in o:
-                        # Bestehende Sessions widerrufen
-                        self.ps.run(f'Revoke-MgUserSignInSession -UserId "{ue}" -EA SilentlyContinue', 30)
-                        return True, "Blockiert + Sessions widerrufen"
-                    return False, f"Fehler: {e}"
-                else:
-                    # Fallback EXO
-                    ok,_,e=self.ps.run(f'Set-User -Identity "{ue}" -AccountDisabled $true',60)
-                    return ok,"Blockiert (EXO)" if ok else f"Fehler: {e}"
-
-            elif step=='reset_pw':
-                # NEU: Passwort-Reset über Microsoft Graph statt Set-Mailbox
-                if self.mod_status.get('Microsoft.Graph', {}).get('installed'):
-                    ok,o,e=self.ps.run(
-                        f'$chars="abcdefghijkmnpqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789!@#$%&*";'
-                        f'$pw=-join(1..24|ForEach-Object{{$chars[(Get-Random -Max $chars.Length)]}});'
-                        f'$params=@{{PasswordProfile=@{{Password=$pw;ForceChangePasswordNextSignIn=$true}}}};'
-                        f'Update-MgUser -UserId "{ue}" @params -EA Stop;'
-                        f'Write-Output "PWOK"', 60)
-                    if "PWOK" in o:
-                        return True, "PW zurückgesetzt (Graph, Änderung beim nächsten Login erzwungen)"
-                    return False, f"Graph-Fehler: {e}"
-                else:
-                    return False, "Microsoft.Graph-Modul fehlt — PW-Reset nicht möglich. Bitte manuell im Admin Center."
-
-            elif step=='remove_groups':
-                rm,fl=0,0
-                ok,o,_=self.ps.run(f'Get-UnifiedGroup -ResultSize Unlimited|Where-Object{{(Get-UnifiedGroupLinks -Identity $_.Identity -LinkType Members -EA SilentlyContinue|Where-Object{{$_.PrimarySmtpAddress -eq "{ue}"}})-or(Get-UnifiedGroupLinks -Identity $_.Identity -LinkType Owners -EA SilentlyContinue|Where-Object{{$_.PrimarySmtpAddress -eq "{ue}"}})}}|Select -Expand PrimarySmtpAddress',180)
-                if ok and o.strip():
-                    for g in o.strip().split("\n"):
-                        g=g.strip()
-                        if not g: continue
-                        r,_,_=self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{g}" -LinkType Members -Links "{ue}" -Confirm:$false -EA SilentlyContinue')
-                        self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{g}" -LinkType Owners -Links "{ue}" -Confirm:$false -EA SilentlyContinue')
-                        if r: rm+=1
-                        else: fl+=1
-                ok,o,_=self.ps.run(f'Get-DistributionGroup -ResultSize Unlimited|Where-Object{{(Get-DistributionGroupMember -Identity $_.Identity -ResultSize Unlimited -EA SilentlyContinue|Where-Object{{$_.PrimarySmtpAddress -eq "{ue}"}})}}|Select -Expand PrimarySmtpAddress',180)
-                if ok and o.strip():
-                    for g in o.strip().split("\n"):
-                        g=g.strip()
-                        if not g: continue
-                        r,_,_=self.ps.run(f'Remove-DistributionGroupMember -Identity "{g}" -Member "{ue}" -Confirm:$false -EA SilentlyContinue')
-                        if r: rm+=1
-                        else: fl+=1
-                return fl==0,f"{rm} Gruppen entfernt"+("" if fl==0 else f", {fl} Fehler")
-
-            elif step=='remove_licenses':
-                if not self.mod_status.get('Microsoft.Graph', {}).get('installed'):
-                    return False, "Microsoft.Graph-Modul fehlt — Lizenzen manuell entziehen"
-                ok,o,e=self.ps.run(f'$s=(Get-MgUserLicenseDetail -UserId "{ue}" -EA SilentlyContinue).SkuId;if($s){{foreach($k in $s){{Set-MgUserLicense -UserId "{ue}" -RemoveLicenses @($k) -AddLicenses @() -EA Stop}};Write-Output "LR:$($s.Count)"}}else{{Write-Output "NG"}}',90)
-                if "LR:" in o: return True,f"{o.split('LR:')[1].strip().split(chr(10))[0]} Lizenz(en) entfernt"
-                if "NG" in o: return True, "Keine Lizenzen zugewiesen"
-                return False,f"Fehler: {e}"
+        self._job(f"Offboarding {ue}",do)
 
-            elif step=='convert_shared':
-                ok,_,e=self.ps.run(f'Set-Mailbox -Identity "{ue}" -Type Shared',60)
-                return ok,"→ Shared" if ok else f"Fehler: {e}"
-            elif step=='set_ooo':
-                msg=self.ob_ooo.get('1.0',tk.END).strip()
-                if not msg: return True,"Übersprungen"
-                esc=msg.replace("'","''").replace('"','`"')
-                ok,_,e=self.ps.run(f'Set-MailboxAutoReplyConfiguration -Identity "{ue}" -AutoReplyState Enabled -InternalMessage "{esc}" -ExternalMessage "{esc}" -ExternalAudience All',60)
-                return ok,"OOO an" if ok else f"Fehler: {e}"
-            elif step=='fwd':
-                fw=self.ob_fwd.get().strip()
-                if not fw or fw.startswith("—"): return True,"Übersprungen"
-                fe=self._ge(fw) if '<' in fw else fw
-                ok,_,e=self.ps.run(f'Set-Mailbox -Identity "{ue}" -ForwardingSmtpAddress "smtp:{fe}" -DeliverToMailboxAndForward $true',60)
-                return ok,f"→ {fe}" if ok else f"Fehler: {e}"
-            elif step=='hide_gal':
-                ok,_,e=self.ps.run(f'Set-Mailbox -Identity "{ue}" -HiddenFromAddressListsEnabled $true',60)
-                return ok,"GAL versteckt" if ok else f"Fehler: {e}"
-            elif step=='disable_sync':
-                ok,_,e=self.ps.run(f'Set-CASMailbox -Identity "{ue}" -ActiveSyncEnabled $false -OWAEnabled $false -PopEnabled $false -ImapEnabled $false -MAPIEnabled $false -EwsEnabled $false',60)
-                return ok,"Protokolle aus" if ok else f"Fehler: {e}"
-            elif step=='remove_delegates':
-                ok,o,e=self.ps.run(f'$p=Get-MailboxPermission -Identity "{ue}"|Where-Object{{$_.User -ne "NT AUTHORITY\\SELF" -and $_.IsInherited -eq $false}};$c=0;foreach($x in $p){{Remove-MailboxPermission -Identity "{ue}" -User $x.User -AccessRights $x.AccessRights -Confirm:$false -EA SilentlyContinue;$c++}};Write-Output "DD:$c"',90)
-                if "DD:" in o: return True,f"{o.split('DD:')[1].strip().split(chr(10))[0]} entfernt"
-                return False,f"Fehler: {e}"
-            return False,"?"
-        except Exception as ex: return False,str(ex)
+    # ── Plan-Modus ───────────────────────────────────────
+    def _plan_ob(self):
+        us=self.ob_u.get().strip()
+        if not us or us.startswith("—"): messagebox.showwarning("Fehlt","Benutzer!"); return
+        todo=[k for k,v in self.ob_v.items() if v.get()]
+        if not todo: messagebox.showwarning("Fehlt","Mindestens 1 Schritt!"); return
+        ue=self._ge(us); opts=self._ob_opts(); self.log(f"  🧭 Lese Ist-Zustand {ue}...",C['warn'])
+        self.ob_pb2.configure(state=tk.DISABLED)
+        def do():
+            t0=time.time(); st=self._ob_state(ue); dt=time.time()-t0
+            self.ui(lambda:self._plan_show(ue,todo,opts,st,dt))
+        self._job(f"Plan {ue}",do,True)
+
+    def _plan_show(self,ue,todo,opts,st,dt):
+        self.ob_pb2.configure(state=tk.NORMAL)
+        if not st:
+            self.log(f"  ❌ Ist-Zustand für {ue} nicht lesbar",C['err']); messagebox.showerror("Fehler","Ist-Zustand nicht lesbar — siehe Protokoll."); return
+        ln,noop,run,need=self._plan_lines(ue,todo,opts,st,dt)
+        self._settxt(self.ob_rt,"\n".join(ln)); self.log(f"  🧭 {len(noop)} Schritt(e) ohne Änderung",C['dim'])
+        if not run: messagebox.showinfo("Plan","Keine Änderungen nötig."); return
+        if messagebox.askyesno("⚠️ Plan ausführen",f"⚠️ OFFBOARDING {ue}\n\nNur die {len(run)} Schritte mit Änderung ausführen (~{need} Aufrufe)?\n\n⚠️ Irreversibel!",icon="warning"):
+            self._run_ob(plan=st)
+
+    def _ob_resume(self):
+        """Unterbrochene Läufe aus dem Journal ab dem ersten unvollständigen Schritt fortsetzen"""
+        js=self._ob_open
+        ls="\n".join(f"  • {j.d['user']} ({len(j.done())}/{len(j.d['steps'])} Schritte, {j.d['created']})" for j in js)
+        a=messagebox.askyesnocancel("Offboarding fortsetzen",
+            f"Unterbrochene Offboarding-Läufe:\n\n{ls}\n\nJa = fortsetzen\nNein = verwerfen\nAbbrechen = später",icon="warning")
+        if a is None: return  # später: bleibt für das nächste Verbinden offen
+        self._ob_open=[]
+        if not a:
+            for j in js: j.close('aborted')
+            self.log(f"🗑️ {len(js)} Lauf/Läufe verworfen",C['dim']); return
+        self.ob_rb.configure(state=tk.DISABLED); self._settxt(self.ob_rt,"")
+        def do():
+            rep=[]
+            for j in js:
+                if not j.claim():
+                    self.ui(lambda u=j.d['user']:self.log(f"  ⏭️ {u}: wird bereits von einem anderen Prozess fortgesetzt",C['dim'])); continue
+                d=j.d; self.ui(lambda u=d['user']:self.log(f"  ⏯️ Setze fort: {u}",C['warn']))
+                met={}; res=self._ob_user(d['user'],d['steps'],d['opts'],jr=j,met=met); ObStats.add(res,met)
+                cx=job_now(); cn=bool(cx and cx['cancel'].is_set()); j.close('cancelled' if cn else 'done')
+                rep+=self._ob_rep("OFFBOARDING-BERICHT (fortgesetzt)",d['user'],d['name'],d['admin'],d['steps'],res,
+                                  [f"Gestartet: {d['created']}"],met)+[""]
+                if cn: break  # übrige Läufe bleiben offen
+            self.ob_report=rep
+            self.ui(lambda:[self.ob_rb.configure(state=tk.NORMAL),self.ob_eb.configure(state=tk.NORMAL),
+                self._settxt(self.ob_rt,"\n".join(rep)),self.log(f"⏯️ {len(js)} Lauf/Läufe fortgesetzt",C['ok'])])
+        self._job("Offboarding fortsetzen",do)
+
+    def _ob_opts(self):
+        """Widget-Werte für die Offboarding-Schritte einsammeln (nur im UI-Thread aufrufen)"""
+        fw=self.ob_fwd.get().strip()
+        return {'ooo':self.ob_ooo.get('1.0',tk.END).strip(),
+                'fwd':'' if not fw or fw.startswith("—") else (self._ge(fw) if '<' in fw else fw)}
+
+    def _ob_stats(self):
+        """Aggregierte Schritt-Kennzahlen aller bisherigen Läufe, sortiert nach Gesamtzeit"""
+        d=ObStats.load()
+        if not d: self._settxt(self.ob_rt,"Noch keine Statistik — erst nach dem ersten Offboarding."); return
+        ln=[f"{'Schritt':<24} {'Läufe':>6} {'Fehler':>6} {'Ø s':>7} {'Σ s':>8} {'Ø Aufr.':>8} {'Ø KB':>7} {'Ø Wdh.':>7}","─"*80]
+        for k,a in sorted(d.items(),key=lambda x:-x[1]['secs']):
+            n=max(1,a['runs'])
+            ln.append(f"{OB_N.get(k,'Ist-Zustand (Plan)')[:24]:<24} {a['runs']:>6} {a['fails']:>6} {a['secs']/n:>7.1f} {a['secs']:>8.0f} "
+                      f"{a['calls']/n:>8.1f} {a['bytes']/n/1024:>7.1f} {a['retries']/n:>7.2f}")
+        self._settxt(self.ob_rt,"\n".join(ln))
 
     def _exp_ob(self):
         if not self.ob_report: return
@@ -1015,6 +2521,99 @@ class App:
             with open(fp,'w',encoding='utf-8') as f: f.write("\n".join(self.ob_report))
             self.log(f"💾 {fp}",C['ok'])
 
+    # ── Batch-Offboarding ────────────────────────────────
+    def _obb_csv(self):
+        fp=filedialog.askopenfilename(filetypes=[("CSV","*.csv"),("Text","*.txt")])
+        if not fp: return
+        with open(fp,'r',encoding='utf-8-sig') as f: rows=self._obb_parse(f.read())
+        self.obb_users.delete('1.0',tk.END); self.obb_users.insert('1.0',"\n".join(f"{u};{fw}" if fw else u for u,fw in rows))
+        self.log(f"  📂 {len(rows)} Benutzer geladen",C['ok'])
+
+    def _run_obb(self):
+        rows=self._obb_parse(self.obb_users.get('1.0',tk.END))
+        if not rows: messagebox.showwarning("Fehlt","Benutzer!"); return
+        todo=[k for k,v in self.ob_v.items() if v.get()]
+        if not todo: messagebox.showwarning("Fehlt","Mindestens 1 Schritt!"); return
+        msg=(f"⚠️ BATCH-OFFBOARDING:\n👥 {len(rows)} Benutzer\n\n"+"\n".join(f"  • {OB_N[k]}" for k in todo)+
+             "\n\n⚠️ Irreversibel!")
+        if not messagebox.askyesno("⚠️",msg,icon="warning"): return
+        if not messagebox.askyesno("🔴",f"WIRKLICH {len(rows)} Benutzer?",icon="warning"): return
+        base=self._ob_opts(); admin=self.admin_e.get().strip(); planned=self.obb_plan.get()
+        self.obb_rb.configure(state=tk.DISABLED); self.obb_eb.configure(state=tk.DISABLED); self._settxt(self.obb_rt,"")
+        self.log(f"📦 Batch-Offboarding: {len(rows)} Benutzer",C['warn'])
+        def do():
+            t0=time.time(); done=[0]; lk=threading.Lock(); h0=self.ps.thr.hits
+            def one(row):
+                ue,fw=row
+                res,met=self._ob_exec(ue,ue,todo,dict(base,fwd=fw or base['fwd']),admin,planned=planned)
+                fc=sum(1 for ok,_ in res.values() if not ok)
+                with lk: done[0]+=1; n=done[0]
+                job_progress(n*100/len(rows),ue)
+                self.log(f"  🚪 {ue}: {len(res)-fc}✅/{fc}❌",C['ok'] if fc==0 else C['warn'])
+                self.ui(lambda:self.obb_pl.configure(text=f"⏳ {n}/{len(rows)} Benutzer"),key='obb_prog')
+                return ue,res,met
+            with ThreadPoolExecutor(max_workers=max(1,self.ps.size-1)) as ex: out=list(ex.map(job_carry(one),rows))  # 1 Session bleibt für kurze Jobs
+            dur=time.time()-t0; uok=sum(1 for _,r,_ in out if all(ok for ok,_ in r.values()))
+            sc=sum(1 for _,r,_ in out for ok,_ in r.values() if ok); fc=sum(len(r) for _,r,_ in out)-sc
+            calls=sum(m['calls']/m.get('shared',1) for _,_,mt in out for m in mt.values())
+            rep=["="*55,"BATCH-OFFBOARDING-BERICHT",f"Datum: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}",
+                 f"Benutzer: {len(rows)}",f"Admin: {admin}","="*55,""]
+            for ue,res,met in out: rep+=["-"*55,f"👤 {ue}","-"*55]+self._ob_lines(todo,res,met)
+            rep+=["="*55,f"ERGEBNIS: {uok}/{len(out)} Benutzer vollständig, {sc} Schritte OK, {fc} FEHLER",
+                  f"Remote-Aufrufe: {calls:.0f} ({calls/max(1,len(out)):.1f}/Benutzer)",
+                  f"Laufzeit: {int(dur//60)}:{int(dur%60):02d} min ({dur/max(1,len(out)):.1f}s/Benutzer)"+
+                  (f", {self.ps.thr.hits-h0}× gedrosselt" if self.ps.thr.hits>h0 else ""),"="*55]
+            self.obb_report=rep
+            self.ui(lambda:[self.obb_pl.configure(text=f"✅ Fertig in {dur:.0f}s"),
+                self.obb_rb.configure(state=tk.NORMAL),self.obb_eb.configure(state=tk.NORMAL),
+                self._settxt(self.obb_rt,"\n".join(rep)),
+                self.log(f"📦 Batch: {uok}/{len(out)} vollständig in {dur:.0f}s",C['ok'] if fc==0 else C['warn'])])
+        self._job(f"Batch-Offboarding ({len(rows)})",do)
+
+    def _exp_obb(self):
+        if not self.obb_report: return
+        fp=filedialog.asksaveasfilename(defaultextension=".txt",initialfile=f"Offboarding_Batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",filetypes=[("Text","*.txt")])
+        if fp:
+            with open(fp,'w',encoding='utf-8') as f: f.write("\n".join(self.obb_report))
+            self.log(f"💾 {fp}",C['ok'])
+
+    # ── Geplantes Offboarding ────────────────────────────
+    def _obs_show(self):
+        if not self._w('obs_lb'): return
+        self.obs_lb.delete(0,tk.END)
+        ic={'pending':'⏳','running':'🔄','done':'✅','failed':'❌','interrupted':'⚠️'}
+        for j in sorted(self.sched.jobs,key=lambda j:j['at']):
+            at=datetime.fromisoformat(j['at']).strftime('%d.%m.%Y %H:%M')
+            self.obs_lb.insert(tk.END,f"{ic.get(j['status'],'?')} {at}  {j['user']}  ({len(j['steps'])} Schritte)")
+
+    def _obs_add(self):
+        us=self.ob_u.get().strip()
+        if not us or us.startswith("—"): messagebox.showwarning("Fehlt","Benutzer!"); return
+        todo=[k for k,v in self.ob_v.items() if v.get()]
+        if not todo: messagebox.showwarning("Fehlt","Mindestens 1 Schritt!"); return
+        try: at=datetime.strptime(self.obs_at.get().strip(),'%d.%m.%Y %H:%M')
+        except ValueError: messagebox.showwarning("Format","Zeitpunkt als TT.MM.JJJJ HH:MM"); return
+        ue=self._ge(us); un=us.split('<')[0].strip().lstrip('👤👥 ')
+        if not messagebox.askyesno("📅 Einplanen",f"⚠️ OFFBOARDING am {at.strftime('%d.%m.%Y %H:%M')}:\n👤 {un}\n📧 {ue}\n\n"+
+                                   "\n".join(f"  • {OB_N[k]}" for k in todo)+"\n\n⚠️ Läuft automatisch, sofern das Tool verbunden ist!",icon="warning"): return
+        self.sched.add(ue,un,todo,self._ob_opts(),at); self._obs_show()
+        self.log(f"📅 Offboarding {ue} geplant: {at.strftime('%d.%m.%Y %H:%M')}",C['ok'])
+
+    def _obs_rem(self):
+        sel=self.obs_lb.curselection()
+        if not sel: return
+        j=sorted(self.sched.jobs,key=lambda j:j['at'])[sel[0]]
+        if j['status']=='running': messagebox.showwarning("Läuft","Job läuft gerade."); return
+        if messagebox.askyesno("Entfernen",f"Geplantes Offboarding {j['user']} entfernen?"):
+            self.sched.remove(j['id']); self._obs_show()
+
+    def _obs_loop(self):
+        """Hintergrund-Worker: fällige Jobs ausführen, sobald verbunden"""
+        while True:
+            time.sleep(30)
+            if not self.connected: continue
+            self._ob_due(lambda:self.ui(self._obs_show,key='obs'))
+
     # ── Benutzer-Info ────────────────────────────────────
     def _load_ui(self):
         us=self.ui_u.get().strip()
@@ -1022,14 +2621,14 @@ class App:
         ue=self._ge(us); self.log(f"  🔍 Info {ue}...",C['warn'])
         def do():
             ln=[f"{'='*50}",f"  {ue}",f"{'='*50}",""]
-            ok,o,_=self.ps.run(f'Get-Mailbox -Identity "{ue}"|Select DisplayName,PrimarySmtpAddress,RecipientTypeDetails,ForwardingSmtpAddress,HiddenFromAddressListsEnabled,WhenCreated|ConvertTo-Json',60)
+            ok,o,_=self.dal.q('mailbox',ue,60)
             if ok:
                 d=self._pj(o); mb=d[0] if d else {}
                 ln+=[f"📧 Name: {mb.get('DisplayName','')}",f"📧 Typ: {mb.get('RecipientTypeDetails','')}",
                      f"📨 Weiterleitung: {mb.get('ForwardingSmtpAddress','Keine')}",
                      f"👻 GAL: {'Versteckt' if mb.get('HiddenFromAddressListsEnabled') else 'Sichtbar'}",
                      f"📅 Erstellt: {mb.get('WhenCreated','')}",""]
-            ok,o,_=self.ps.run(f'Get-MailboxStatistics -Identity "{ue}" -EA SilentlyContinue|Select TotalItemSize,ItemCount|ConvertTo-Json',30)
+            ok,o,_=self.dal.q('mailbox_stats',ue,30)
             if ok:
                 d=self._pj(o); st=d[0] if d else {}
                 ln+=[f"📦 Größe: {st.get('TotalItemSize','')}",f"📬 Elemente: {st.get('ItemCount','')}",""]
@@ -1041,20 +2640,20 @@ class App:
                     lics=[l.split("LIC:")[1] for l in o.strip().split("\n") if "LIC:" in l]
                     ln+=[f"📊 Lizenzen ({len(lics)}):"] + [f"  • {l}" for l in lics] + [""]
 
-            ok,o,_=self.ps.run(f'Get-UnifiedGroup -ResultSize Unlimited|Where-Object{{(Get-UnifiedGroupLinks -Identity $_.Identity -LinkType Members -EA SilentlyContinue|Where-Object{{$_.PrimarySmtpAddress -eq "{ue}"}})}}|Select -Expand DisplayName',120)
+            ok,o,_=self.dal.q('member_of_unified',ue,120)
             if ok and o.strip():
                 gs=[g.strip() for g in o.strip().split("\n") if g.strip()]
                 ln+=[f"👥 Teams ({len(gs)}):"] + [f"  • {g}" for g in gs]+[""]
-            ok,o,_=self.ps.run(f'Get-DistributionGroup -ResultSize Unlimited|Where-Object{{(Get-DistributionGroupMember -Identity $_.Identity -ResultSize Unlimited -EA SilentlyContinue|Where-Object{{$_.PrimarySmtpAddress -eq "{ue}"}})}}|Select -Expand DisplayName',120)
+            ok,o,_=self.dal.q('member_of_dl',ue,120)
             if ok and o.strip():
                 gs=[g.strip() for g in o.strip().split("\n") if g.strip()]
                 ln+=[f"📨 Verteiler/Security ({len(gs)}):"] + [f"  • {g}" for g in gs]+[""]
-            ok,o,_=self.ps.run(f'Get-Mailbox -ResultSize Unlimited|Get-MailboxPermission|Where-Object{{$_.User -like "*{ue}*" -and $_.AccessRights -like "*FullAccess*"}}|Select -Expand Identity',60)
+            ok,o,_=self.dal.q('access_to',ue,300)
             if ok and o.strip():
                 ps2=[p.strip() for p in o.strip().split("\n") if p.strip()]
                 ln+=[f"🔑 Vollzugriff auf ({len(ps2)}):"] + [f"  • {p}" for p in ps2]
-            self.root.after(0,lambda:[self._settxt(self.ui_t,"\n".join(ln)),self.log("  ✅ Info geladen",C['ok'])])
-        threading.Thread(target=do,daemon=True).start()
+            self.ui(lambda:[self._settxt(self.ui_t,"\n".join(ln)),self.log("  ✅ Info geladen",C['ok'])])
+        self._job(f"Benutzer-Info {ue}",do,True)
 
     # ── Lizenzen ─────────────────────────────────────────
     def _load_lic(self):
@@ -1068,20 +2667,18 @@ class App:
         def do():
             ok,o,e=self.ps.run('Get-MgSubscribedSku -EA SilentlyContinue|Select SkuPartNumber,ConsumedUnits,@{N="Total";E={$_.PrepaidUnits.Enabled}}|ConvertTo-Json',60)
             if ok and o.strip():
-                self._lic_data=self._pj(o)
-                ln=[f"{'Lizenz':<40} {'Benutzt':>8} {'Gesamt':>8} {'Frei':>8}","─"*68]
+                self._lic_data=self._pj(o); rs=[]
                 for d in self._lic_data:
                     n,u,t=d.get('SkuPartNumber',''),d.get('ConsumedUnits',0),d.get('Total',0)
                     try: u,t=int(u),int(t)
                     except: u,t=0,0
-                    ln.append(f"{n:<40} {u:>8} {t:>8} {t-u:>8}")
-                self.root.after(0,lambda:[self._settxt(self.lic_t,"\n".join(ln)),self.log("  ✅ Lizenzen",C['ok'])])
+                    rs.append((n,u,t,t-u))
+                self.log(f"  ✅ {len(rs)} Lizenzen",C['ok'])
+                self.ui(lambda:self.lic_t.set(rs,"Keine Lizenzen."))
             else:
-                self.root.after(0,lambda:[
-                    self._settxt(self.lic_t,f"❌ Fehler beim Laden der Lizenzen\n\n{e}\n\nGraph-Verbindung aktiv?"),
-                    self.log(f"  ❌ Lizenzen: {e}", C['err'])
-                ])
-        threading.Thread(target=do,daemon=True).start()
+                self.log(f"  ❌ Lizenzen: {e}", C['err'])
+                self.ui(lambda:self.lic_t.set([],"❌ Fehler beim Laden der Lizenzen — Graph-Verbindung aktiv? (Details im Protokoll)"))
+        self._job("Lizenzen laden",do,True)
 
     def _exp_lic(self):
         if not self._lic_data: messagebox.showwarning("Fehlt","Erst laden!"); return
@@ -1102,33 +2699,31 @@ class App:
         if not nm or not em: messagebox.showwarning("Fehlt","Name + E-Mail!"); return
         dp=self.sm_disp.get().strip() or nm
         if not messagebox.askyesno("Erstellen",f"📧 {em}\n👤 {dp}"): return
+        pu=self.sm_perm.get().strip()  # Tk-Werte nur im UI-Thread lesen
         def do():
-            self.root.after(0,lambda:self.log(f"  📧 Erstelle {em}...",C['warn']))
+            self.log(f"  📧 Erstelle {em}...",C['warn'])
             ok,_,e=self.ps.run(f'New-Mailbox -Name "{nm}" -PrimarySmtpAddress "{em}" -DisplayName "{dp}" -Shared',60)
             if ok:
-                self.root.after(0,lambda:self.log(f"  ✅ {em}",C['ok']))
-                pu=self.sm_perm.get().strip()
+                self.log(f"  ✅ {em}",C['ok'])
                 if pu and not pu.startswith("—"):
                     pue=self._ge(pu)
                     self.ps.run(f'Add-MailboxPermission -Identity "{em}" -User "{pue}" -AccessRights FullAccess -AutoMapping $true')
                     self.ps.run(f'Add-RecipientPermission -Identity "{em}" -Trustee "{pue}" -AccessRights SendAs -Confirm:$false')
-                    self.root.after(0,lambda:self.log(f"  ✅ Rechte für {pue}",C['ok']))
-                self.root.after(0,lambda:messagebox.showinfo("OK",f"✅ {em} erstellt!"))
-            else: self.root.after(0,lambda:[self.log(f"  ❌ {e}",C['err']),messagebox.showerror("Fehler",e)])
-        threading.Thread(target=do,daemon=True).start()
+                    self.log(f"  ✅ Rechte für {pue}",C['ok'])
+                self.ui(lambda:self._dlg(messagebox.showinfo,"OK",f"✅ {em} erstellt!"))
+            else: self.ui(lambda:[self.log(f"  ❌ {e}",C['err']),self._dlg(messagebox.showerror,"Fehler",e)])
+        self._job(f"Shared erstellen {em}",do,True)
 
     # ── Weiterleitungen ──────────────────────────────────
     def _load_fwd(self):
         self.log("  📬 Weiterleitungen...",C['warn'])
         def do():
-            ok,o,_=self.ps.run('Get-Mailbox -ResultSize Unlimited|Where-Object{$_.ForwardingSmtpAddress -ne $null}|Select PrimarySmtpAddress,ForwardingSmtpAddress,DeliverToMailboxAndForward|ConvertTo-Json -Compress',120)
-            data=self._pj(o) if ok else []
-            if data:
-                ln=[f"{'Postfach':<35} {'→ Weiterleitung':<35} {'Kopie':>5}","─"*78]
-                for d in data: ln.append(f"{d.get('PrimarySmtpAddress',''):<35} {str(d.get('ForwardingSmtpAddress','')):<35} {'Ja' if d.get('DeliverToMailboxAndForward') else 'Nein':>5}")
-                self.root.after(0,lambda:[self._settxt(self.fwd_t,"\n".join(ln)),self.log(f"  ✅ {len(data)} Weiterleitungen",C['ok'])])
-            else: self.root.after(0,lambda:self._settxt(self.fwd_t,"Keine Weiterleitungen."))
-        threading.Thread(target=do,daemon=True).start()
+            ok,data,e=self.forwarding()
+            rs=[(r['mb'],r['fwd'],'Ja' if r['keep'] else 'Nein') for r in data]
+            if ok: self.log(f"  ✅ {len(rs)} Weiterleitungen",C['ok'])
+            else: self.log(f"  ❌ Weiterleitungen: {e}",C['err'])
+            self.ui(lambda:self.fwd_t.set(rs,"Keine Weiterleitungen."))
+        self._job("Weiterleitungen laden",do,True)
     def _set_fwd(self):
         src,dst=self.fwd_src.get().strip(),self.fwd_dst.get().strip()
         if not src or src.startswith("—") or not dst or dst.startswith("—"): messagebox.showwarning("Fehlt","Auswählen!"); return
@@ -1136,8 +2731,8 @@ class App:
         if not messagebox.askyesno("Setzen",f"📬 {se} → {de}"): return
         def do():
             ok,_,e=self.ps.run(f'Set-Mailbox -Identity "{se}" -ForwardingSmtpAddress "smtp:{de}" -DeliverToMailboxAndForward {keep}')
-            self.root.after(0,lambda:self._done([] if ok else [e],"gesetzt"))
-        threading.Thread(target=do,daemon=True).start()
+            self.ui(lambda:self._done([] if ok else [e],"gesetzt"))
+        self._job(f"Weiterleitung {se}",do,True)
     def _rem_fwd(self):
         src=self.fwd_src.get().strip()
         if not src or src.startswith("—"): messagebox.showwarning("Fehlt","Postfach!"); return
@@ -1145,8 +2740,85 @@ class App:
         if not messagebox.askyesno("Entfernen",f"Weiterleitung für {se} entfernen?"): return
         def do():
             ok,_,e=self.ps.run(f'Set-Mailbox -Identity "{se}" -ForwardingSmtpAddress $null')
-            self.root.after(0,lambda:self._done([] if ok else [e],"entfernt"))
-        threading.Thread(target=do,daemon=True).start()
+            self.ui(lambda:self._done([] if ok else [e],"entfernt"))
+        self._job(f"Weiterleitung − {se}",do,True)
+
+    def _run_scan(self,resume=False):
+        if resume:
+            fp=filedialog.askopenfilename(title="Ergebnisdatei des abgebrochenen Scans",filetypes=[("CSV/JSONL","*.csv *.jsonl")])
+            if fp and not os.path.exists(fp+'.state.json'): messagebox.showwarning("Fehlt",f"Kein Scan-Stand zu\n{fp}"); return
+        else:
+            fp=filedialog.asksaveasfilename(defaultextension=".csv",initialfile=f"Weiterleitungs-Scan_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
+                                            filetypes=[("CSV","*.csv"),("JSON Lines","*.jsonl")])
+        if not fp: return
+        an={'mailbox_smtp':"📨 Postfach (SMTP)",'mailbox_recipient':"📨 Postfach (Empfänger)",'inbox_rule':"📥 Regel",'error':"❌ Fehler"}
+        self._scan_view=[]; self.scan_t.set([],"⏳ Scan läuft..."); self.scan_rb.configure(state=tk.DISABLED)
+        def add(rows,n):
+            self.ui(lambda:self.scan_pl.configure(text=f"⏳ {n['scanned']}/{n['mailboxes']} Postfächer, {n['external']} extern"),key='scan_prog')
+            if not rows: return
+            self._scan_view+=[(r['mailbox'],an.get(r['kind'],r['kind']),r['rule'],r['target'],
+                               {True:'Ja',False:'Nein'}.get(r['keep_copy'] if r['kind']!='inbox_rule' else r['enabled'],''),r['error']) for r in rows]
+            rs=list(self._scan_view); self.ui(lambda:self.scan_t.set(rs,""),key='scan')
+        def do():
+            try:
+                r=self.fwd_scan(fp,resume,on_rows=add)
+            except Exception as ex:
+                self.log(f"  ❌ Scan: {ex}",C['err']); self.ui(lambda:[self.scan_rb.configure(state=tk.NORMAL),self.scan_pl.configure(text="❌ Fehler")]); return
+            tx=(f"✅ {r['scanned']}/{r['mailboxes']} Postfächer, {r['external']} extern, {r['errors']} Fehler" if r['complete']
+                else f"⏸️ Unvollständig ({r['scanned']}/{r['mailboxes']}) — ⏯️ Fortsetzen")
+            self.log(f"🛡️ Scan → {fp}: {tx}",C['ok'] if r['complete'] else C['warn'])
+            self.ui(lambda:[self.scan_rb.configure(state=tk.NORMAL),self.scan_pl.configure(text=tx),
+                            self.scan_t.set(list(self._scan_view),"✅ Keine externen Weiterleitungen gefunden." if r['complete'] else "")])
+        self._job("Weiterleitungs-Scan",do)
+
+    # ── Postfach-Größen ──────────────────────────────────
+    @staticmethod
+    def _mbr_row(r):
+        return tuple('' if r[c] is None else r[c] for c in ('mailbox','name','type','size_mb','items'))+(
+            r['last_logon'].replace('T',' '),r['last_action'].replace('T',' '),'' if r['inactive_days'] is None else r['inactive_days'],r['error'])
+
+    def _run_mbr(self,resume=False):
+        loc=self._mbr_read()[0] if resume else {}  # Zeilen des Workers; self._mbr gehört dem UI-Thread
+        self._mbr_show(dict(loc),"⏳ Bericht läuft...","⏳ Bericht läuft..."); self.mbr_rb.configure(state=tk.DISABLED)
+        def add(rows,n):
+            for r in rows: loc[r['mailbox']]=self._mbr_row(r)
+            d=dict(loc); tx=f"⏳ {n['scanned']}/{n['mailboxes']} Postfächer, {n['errors']} Fehler"
+            self.ui(lambda:self._mbr_show(d,tx),key='mbr')
+        def do():
+            try: r=self.size_report(resume,on_rows=add)
+            except Exception as ex:
+                self.log(f"  ❌ Größenbericht: {ex}",C['err']); self.ui(lambda:[self.mbr_rb.configure(state=tk.NORMAL),self.mbr_pl.configure(text="❌ Fehler")]); return
+            tx=(f"✅ {r['scanned']}/{r['mailboxes']} Postfächer, {r['errors']} Fehler ({r['secs']}s)" if r['complete']
+                else f"⏸️ Unvollständig ({r['scanned']}/{r['mailboxes']}) — ⏯️ Fortsetzen")
+            self.log(f"📦 Größenbericht: {tx}",C['ok'] if r['complete'] else C['warn'])
+            d=self._mbr_read()[0]
+            self.ui(lambda:[self.mbr_rb.configure(state=tk.NORMAL),self._mbr_show(d,tx)])
+        self._job("Postfach-Größenbericht",do)
+
+    @classmethod
+    def _mbr_read(cls):
+        """Lokale Ablage → ({postfach: tabellenzeile}, laufbeginn)"""
+        db=MbStore()
+        try: rows,run=db.rows(),db.meta('run')
+        finally: db.close()
+        return {r['mailbox']:cls._mbr_row(r) for r in rows},run
+
+    def _mbr_show(self,d,tx,msg=""):
+        """Zeilen + Status anzeigen (nur im UI-Thread)"""
+        self._mbr=d; self.mbr_t.set(list(d.values()),msg); self.mbr_pl.configure(text=tx)
+
+    def _load_mbr(self):
+        """Stand aus der lokalen Ablage anzeigen (auch nach Neustart)"""
+        d,run=self._mbr_read()
+        self._mbr_show(d,f"📂 Lauf vom {run.replace('T',' ')}: {len(d)} Postfächer" if run else "","Noch kein Bericht — ▶️ starten")
+
+    def _exp_mbr(self):
+        db=MbStore()
+        try: rows=db.rows()
+        finally: db.close()
+        if not rows: messagebox.showwarning("Fehlt","Erst Bericht!"); return
+        fp=filedialog.asksaveasfilename(defaultextension=".csv",initialfile=f"Postfach-Groessen_{datetime.now().strftime('%Y%m%d')}.csv",filetypes=[("CSV","*.csv")])
+        if fp: self.size_csv(fp,rows); self.log(f"💾 {fp} ({len(rows)} Postfächer)",C['ok'])
 
     # ── Audit ────────────────────────────────────────────
     def _run_aud(self):
@@ -1154,27 +2826,21 @@ class App:
         if not us or us.startswith("—"): messagebox.showwarning("Fehlt","Postfach!"); return
         ue=self._ge(us); self.log(f"  🔍 Audit {ue}...",C['warn']); self._aud_data=[]
         def do():
-            ln=[f"{'='*50}",f"  AUDIT: {ue}",f"{'='*50}",""]
-            ok,o,_=self.ps.run(f'Get-MailboxPermission -Identity "{ue}"|Where-Object{{$_.User -ne "NT AUTHORITY\\SELF" -and $_.IsInherited -eq $false}}|Select User,AccessRights|ConvertTo-Json -Compress',60)
+            ok,o,_=self.dal.q('full_access',ue,60)
             perms=self._pj(o) if ok else []
-            if perms:
-                ln+=["📂 Vollzugriff:"]
-                for p in perms: ln.append(f"  • {p.get('User','')}"); self._aud_data.append({'Postfach':ue,'Typ':'FullAccess','Benutzer':str(p.get('User',''))})
-                ln.append("")
-            ok,o,_=self.ps.run(f'Get-RecipientPermission -Identity "{ue}"|Where-Object{{$_.Trustee -ne "NT AUTHORITY\\SELF"}}|Select Trustee|ConvertTo-Json -Compress',60)
+            for p in perms: self._aud_data.append({'Postfach':ue,'Typ':'FullAccess','Benutzer':str(p.get('User',''))})
+            ok,o,_=self.dal.q('send_as',ue,60)
             perms=self._pj(o) if ok else []
-            if perms:
-                ln+=["✉️ Senden als:"]
-                for p in perms: ln.append(f"  • {p.get('Trustee','')}"); self._aud_data.append({'Postfach':ue,'Typ':'SendAs','Benutzer':str(p.get('Trustee',''))})
-                ln.append("")
-            ok,o,_=self.ps.run(f'Get-Mailbox -Identity "{ue}"|Select -Expand GrantSendOnBehalfTo',30)
+            for p in perms: self._aud_data.append({'Postfach':ue,'Typ':'SendAs','Benutzer':str(p.get('Trustee',''))})
+            ok,o,_=self.dal.q('send_on_behalf',ue,30)
             if ok and o.strip():
                 sob=[x.strip() for x in o.strip().split("\n") if x.strip()]
-                ln+=["📤 Senden im Auftrag:"] + [f"  • {s}" for s in sob]
                 for s in sob: self._aud_data.append({'Postfach':ue,'Typ':'SendOnBehalf','Benutzer':s})
-            if not self._aud_data: ln.append("✅ Keine Berechtigungen.")
-            self.root.after(0,lambda:[self._settxt(self.aud_t,"\n".join(ln)),self.log(f"  ✅ {len(self._aud_data)} Einträge",C['ok'])])
-        threading.Thread(target=do,daemon=True).start()
+            tn={'FullAccess':"📂 Vollzugriff",'SendAs':"✉️ Senden als",'SendOnBehalf':"📤 Senden im Auftrag"}
+            rs=[(tn[d['Typ']],d['Benutzer']) for d in self._aud_data]
+            self.log(f"  ✅ {ue}: {len(rs)} Einträge",C['ok'])
+            self.ui(lambda:self.aud_t.set(rs,f"✅ {ue}: keine Berechtigungen."))
+        self._job(f"Audit {ue}",do,True)
     def _exp_aud(self):
         if not self._aud_data: messagebox.showwarning("Fehlt","Erst Audit!"); return
         fp=filedialog.asksaveasfilename(defaultextension=".csv",initialfile=f"Audit_{datetime.now().strftime('%Y%m%d')}.csv",filetypes=[("CSV","*.csv")])
@@ -1191,37 +2857,9 @@ class App:
         if not fp: return
         self.log("📋 CSV-Export...",C['warn'])
         def do():
-            n=0; ts=datetime.now().strftime('%Y%m%d')
-            if active.get('users'):
-                p=os.path.join(fp,f"Benutzer_{ts}.csv")
-                with open(p,'w',newline='',encoding='utf-8') as f:
-                    w=csv.writer(f,delimiter=';'); w.writerow(['Name','E-Mail','Typ'])
-                    for m in self.mailboxes: w.writerow([m['n'],m['e'],m['t']])
-                n+=1
-            if active.get('shared'):
-                p=os.path.join(fp,f"Shared_{ts}.csv")
-                with open(p,'w',newline='',encoding='utf-8') as f:
-                    w=csv.writer(f,delimiter=';'); w.writerow(['Name','E-Mail'])
-                    for m in self.mailboxes:
-                        if m['t']=='shared': w.writerow([m['n'],m['e']])
-                n+=1
-            if active.get('groups'):
-                p=os.path.join(fp,f"Gruppen_{ts}.csv")
-                with open(p,'w',newline='',encoding='utf-8') as f:
-                    w=csv.writer(f,delimiter=';'); w.writerow(['Typ','Name','E-Mail'])
-                    for k in ['teams','verteiler','security']:
-                        for g in self.groups[k]: w.writerow([k,g['n'],g['e']])
-                n+=1
-            if active.get('forwarding'):
-                ok,o,_=self.ps.run('Get-Mailbox -ResultSize Unlimited|Where-Object{$_.ForwardingSmtpAddress -ne $null}|Select PrimarySmtpAddress,ForwardingSmtpAddress,DeliverToMailboxAndForward|ConvertTo-Json -Compress',120)
-                data=self._pj(o) if ok else []
-                p=os.path.join(fp,f"Weiterleitungen_{ts}.csv")
-                with open(p,'w',newline='',encoding='utf-8') as f:
-                    w=csv.writer(f,delimiter=';'); w.writerow(['Postfach','Weiterleitung','Kopie'])
-                    for d in data: w.writerow([d.get('PrimarySmtpAddress',''),d.get('ForwardingSmtpAddress',''),d.get('DeliverToMailboxAndForward','')])
-                n+=1
-            self.root.after(0,lambda:[self.log(f"✅ {n} CSV(s) → {fp}",C['ok']),messagebox.showinfo("Export",f"{n} Datei(en) in {fp}")])
-        threading.Thread(target=do,daemon=True).start()
+            n=self.export(fp,[k for k,v in active.items() if v])
+            self.ui(lambda:[self.log(f"✅ {n} CSV(s) → {fp}",C['ok']),self._dlg(messagebox.showinfo,"Export",f"{n} Datei(en) in {fp}")])
+        self._job("CSV-Export",do)
 
     # ── Bulk ─────────────────────────────────────────────
     def _blk_csv(self):
@@ -1239,47 +2877,333 @@ class App:
         if not messagebox.askyesno("Bulk",f"{'Hinzufügen' if adding else 'Entfernen'}: {len(users)} → {ge}"): return
         self.log(f"  🏷️ Bulk: {len(users)} → {ge}",C['warn'])
         def do():
-            ok_c,err_c=0,0
-            is_uni=any(g['e']==ge for g in self.groups.get('teams',[]))
-            for u in users:
-                u=u.strip()
-                if not u: continue
-                if adding:
-                    if is_uni: r,_,_=self.ps.run(f'Add-UnifiedGroupLinks -Identity "{ge}" -LinkType Members -Links "{u}" -EA SilentlyContinue')
-                    else: r,_,_=self.ps.run(f'Add-DistributionGroupMember -Identity "{ge}" -Member "{u}" -EA SilentlyContinue')
-                else:
-                    if is_uni:
-                        r,_,_=self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{ge}" -LinkType Members -Links "{u}" -Confirm:$false -EA SilentlyContinue')
-                        self.ps.run(f'Remove-UnifiedGroupLinks -Identity "{ge}" -LinkType Owners -Links "{u}" -Confirm:$false -EA SilentlyContinue')
-                    else: r,_,_=self.ps.run(f'Remove-DistributionGroupMember -Identity "{ge}" -Member "{u}" -Confirm:$false -EA SilentlyContinue')
-                if r: ok_c+=1
-                else: err_c+=1
-            self.root.after(0,lambda:[self._settxt(self.blk_t,f"✅ {ok_c} OK\n❌ {err_c} Fehler" if err_c else f"✅ {ok_c} OK"),
+            ok_c,err_c,th=self.bulk(ge,users,adding)
+            tx=f"✅ {ok_c} OK\n❌ {err_c} Fehler" if err_c else f"✅ {ok_c} OK"
+            if th: tx+=f"\n🐢 {th}× gedrosselt (wiederholt)"
+            self.ui(lambda:[self._settxt(self.blk_t,tx),
                 self.log(f"  🏷️ {ok_c}✅ {err_c}❌",C['ok'] if err_c==0 else C['warn'])])
-        threading.Thread(target=do,daemon=True).start()
+        self._job(f"Bulk {ge} ({len(users)})",do)
+
+    # ── Jobs ─────────────────────────────────────────────
+    def _job(self,name,do,quick=False):
+        """Aktion als Job einreihen (statt anonymem Thread); quick=True: kurze Abfrage/Einzeländerung, eigene Spur"""
+        j=self.jobs.submit(name,do,lane='quick' if quick else 'long'); self.log(f"  ⚙️ Job {j['id']}: {name}",C['dim']); return j
+
+    def _jobs_show(self):
+        if not self._w('jobs_lb'): return
+        ic={'queued':'⏳','running':'🔄','done':'✅','failed':'❌','cancelled':'⏹️'}
+        js=sorted(self.jobs.list(),key=lambda j:j['id'],reverse=True); sel=self.jobs_lb.curselection()
+        sid=self._jobs_ids[sel[0]] if sel and sel[0]<len(self._jobs_ids) else None
+        self.jobs_lb.delete(0,tk.END); self._jobs_ids=[j['id'] for j in js]
+        for j in js:
+            pr=f"{j['progress']:3d}%" if j['state']=='running' else "    "
+            tx=f"{ic.get(j['state'],'?')} {j['id']} {pr} {j['name'][:40]:<40} {(j['started'] or j['created'])[11:]}"
+            if j['error']: tx+=f"  ❌ {j['error'][:60]}"
+            elif j['msg'] and j['state']=='running': tx+=f"  {j['msg'][:40]}"
+            self.jobs_lb.insert(tk.END,tx)
+        if sid in self._jobs_ids: self.jobs_lb.selection_set(self._jobs_ids.index(sid))
+        cs=self.ps.cache.stats()
+        self.jobs_cl.configure(text=f"⚡ Cache: {cs['entries']} Einträge · {cs['hits']} Treffer / {cs['misses']} Fehlzugriffe "
+                                    f"({cs['hit_rate']:.0%}) · {cs['dropped']} durch Änderungen verworfen · TTL {CACHE_TTL}s")
+
+    def _jobs_cancel(self):
+        sel=self.jobs_lb.curselection()
+        if not sel: messagebox.showwarning("Fehlt","Job auswählen!"); return
+        jid=self._jobs_ids[sel[0]]
+        if self.jobs.cancel(jid): self.log(f"  ⏹️ Job {jid} abgebrochen",C['warn'])
 
     # ── Allgemein ────────────────────────────────────────
     def _done(self,errs,word):
         if errs:
             for e in errs: self.log(f"  ❌ {e}",C['err'])
-            messagebox.showerror("Fehler","Siehe Protokoll.")
-        else: messagebox.showinfo("OK",f"✅ {word}!")
+            self._dlg(messagebox.showerror,"Fehler","Siehe Protokoll.")
+        else: self._dlg(messagebox.showinfo,"OK",f"✅ {word}!")
+
+    def note(self,msg,color=None): self.log(msg,color)
 
     def log(self,msg,color=None):
-        ts=datetime.now().strftime("%H:%M:%S")
-        tag={C['ok']:'ok',C['err']:'err',C['warn']:'warn',C['accent']:'acc',C['dim']:'dim'}.get(color,'info')
-        self.log_t.configure(state=tk.NORMAL)
-        self.log_t.insert(tk.END,f"[{ts}] ",'info'); self.log_t.insert(tk.END,f"{msg}\n",tag)
-        self.log_t.see(tk.END); self.log_t.configure(state=tk.DISABLED)
+        """Thread-sicher: nur puffern, _pump schreibt gesammelt ins Fenster"""
+        self._logs.put(msg,{C['ok']:'ok',C['err']:'err',C['warn']:'warn',C['accent']:'acc',C['dim']:'dim'}.get(color,'info'))
 
-    def cleanup(self):
-        try: self.ps.run("Disconnect-ExchangeOnline -Confirm:$false",10)
-        except: pass
-        try: self.ps.run("Disconnect-MgGraph -EA SilentlyContinue",5)
-        except: pass
-        self.ps.stop()
+    def ui(self,fn,key=None):
+        """fn im UI-Thread ausführen (aus beliebigem Thread); mit key zählt nur der letzte Aufruf je Takt (z.B. Fortschritt)"""
+        with self._ulk:
+            if key is None: self._uq.append(fn)
+            else:
+                if key not in self._uk: self._uq.append(key)
+                self._uk[key]=fn
+
+    def _pump(self):
+        """Einziger periodischer Takt: UI-Warteschlange abarbeiten, dann Protokoll gesammelt schreiben.
+           Nächster Takt wird zuerst geplant — eine Ausnahme hält die Anzeige nicht an (Dialoge über _dlg, nicht hier)"""
+        self.root.after(UI_PUMP_MS,self._pump)
+        with self._ulk: q,self._uq=self._uq,collections.deque(); ks,self._uk=self._uk,{}
+        for f in q:
+            try: (ks[f] if isinstance(f,str) else f)()
+            except Exception as ex: self._logs.put(f"UI-Fehler: {ex}",'err')
+        try: self._log_flush()
+        except Exception as ex: self._logs.put(f"UI-Fehler: {ex}",'err')
+
+    def _dlg(self,fn,*a):
+        """Modalen Dialog außerhalb des _pump-Durchlaufs öffnen (sonst stünden Protokoll/Fortschritt, solange er offen ist)"""
+        self.root.after_idle(lambda:fn(*a))
+
+    def _log_flush(self):
+        ls,lost=self._logs.drain()
+        if ls:
+            parts=[f"[… {lost} ältere Zeilen übersprungen]\n",'dim'] if lost else []
+            for ts,msg,tag in ls: parts+=[f"[{ts}] ",'info',f"{msg}\n",tag]
+            t=self.log_t; t.configure(state=tk.NORMAL); t.insert(tk.END,*parts)
+            n=int(t.index('end-1c').split('.')[0])-1  # letzte Zeile ist leer
+            if n>LOG_MAX_LINES: t.delete('1.0',f"{n-LOG_MAX_LINES+1}.0")
+            t.see(tk.END); t.configure(state=tk.DISABLED)
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  LOKALER API-SERVER (JSON-RPC 2.0 über HTTP)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+class Api:
+    """JSON-RPC-Methoden auf einem verbundenen Core; lange Aktionen laufen als Job (→ {'job': id})"""
+    def __init__(self,core): self.c=core; self.jobs=core.jobs
+
+    def _job(self,j): return {k:j[k] for k in ('id','name','state','created','started','ended','progress','msg','result','error')}
+    @staticmethod
+    def _out(p):
+        """Ausgabepfad eines API-Aufrufs: relativ zu REPORT_DIR, nichts außerhalb"""
+        base=os.path.realpath(REPORT_DIR); fp=os.path.realpath(os.path.join(base,p))
+        if os.path.commonpath([base,fp])!=base: raise ValueError(f"Ausgabe nur unterhalb von {REPORT_DIR}: {p}")
+        os.makedirs(os.path.dirname(fp),exist_ok=True); return fp
+
+    def ping(self):
+        return {'connected':self.c.connected,'admin':self.c.admin,'sessions':len(self.c.ps.sess),'mailboxes':len(self.c.mailboxes),
+                'cache':self.c.ps.cache.stats(),'dal':self.c.dal.stats()}
+    def refresh(self):
+        r=self.c.fetch(); return {'ok':all(r),'mailboxes':len(self.c.mailboxes),'groups':{k:len(v) for k,v in self.c.groups.items()}}
+    def mailbox_permission(self,mailbox,user,full_access=True,send_as=False,automap=True,remove=False):
+        errs=self.c.mb_perm(mailbox,user,full_access,send_as,automap,not remove); return {'ok':not errs,'errors':errs}
+    def group_member(self,group,user,owner=False,remove=False):
+        uni=any(g['e'].lower()==group.lower() for g in self.c.groups['teams'])
+        ok,e=self.c.grp_member(group,user,uni,not remove,owner); return {'ok':ok,'error':e or None}
+    def offboard(self,user,steps='all',ooo='',fwd='',plan=False):
+        todo=list(OB_N) if steps=='all' else [k.strip() for k in (steps.split(',') if isinstance(steps,str) else steps) if k.strip()]
+        bad=[k for k in todo if k not in OB_N]
+        if bad: raise ValueError(f"Unbekannte Schritte: {', '.join(bad)}")
+        def do():
+            st=self.c._ob_state(user) if plan else None
+            if plan and not st: raise RuntimeError(f"Ist-Zustand für {user} nicht lesbar — nichts ausgeführt")
+            res,met=self.c._ob_exec(user,user,todo,{'ooo':ooo,'fwd':fwd},self.c.admin,st)
+            return {'user':user,'ok':all(ok for ok,_ in res.values()),'steps':{k:{'ok':ok,'detail':d} for k,(ok,d) in res.items()},
+                    'report':self.c._ob_rep("OFFBOARDING-BERICHT (API)",user,user,self.c.admin,todo,res,met=met)}
+        return {'job':self.jobs.submit(f"offboard {user}",do)['id']}
+    def bulk(self,group,users,remove=False):
+        def do():
+            ok_c,err_c,th=self.c.bulk(group,users,not remove); return {'ok':ok_c,'failed':err_c,'throttled':th}
+        return {'job':self.jobs.submit(f"bulk {group}",do)['id']}
+    def export(self,out,what=('users','shared','groups','forwarding')):
+        out=self._out(out)
+        def do():
+            os.makedirs(out,exist_ok=True); return {'files':self.c.export(out,list(what)),'out':out}
+        return {'job':self.jobs.submit(f"export {out}",do)['id']}
+    def forward_scan(self,out,resume=False,internal=False):
+        out=self._out(out)
+        return {'job':self.jobs.submit(f"scan {out}",lambda:self.c.fwd_scan(out,resume,internal))['id']}
+    def size_report(self,out='',resume=False):
+        out=out and self._out(out)
+        def do():
+            r=self.c.size_report(resume)
+            if out:
+                db=MbStore()
+                try: self.c.size_csv(out,db.rows())
+                finally: db.close()
+            return {**r,'out':out}
+        return {'job':self.jobs.submit("size report",do)['id']}
+    def job(self,id):
+        j=self.jobs.get(id)
+        if not j: raise KeyError(f"Job {id} unbekannt")
+        return self._job(j)
+    def job_list(self): return [self._job(j) for j in self.jobs.list()]
+    def job_cancel(self,id): return {'cancelled':self.jobs.cancel(id)}
+
+    def call(self,req):
+        """Eine JSON-RPC-Anfrage → Antwort-Dict (None bei Notification)"""
+        rid=req.get('id') if isinstance(req,dict) else None
+        try:
+            m=req.get('method','') if isinstance(req,dict) else ''
+            if m.startswith('_') or m=='call' or not callable(getattr(self,m,None)):
+                return {'jsonrpc':'2.0','id':rid,'error':{'code':-32601,'message':f"Methode unbekannt: {m}"}}
+            p=req.get('params') or {}; fn=getattr(self,m)
+            try: ba=inspect.signature(fn).bind(*p) if isinstance(p,list) else inspect.signature(fn).bind(**p)
+            except TypeError as ex: return {'jsonrpc':'2.0','id':rid,'error':{'code':-32602,'message':str(ex)}}  # nur Parameterbindung
+            r=fn(*ba.args,**ba.kwargs)
+            return None if 'id' not in req else {'jsonrpc':'2.0','id':rid,'result':r}
+        except Exception as ex: return {'jsonrpc':'2.0','id':rid,'error':{'code':-32000,'message':str(ex)}}
+
+def api_serve(core,port=API_PORT,token=''):
+    """Blockierender HTTP-Server auf 127.0.0.1:port; POST / mit JSON-RPC (einzeln oder Batch), GET /health.
+       Ohne token wird ein zufälliges erzeugt und ausgegeben — ein offener Port wäre für jede Webseite im Browser erreichbar."""
+    api=Api(core); gen=not token; token=token or secrets.token_urlsafe(24)
+    class H(BaseHTTPRequestHandler):
+        def _send(self,code,d):
+            b=json.dumps(d,ensure_ascii=False,default=str).encode('utf-8')
+            self.send_response(code); self.send_header('Content-Type','application/json; charset=utf-8')
+            self.send_header('Content-Length',str(len(b))); self.end_headers(); self.wfile.write(b)
+        def _auth(self):
+            if self.headers.get('Origin'): self._send(403,{'error':'browser requests not allowed'}); return False  # CSRF
+            if not secrets.compare_digest(self.headers.get('Authorization',''),f"Bearer {token}"): self._send(401,{'error':'unauthorized'}); return False
+            return True
+        def do_GET(self):
+            if not self._auth(): return
+            if self.path.rstrip('/')=='/health': self._send(200,api.ping())
+            else: self._send(404,{'error':'not found'})
+        def do_POST(self):
+            if not self._auth(): return
+            if self.headers.get('Content-Type','').split(';')[0].strip().lower()!='application/json':
+                self._send(415,{'error':'Content-Type: application/json erforderlich'}); return
+            try: req=json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'null')
+            except Exception: self._send(400,{'jsonrpc':'2.0','id':None,'error':{'code':-32700,'message':'Parse error'}}); return
+            if req==[]: self._send(200,{'jsonrpc':'2.0','id':None,'error':{'code':-32600,'message':'Invalid Request'}}); return
+            r=[x for x in (api.call(q) for q in req) if x is not None] if isinstance(req,list) else api.call(req)
+            if r: self._send(200,r)
+            else: self.send_response(204); self.end_headers()  # nur Notifications
+        def log_message(self,fmt,*a): core.note(f"  🌐 {self.address_string()} {fmt%a}",C['dim'])
+    srv=ThreadingHTTPServer(('127.0.0.1',port),H); srv.daemon_threads=True
+    core.note(f"🌐 API-Server auf http://127.0.0.1:{port} (Token erforderlich)",C['ok'])
+    if gen: core.note(f"🔑 Kein Token angegeben, erzeugt: Authorization: Bearer {token}",C['warn'])
+    try: srv.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: srv.server_close()
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+#  CLI (ohne Fenster, z.B. für Aufgabenplanung)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def bench_report(fx):
+    """Fixture aus Core.fwd_bench auswerten: gemessene Zeit, übertragene Bytes, Parse-Zeit, gleiche Ergebnisse? → (zeilen, gleich)"""
+    ln=[f"Weiterleitungs-Benchmark — aufgezeichnet {fx.get('recorded','?')}",
+        f"{'Variante':<12} {'Server min/med (s)':>20} {'Bytes':>12} {'Parse (ms)':>11} {'Treffer':>8}","─"*68]
+    res={}
+    for k,v in fx['variants'].items():
+        if not v.get('ok'): ln.append(f"{k:<12} ❌ {v.get('err','')[:50]}"); continue
+        t0=time.perf_counter()
+        for _ in range(5): rs=Core._fwd_rows(Core._pj(v['out']))
+        pm=(time.perf_counter()-t0)/5*1000; ts=sorted(v['secs']); res[k]=rs
+        ln.append(f"{k:<12} {ts[0]:>9.2f} / {ts[len(ts)//2]:<8.2f} {len(v['out'].encode('utf-8')):>12,} {pm:>11.1f} {len(rs):>8}")
+    same=len({json.dumps(r,sort_keys=True) for r in res.values()})<=1
+    ln+=["",f"{'✅ Alle Varianten liefern dieselben Weiterleitungen' if same else '❌ Ergebnisse weichen ab: '+', '.join(f'{k}={len(r)}' for k,r in res.items())}"]
+    if 'client' in res and len(res)>1:
+        b=min((k for k in res if k!='client'),key=lambda k:min(fx['variants'][k]['secs']))
+        ln.append(f"⚡ {b}: {min(fx['variants']['client']['secs'])/max(min(fx['variants'][b]['secs']),1e-3):.1f}× schneller als client")
+    return ln,same
+
+def cli(argv):
+    """m365tool [--admin UPN] offboard|bulk|export|schedule|serve|bench|scan|report … → Exit-Code (0 = alles OK)"""
+    for f in (sys.stdout,sys.stderr):  # umgeleitet/Aufgabenplanung → cp1252, Emojis würden UnicodeEncodeError werfen
+        if f and hasattr(f,'reconfigure'): f.reconfigure(encoding='utf-8',errors='replace')
+    ap=argparse.ArgumentParser(prog='m365tool',description="M365 Admin Tool — Kommandozeile")
+    ap.add_argument('--admin',help="Admin-UPN für Connect-ExchangeOnline / Graph (Pflicht außer bei bench --fixture)")
+    sp=ap.add_subparsers(dest='cmd',required=True)
+    o=sp.add_parser('offboard',help="Offboarding für einen oder mehrere Benutzer")
+    o.add_argument('--user',action='append',default=[],help="UPN (mehrfach möglich)")
+    o.add_argument('--csv',help="CSV/Liste: UPN[;Weiterleitung]")
+    o.add_argument('--steps',default='all',help="all oder Liste: "+",".join(OB_N))
+    o.add_argument('--ooo',default='',help="Abwesenheitstext"); o.add_argument('--fwd',default='',help="Weiterleitungsziel")
+    o.add_argument('--plan',action='store_true',help="Ist-Zustand lesen, nur Schritte mit Änderung ausführen")
+    o.add_argument('--dry-run',action='store_true',help="nur Plan anzeigen (mit --plan), nichts ändern")
+    o.add_argument('--report',help="Bericht in Datei schreiben")
+    b=sp.add_parser('bulk',help="Benutzer zu Gruppe hinzufügen/entfernen")
+    b.add_argument('--group',required=True); b.add_argument('--csv',required=True)
+    b.add_argument('--remove',action='store_true')
+    e=sp.add_parser('export',help="CSV-Export")
+    e.add_argument('--out',default='.'); e.add_argument('--what',default='users,shared,groups,forwarding')
+    sp.add_parser('schedule',help="fällige geplante Offboardings einmal ausführen")
+    v=sp.add_parser('serve',help="lokaler JSON-RPC-API-Server mit dauerhaft verbundenen Sessions")
+    v.add_argument('--port',type=int,default=API_PORT); v.add_argument('--token',default=os.environ.get('M365TOOL_TOKEN',''),
+                   help="Bearer-Token (Standard: Umgebungsvariable M365TOOL_TOKEN, sonst zufällig erzeugt)")
+    k=sp.add_parser('bench',help="Weiterleitungs-Abfrage: Client- vs. Server-Filter messen (live aufzeichnen oder Fixture auswerten)")
+    k.add_argument('--record',metavar='DATEI',help="live messen und als Fixture speichern (enthält Adressen des Mandanten!)")
+    k.add_argument('--fixture',metavar='DATEI',help="aufgezeichnete Fixture offline auswerten (ohne Verbindung), z.B. fixtures/forwarding_bench.json")
+    k.add_argument('--runs',type=int,default=3,help="Messläufe je Variante beim Aufzeichnen")
+    n=sp.add_parser('scan',help="Sicherheits-Scan: externe Weiterleitungen + Posteingangsregeln mandantenweit")
+    n.add_argument('--out',required=True,help="Ergebnisdatei .csv oder .jsonl (wird fortlaufend geschrieben)")
+    n.add_argument('--resume',action='store_true',help="abgebrochenen Scan zu --out fortsetzen")
+    n.add_argument('--internal',action='store_true',help="auch interne Ziele ausgeben")
+    n.add_argument('--chunk',type=int,default=SCAN_CHUNK,help="Postfächer je Aufruf")
+    z=sp.add_parser('report',help="Postfach-Größen und letzte Aktivität mandantenweit (lokal in SQLite, Export als CSV)")
+    z.add_argument('--out',required=True,help="CSV-Datei")
+    z.add_argument('--resume',action='store_true',help="abgebrochenen Bericht fortsetzen")
+    z.add_argument('--chunk',type=int,default=SIZE_CHUNK,help="Postfächer je Aufruf")
+    a=ap.parse_args(argv)
+    if a.cmd=='bench' and a.fixture:
+        with open(a.fixture,'r',encoding='utf-8') as f: ln,same=bench_report(json.load(f))
+        print("\n".join(ln)); return 0 if same else 1
+    if not a.admin: ap.error("--admin fehlt")
+    if a.cmd=='bench' and not a.record: ap.error("bench: --record oder --fixture angeben")
+    if a.cmd=='offboard':
+        todo=list(OB_N) if a.steps=='all' else [k.strip() for k in a.steps.split(',') if k.strip()]
+        bad=[k for k in todo if k not in OB_N]
+        if bad: ap.error(f"Unbekannte Schritte: {', '.join(bad)}")
+        if not a.user and not a.csv: ap.error("Kein Benutzer (--user/--csv)")
+
+    c=Core(); c.connected=False
+    try:
+        c.preflight()
+        c.note(f"🔄 Verbinde als {a.admin}...")
+        ok,org,err=c.connect(a.admin)
+        if not ok: c.note(f"❌ {err}"); return 1
+        c.connected=True; c.note(f"✅ Verbunden{f' — {org}' if org else ''}")
+        if a.cmd=='offboard':
+            rows=[(u,a.fwd) for u in a.user]
+            if a.csv:
+                with open(a.csv,'r',encoding='utf-8') as f: rows+=[(u,fw or a.fwd) for u,fw in c._obb_parse(f.read())]
+            if not rows: c.note("❌ Keine Benutzer in der CSV"); return 2
+            rep,fails=[],0
+            for ue,fw in rows:
+                opts={'ooo':a.ooo,'fwd':fw}; st=None
+                if a.plan:
+                    t0=time.time(); st=c._ob_state(ue)
+                    if not st: c.note(f"❌ Ist-Zustand für {ue} nicht lesbar"); fails+=1; continue
+                    ln,_,_,_=c._plan_lines(ue,todo,opts,st,time.time()-t0); print("\n".join(ln))
+                    if a.dry_run: continue
+                res,met=c._ob_exec(ue,ue,todo,opts,c.admin,st,
+                    step_done=lambda sn,ok,i,n,u=ue:c.note(f"  {'✅' if ok else '❌'} {u}: {sn} ({i}/{n})"))
+                fc=sum(1 for ok,_ in res.values() if not ok); fails+=fc>0
+                rep+=c._ob_rep("OFFBOARDING-BERICHT (CLI)",ue,ue,c.admin,todo,res,met=met)+[""]
+            if rep:
+                print("\n".join(rep))
+                if a.report:
+                    with open(a.report,'w',encoding='utf-8') as f: f.write("\n".join(rep))
+            return 1 if fails else 0
+        if a.cmd=='bulk':
+            with open(a.csv,'r',encoding='utf-8') as f: users=[l.strip() for l in f if l.strip() and '@' in l]
+            c.fetch()
+            ok_c,err_c,th=c.bulk(a.group,users,not a.remove)
+            c.note(f"🏷️ {ok_c}✅ {err_c}❌"+(f" 🐢 {th}× gedrosselt" if th else "")); return 1 if err_c else 0
+        if a.cmd=='export':
+            os.makedirs(a.out,exist_ok=True); c.fetch()
+            n=c.export(a.out,[w.strip() for w in a.what.split(',')]); c.note(f"✅ {n} CSV(s) → {a.out}"); return 0
+        if a.cmd=='schedule':
+            js=c._ob_due(); c.note(f"📅 {len(js)} Job(s) ausgeführt")
+            return 1 if any(j['status']=='failed' for j in js) else 0
+        if a.cmd=='serve':
+            c.fetch(); api_serve(c,a.port,a.token); return 0
+        if a.cmd=='scan':
+            r=c.fwd_scan(a.out,a.resume,a.internal,max(1,a.chunk))
+            c.note(f"🛡️ {r['scanned']}/{r['mailboxes']} Postfächer: {r['external']} externe Weiterleitung(en), {r['errors']} Fehler → {r['out']}"
+                   +("" if r['complete'] else " — unvollständig, mit --resume fortsetzen"))
+            return 0 if r['complete'] else 1
+        if a.cmd=='report':
+            db=MbStore()
+            try: r=c.size_report(a.resume,max(1,a.chunk),store=db); c.size_csv(a.out,db.rows())
+            finally: db.close()
+            c.note(f"📦 {r['scanned']}/{r['mailboxes']} Postfächer, {r['errors']} Fehler in {r['secs']}s → {a.out}"
+                   +("" if r['complete'] else " — unvollständig, mit --resume fortsetzen"))
+            return 0 if r['complete'] else 1
+        if a.cmd=='bench':
+            fx=c.fwd_bench(max(1,a.runs)); _jsave(os.path.abspath(a.record),fx)
+            ln,same=bench_report(fx); print("\n".join(ln)); c.note(f"💾 Fixture → {a.record}"); return 0 if same else 1
+    finally:
+        c.cleanup()
 
 def main():
+    if len(sys.argv)>1: sys.exit(cli(sys.argv[1:]))
     root=tk.Tk()
     try: root.iconbitmap('exchange.ico')
     except: pass
@@ -0,0 +1,43 @@
+"""Headless-Tests: M365-Tool-v6.1.py ohne Fenster laden, PowerShell durch FakePS ersetzen"""
+import importlib.util, os, threading
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture(scope='session')
+def m():
+    """Das Tool als Modul (Dateiname mit Bindestrich/Punkt → nicht per import ladbar)"""
+    sp=importlib.util.spec_from_file_location('m365tool',os.path.join(ROOT,'M365-Tool-v6.1.py'))
+    mod=importlib.util.module_from_spec(sp); sp.loader.exec_module(mod); return mod
+
+class FakePS:
+    """Steht für eine PowerShell-Session: answer(cmd) → (ok, ausgabe, fehler); alle Befehle landen in calls"""
+    calls=[]; lk=threading.Lock()
+    @staticmethod
+    def answer(cmd): return True,"",""
+    def __init__(self): self.proc=None
+    def start(self): self.proc=self
+    def poll(self): return None  # proc=self → "läuft"
+    def kill(self): self.proc=None
+    def stop(self): self.proc=None
+    def run(self,cmd,timeout=120,cancel=None):
+        if cancel and cancel.is_set(): return False,"","Abgebrochen"
+        with FakePS.lk: type(self).calls.append(cmd)
+        return type(self).answer(cmd)
+
+@pytest.fixture
+def fps(m,monkeypatch):
+    """Frische FakePS-Klasse; answer per monkeypatch/Zuweisung ersetzen"""
+    cls=type('FakePS',(FakePS,),{'calls':[]})
+    monkeypatch.setattr(m,'PS',cls); return cls
+
+@pytest.fixture
+def core(m,fps,tmp_path,monkeypatch):
+    """Core ohne Konstruktor (kein PowerShell, kein Watchdog): Pool aus FakePS, Journal/Zeitplan/Berichte unter tmp_path"""
+    for k,v in {'JOURNAL_DIR':'journal','REPORT_DIR':'reports','STATS_FILE':'ob_stats.json','SCHEDULE_FILE':'schedule.json'}.items():
+        monkeypatch.setattr(m,k,str(tmp_path/v))
+    c=m.Core.__new__(m.Core)
+    c.ps=m.PSPool(3); c.ps.start(); c.note=lambda *a,**k:None
+    c.connected=True; c.admin='admin@contoso.example'; c.mailboxes=[]; c.groups={'teams':[],'verteiler':[],'security':[]}
+    c.mod_status={'Microsoft.Graph':{'installed':True}}; c.jobs=m.Jobs(); c.dal=m.Exo(c.ps,c.note)
+    return c
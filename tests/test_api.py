@@ -0,0 +1,90 @@
+"""Api: JSON-RPC-Dispatch (Fehlercodes, Notifications), offboard-Parameter, HTTP-Batch"""
+import json, socket, threading, time, urllib.error, urllib.request
+import pytest
+
+UE='max.muster@contoso.example'
+
+@pytest.fixture
+def api(m,core): return m.Api(core)
+
+def wait(api,jid):
+    for _ in range(500):
+        j=api.job(jid)
+        if j['state'] not in ('queued','running'): return j
+        time.sleep(0.01)
+    raise AssertionError(f"Job {jid} hängt")
+
+def rpc(api,method,params=None,id=1):
+    q={'jsonrpc':'2.0','method':method,'id':id}
+    if params is not None: q['params']=params
+    return api.call(q)
+
+def test_offboard_steps_as_comma_string(api,fps):
+    r=rpc(api,'offboard',{'user':UE,'steps':'hide_gal, disable_sync'})
+    j=wait(api,r['result']['job'])
+    assert j['state']=='done' and set(j['result']['steps'])=={'hide_gal','disable_sync'} and j['result']['ok']
+
+def test_offboard_steps_as_list(api,fps):
+    j=wait(api,rpc(api,'offboard',[UE,['hide_gal']])['result']['job'])
+    assert list(j['result']['steps'])==['hide_gal']
+
+def test_unknown_step_is_server_error(api,fps):
+    r=rpc(api,'offboard',{'user':UE,'steps':'hide_gal,format_c'})
+    assert r['error']['code']==-32000 and 'format_c' in r['error']['message']
+    assert not api.jobs.list()
+
+def test_param_errors(api):
+    assert rpc(api,'offboard',{'usr':UE})['error']['code']==-32602
+    assert rpc(api,'offboard',{})['error']['code']==-32602
+    assert rpc(api,'ping',[1])['error']['code']==-32602
+
+def test_unknown_and_private_methods(api):
+    for mt in ('nope','_job','call','__init__'): assert rpc(api,mt)['error']['code']==-32601
+
+def test_type_error_inside_method_is_not_a_param_error(api,monkeypatch):
+    monkeypatch.setattr(api.c,'fetch',lambda:None+1)
+    assert rpc(api,'refresh')['error']['code']==-32000
+
+def test_notification_returns_nothing(api):
+    assert api.call({'jsonrpc':'2.0','method':'ping'}) is None
+
+def test_plan_without_state_runs_nothing(api,fps):
+    fps.answer=lambda cmd:(False,"","Zugriff verweigert") if "$u='" in cmd else (True,"","")
+    j=wait(api,rpc(api,'offboard',{'user':UE,'steps':'all','plan':True})['result']['job'])
+    assert j['state']=='failed' and 'nicht lesbar' in j['error']
+    assert not any(c.startswith(('Set-','Update-','Remove-')) for c in fps.calls)
+
+def test_plan_skips_noop_steps(api,fps):
+    st={'Type':'SharedMailbox','Hidden':True,'Proto':0}
+    fps.answer=lambda cmd:(True,json.dumps(st),"") if "$u='" in cmd else (True,"","")
+    j=wait(api,rpc(api,'offboard',{'user':UE,'steps':'convert_shared,hide_gal,disable_sync','plan':True})['result']['job'])
+    assert j['state']=='done' and all(s['detail'].startswith("Keine Änderung") for s in j['result']['steps'].values())
+    assert not any(c.startswith('Set-') for c in fps.calls)
+
+@pytest.fixture
+def http(m,core):
+    """api_serve im Hintergrund auf freiem Port → post(daten, header) → (status, antwort)"""
+    with socket.socket() as s: s.bind(('127.0.0.1',0)); port=s.getsockname()[1]
+    threading.Thread(target=m.api_serve,args=(core,port,'geheim'),daemon=True).start()
+    for _ in range(100):
+        try: socket.create_connection(('127.0.0.1',port),0.1).close(); break
+        except OSError: time.sleep(0.02)
+    def post(d,hd=None):
+        h={'Content-Type':'application/json','Authorization':'Bearer geheim',**(hd or {})}
+        rq=urllib.request.Request(f"http://127.0.0.1:{port}/",json.dumps(d).encode(),h)
+        try:
+            with urllib.request.urlopen(rq,timeout=5) as r: b=r.read(); return r.status,json.loads(b) if b else None
+        except urllib.error.HTTPError as e: return e.code,json.loads(e.read() or b'null')
+    return post
+
+def test_http_empty_batch_is_invalid_request(http):
+    assert http([])==(200,{'jsonrpc':'2.0','id':None,'error':{'code':-32600,'message':'Invalid Request'}})
+
+def test_http_batch_drops_notifications(http):
+    st,r=http([{'jsonrpc':'2.0','method':'ping','id':1},{'jsonrpc':'2.0','method':'ping'},{'jsonrpc':'2.0','method':'nope','id':2}])
+    assert st==200 and [x['id'] for x in r]==[1,2] and r[1]['error']['code']==-32601
+    assert http([{'jsonrpc':'2.0','method':'ping'}])==(204,None)
+
+def test_http_auth(http):
+    assert http({'method':'ping','id':1},{'Authorization':'Bearer falsch'})[0]==401
+    assert http({'method':'ping','id':1},{'Origin':'http://example.com'})[0]==403
@@ -0,0 +1,19 @@
+"""_obb_parse: Benutzerliste/CSV für das Batch-Offboarding"""
+
+def test_plain_list(core):
+    assert core._obb_parse("a@contoso.example\nb@contoso.example\n\n")==[('a@contoso.example',''),('b@contoso.example','')]
+
+def test_semicolon_csv_with_header_and_forwarding(core):
+    txt="UPN;Weiterleitung\na@contoso.example;chef@contoso.example\nb@contoso.example;\n"
+    assert core._obb_parse(txt)==[('a@contoso.example','chef@contoso.example'),('b@contoso.example','')]
+
+def test_comma_csv_with_name_column(core):
+    txt="Name,UPN,Ziel\nMax Muster,max@contoso.example,archiv@contoso.example\n"
+    assert core._obb_parse(txt)==[('max@contoso.example','archiv@contoso.example')]
+
+def test_display_form_and_duplicates(core):
+    txt="Max Muster <max@contoso.example>\nMAX@contoso.example\nmax@contoso.example;x@contoso.example\n"
+    assert core._obb_parse(txt)==[('max@contoso.example','')]
+
+def test_lines_without_address_are_ignored(core):
+    assert core._obb_parse("Liste vom 1.10.\n;;\nkein Eintrag\n")==[]
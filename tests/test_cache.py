@@ -0,0 +1,67 @@
+"""RCache: Lese/Schreib-Erkennung, Invalidierung nach Identität, Zusammenspiel mit PSPool.run"""
+import time
+
+A='Get-Mailbox -Identity "a@contoso.example"|Select DisplayName'
+B='Get-Mailbox -Identity "b@contoso.example"|Select DisplayName'
+LIST='Get-Mailbox -ResultSize Unlimited|Select PrimarySmtpAddress'
+
+def test_kind(m):
+    k=m.RCache().kind
+    assert k(A)=='read' and k(LIST)=='read'
+    assert k('Set-Mailbox -Identity "a@contoso.example" -Type Shared')=='write'
+    assert k('Import-Module ExchangeOnlineManagement') is None and k('$true') is None
+
+def test_key_ignores_whitespace_and_case(m):
+    c=m.RCache(); c.put(A,'x')
+    assert c.get('  get-mailbox   -identity "A@contoso.example"|select displayname')=='x'
+
+def test_write_drops_same_identity_and_lists(m):
+    c=m.RCache()
+    for q in (A,B,LIST): c.put(q,'x')
+    c.drop('Set-Mailbox -Identity "smtp:A@contoso.example" -HiddenFromAddressListsEnabled $true')
+    assert c.get(A) is None and c.get(LIST) is None
+    assert c.get(B)=='x'
+
+def test_write_without_identity_drops_all(m):
+    c=m.RCache()
+    for q in (A,B): c.put(q,'x')
+    c.drop('Set-OrganizationConfig -AuditDisabled $false')
+    assert c.stats()['entries']==0
+
+def test_ttl_and_cap(m):
+    c=m.RCache(ttl=0.05,cap=2)
+    c.put(A,'a'); c.put(B,'b'); c.put(LIST,'l')
+    assert c.get(A) is None and c.get(B)=='b'  # älteste verdrängt
+    time.sleep(0.06)
+    assert c.get(B) is None
+
+def test_pool_serves_reads_from_cache(m,fps):
+    p=m.PSPool(1); p.start()
+    fps.answer=lambda cmd:(True,"Max","")
+    assert p.run(A)==(True,"Max","") and not p.hit()
+    assert p.run(A)==(True,"Max","") and p.hit()
+    assert fps.calls==[A]
+    p.run(A,fresh=True); assert len(fps.calls)==2 and not p.hit()
+
+def test_pool_cache_false_does_not_store(m,fps):
+    p=m.PSPool(1); p.start()
+    p.run(LIST,cache=False); p.run(LIST)
+    assert fps.calls==[LIST,LIST]
+
+def test_pool_write_invalidates(m,fps):
+    p=m.PSPool(1); p.start()
+    p.run(A); p.run(B)
+    p.run('Set-Mailbox -Identity "a@contoso.example" -Type Shared')
+    p.run(A); p.run(B)
+    assert fps.calls.count(A)==2 and fps.calls.count(B)==1
+
+def test_pool_failed_read_is_not_cached(m,fps):
+    p=m.PSPool(1); p.start()
+    fps.answer=lambda cmd:(False,"","nicht gefunden")
+    p.run(A); p.run(A)
+    assert fps.calls==[A,A]
+
+def test_connect_clears_cache(m,fps):
+    p=m.PSPool(1); p.start()
+    p.run(A); p.run('Connect-ExchangeOnline -UserPrincipalName admin@contoso.example',init=True); p.run(A)
+    assert fps.calls.count(A)==2
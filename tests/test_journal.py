@@ -0,0 +1,26 @@
+"""Journal: offene Läufe nur anbieten, wenn kein lebender Prozess sie schreibt; claim() übernimmt genau einmal"""
+import os
+
+def mk(m,pid,state='running'):
+    j=m.Journal.new('max@contoso.example',"Max",['sign_in','hide_gal'],{},'admin@contoso.example')
+    j.d.update(pid=pid,state=state); j._save(); return j
+
+def test_live_owner_is_skipped(m,core):
+    mk(m,os.getpid())
+    assert m.Journal.unfinished()==[]
+
+def test_dead_owner_is_offered_and_claimed_once(m,core,monkeypatch):
+    mk(m,999999)
+    me=os.getpid(); monkeypatch.setattr(m,'_pid_alive',lambda pid:pid in (me,4242))
+    a,=m.Journal.unfinished(); b,=m.Journal.unfinished()
+    assert a.claim() and a.d['pid']==me
+    monkeypatch.setattr(os,'getpid',lambda:4242)  # zweiter Prozess
+    assert not b.claim()
+
+def test_cancelled_run_is_offered(m,core):
+    mk(m,os.getpid(),'cancelled')
+    assert len(m.Journal.unfinished())==1
+
+def test_finished_run_is_not_offered(m,core):
+    j=mk(m,999999); j.close('done')
+    assert m.Journal.unfinished()==[] and not j.claim()
@@ -0,0 +1,84 @@
+"""_ob_user/_ob_exec: DAG-Reihenfolge, gebündelte Set-Mailbox mit Einzel-Rückfall, Abbruch, Fortsetzen aus dem Journal"""
+import threading, time
+
+UE='max.muster@contoso.example'
+
+def ans(**rules):
+    """answer-Funktion: erster Schlüssel, der im Befehl vorkommt, bestimmt die Antwort; sonst OK"""
+    def f(cmd):
+        for k,v in rules.items():
+            if k.replace('_','-') in cmd: return v(cmd) if callable(v) else v
+        return True,"",""
+    return f
+
+def test_licenses_wait_for_shared_conversion(core,fps):
+    fps.answer=ans(Set_Mailbox=lambda c:(time.sleep(0.05),(True,"",""))[1],Get_MgUserLicenseDetail=(True,"LR:2",""))
+    res=core._ob_user(UE,['remove_licenses','convert_shared','disable_sync'],{})
+    assert all(ok for ok,_ in res.values()), res
+    cs=next(i for i,c in enumerate(fps.calls) if '-Type Shared' in c)
+    lic=next(i for i,c in enumerate(fps.calls) if 'Get-MgUserLicenseDetail' in c)
+    assert cs<lic
+
+def test_failed_predecessor_skips_dependent_step(core,fps):
+    fps.answer=ans(Set_Mailbox=(False,"","Zugriff verweigert"))
+    res=core._ob_user(UE,['convert_shared','remove_licenses'],{})
+    assert res['convert_shared'][0] is False
+    assert res['remove_licenses']==(False,"Übersprungen — → Shared Mailbox fehlgeschlagen")
+    assert not any('Get-MgUserLicenseDetail' in c for c in fps.calls)
+
+def test_set_mailbox_steps_are_merged(core,fps):
+    res=core._ob_user(UE,['convert_shared','fwd','hide_gal'],{'fwd':'archiv@contoso.example'})
+    sm=[c for c in fps.calls if c.startswith('Set-Mailbox')]
+    assert len(sm)==1 and '-Type Shared' in sm[0] and '-ForwardingSmtpAddress' in sm[0] and '-HiddenFromAddressListsEnabled' in sm[0]
+    assert res=={'convert_shared':(True,"→ Shared"),'fwd':(True,"→ archiv@contoso.example"),'hide_gal':(True,"GAL versteckt")}
+
+def test_merged_call_falls_back_to_single_steps(core,fps):
+    # Sammelaufruf scheitert (z.B. Weiterleitungsziel ungültig) → einzeln wiederholen, Fehler nur beim schuldigen Schritt
+    fps.answer=ans(ForwardingSmtpAddress=(False,"","ungültige Adresse"))
+    res=core._ob_user(UE,['convert_shared','fwd','hide_gal'],{'fwd':'x@partner.example'})
+    assert len([c for c in fps.calls if c.startswith('Set-Mailbox')])==4
+    assert res['convert_shared'][0] and res['hide_gal'][0]
+    assert res['fwd']==(False,"Fehler: ungültige Adresse")
+
+def test_fwd_without_target_is_skipped_not_merged(core,fps):
+    res=core._ob_user(UE,['convert_shared','fwd'],{})
+    assert res['fwd']==(True,"Übersprungen")
+    assert [c for c in fps.calls if c.startswith('Set-Mailbox')]==[f'Set-Mailbox -Identity "{UE}" -Type Shared']
+
+def test_cancel_marks_open_steps_and_journal(m,core,fps):
+    core.ps=m.PSPool(1); core.ps.start()
+    def block(cmd):
+        m.job_now()['cancel'].set(); return True,"",""
+    fps.answer=ans(Set_User=block)
+    core.mod_status={}  # sign_in über EXO (Set-User)
+    todo=['sign_in','hide_gal','disable_sync']
+    j=core.jobs.submit("ob",core._ob_exec,UE,"Max",todo,{},core.admin)
+    while j['state'] in ('queued','running'): time.sleep(0.01)
+    assert j['state']=='cancelled'
+    res,_=j['result']
+    assert res['sign_in'][0] is True
+    assert all(not res[k][0] for k in todo[1:]), res  # Abbruch zählt nie als Erfolg
+    op=m.Journal.unfinished()
+    assert len(op)==1 and op[0].d['state']=='cancelled' and set(op[0].done())=={'sign_in'}
+
+def test_resume_skips_finished_steps(m,core,fps):
+    j=m.Journal.new(UE,"Max",['sign_in','disable_sync'],{},core.admin)
+    j.start('sign_in'); j.end('sign_in',True,"Blockiert",{'secs':1.0,'calls':2,'bytes':10,'retries':0,'shared':1})
+    met={}
+    res=core._ob_user(UE,['sign_in','disable_sync'],{},jr=j,met=met)
+    assert res['sign_in']==(True,"Blockiert") and res['disable_sync'][0]
+    assert not any('Update-MgUser' in c for c in fps.calls)
+    assert set(met)=={'sign_in','disable_sync'}
+    assert set(j.done())=={'sign_in','disable_sync'}
+
+def test_remove_groups_unreadable_listing_is_an_error(core,fps):
+    fps.answer=ans(Get_UnifiedGroup=(False,"","Zugriff verweigert"))
+    ok,det=core._ob_user(UE,['remove_groups'],{})['remove_groups']
+    assert not ok and "nicht lesbar" in det
+    assert not any(c.startswith('Remove-') for c in fps.calls)
+
+def test_remove_groups_from_planned_state(core,fps):
+    st={'Unified':['team@contoso.example'],'DL':['alle@contoso.example']}
+    ok,det=core._ob_user(UE,['remove_groups'],{'state':st})['remove_groups']
+    assert ok and det=="2 Gruppen entfernt"
+    assert not any(c.startswith('Get-') for c in fps.calls)
@@ -0,0 +1,67 @@
+"""Throttle (AIMD + Backoff) und PSPool: Wiederholung bei Drosselung, Connect-Wiederholung auf neuen Sessions"""
+import threading, time
+
+BUSY="Server Busy. Please retry after 0.01 seconds"
+
+def test_detect_and_hint(m):
+    T=m.Throttle
+    assert T.is_thr(BUSY) and T.is_thr("The remote server returned an error: (429) Too Many Requests.")
+    assert not T.is_thr("Couldn't find object") and not T.is_thr(None)
+    assert T.hint("Please retry after 3 seconds")==3.0 and T.hint("Sekunden: keine")==0.0
+
+def test_hit_halves_limit_and_pauses(m):
+    t=m.Throttle(1,8,base=0.01,cap=0.02)
+    assert t.hit(0,"retry after 0.2 seconds")>=0.2 and t.lim==4
+    t.hit(1); t.hit(2); t.hit(3)
+    assert t.lim==1 and t.hits==4 and t.until>time.time()
+
+def test_ok_raises_limit_gradually(m):
+    t=m.Throttle(1,4); t.lim=2
+    for _ in range(15): t.ok()
+    assert t.lim==2
+    t.ok(); assert t.lim==3 and t.streak==0
+
+def test_acquire_respects_limit(m):
+    t=m.Throttle(1,2); t.lim=1; t.acquire(); got=threading.Event()
+    th=threading.Thread(target=lambda:(t.acquire(),got.set())); th.start()
+    assert not got.wait(0.1)
+    t.release(); assert got.wait(1); t.release(); th.join()
+
+def test_pool_retries_throttled_call(m,fps):
+    p=m.PSPool(1); p.start(); p.thr.base=p.thr.cap=0.01; n=[]
+    def busy(cmd):
+        n.append(cmd); return (False,"",BUSY) if len(n)<3 else (True,"ok","")
+    fps.answer=busy; seen=[]; p.on_thr=lambda d,l,e:seen.append(e)
+    mt=p.meter(); r=p.run('Set-Mailbox -Identity "a@contoso.example" -Type Shared'); p.meter(False)
+    assert r==(True,"ok","") and len(n)==3 and len(seen)==2
+    assert mt['calls']==3 and mt['retries']==2
+
+def test_pool_gives_up_after_retries(m,fps):
+    p=m.PSPool(1,retries=2); p.start(); p.thr.base=p.thr.cap=0.01
+    fps.answer=lambda cmd:(False,"",BUSY)
+    assert p.run('Set-User -Identity "a@contoso.example"')==(False,"",BUSY) and len(fps.calls)==3
+
+def test_other_errors_are_not_retried(m,fps):
+    p=m.PSPool(1); p.start()
+    fps.answer=lambda cmd:(False,"","Zugriff verweigert")
+    assert p.run('Set-User -Identity "a@contoso.example"')[0] is False and len(fps.calls)==1
+
+def test_new_sessions_replay_connect(m,fps):
+    p=m.PSPool(2); p.start()
+    p.run('Connect-ExchangeOnline -UserPrincipalName admin@contoso.example -ShowBanner:$false',init=True,replay='Connect-ExchangeOnline -Silent')
+    gate=threading.Event()
+    fps.answer=lambda cmd:(gate.wait(1),(True,"",""))[1] if cmd.startswith('Start-Sleep') else (True,"","")
+    th=threading.Thread(target=p.run,args=('Start-Sleep 1',)); th.start()
+    time.sleep(0.05); p.run('Set-User -Identity "a@contoso.example"'); gate.set(); th.join()
+    assert len(p.sess)==2 and fps.calls.count('Connect-ExchangeOnline -Silent')==1
+
+def test_interactive_connect_is_not_replayed(m,fps):
+    p=m.PSPool(2); p.start()
+    p.run('Connect-ExchangeOnline -UserPrincipalName admin@contoso.example',init=True,replay=False)
+    gate=threading.Event()
+    fps.answer=lambda cmd:(gate.wait(1),(True,"",""))[1] if cmd.startswith('Start-Sleep') else (True,"","")
+    th=threading.Thread(target=p.run,args=('Start-Sleep 1',)); th.start()
+    time.sleep(0.05); threading.Timer(0.2,gate.set).start()
+    assert p.run('Set-User -Identity "a@contoso.example"')[0] is True; th.join()
+    assert len(p.sess)==1 and p.size==1  # zweite Session aufgegeben, Pool auf die angemeldete begrenzt
+    assert fps.calls.count('Connect-ExchangeOnline -UserPrincipalName admin@contoso.example')==1